@@ -4,6 +4,6 @@ from pathlib import Path
 # Ensure /app/src is on the import path on Spaces
 sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
 
-from careerbot.main import app
+from careerbot.main import launch
 if __name__ == "__main__":
-    app.launch()
+    launch()
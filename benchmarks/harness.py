@@ -0,0 +1,70 @@
+# Shared setup for the benchmarks - a ChatOrchestrator wired like main.build_app, but against the mock API
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from careerbot.chat.answer_cache import AnswerCache, content_fingerprint
+from careerbot.chat.history import HistoryWindow
+from careerbot.chat.orchestrator import ChatOrchestrator
+from careerbot.chat.prefilter import ScopePrefilter, SessionThrottle, default_classifier
+from careerbot.chat.system_prompt import system_message_text
+from careerbot.tools.capture import LocalCapture
+from careerbot.tools.definitions import TOOLS
+from careerbot.tools.selector import ToolSelector
+from careerbot.user_profile.loader import load_profile
+from careerbot.user_profile.prompt import build_profile_chunks, build_profile_context
+from careerbot.user_profile.retrieval import ProfileRetriever
+
+PROFILE_STORE_PATH = Path(__file__).resolve().parents[1] / "data" / "profile_store.json"
+
+# Build an orchestrator on the real system prompt and profile; options mirror the CAREERBOT_* settings
+def build_orchestrator(
+    *,
+    client,
+    tool_results_dir: Path,
+    async_client=None,
+    profile_context_mode: str = "full",
+    answer_cache: bool = False,
+    history_token_budget: int = 2000,
+    max_tool_rounds: int = 1,
+    chain_responses: bool = True,
+    tool_selection: bool = False,
+    local_capture: bool = False,
+    max_reply_words: int | None = None,
+    prefilter: bool = False,
+) -> ChatOrchestrator:
+    profile_data = load_profile(PROFILE_STORE_PATH)
+
+    profile_retriever = None
+    if profile_context_mode == "retrieval":
+        profile_retriever = ProfileRetriever(build_profile_chunks(profile_data))
+        profile_context = profile_retriever.core_context()
+    else:
+        profile_context = build_profile_context(profile_data=profile_data)
+
+    cache = None
+    if answer_cache:
+        cache = AnswerCache(fingerprint=lambda: content_fingerprint(system_message_text, paths=(PROFILE_STORE_PATH,)))
+
+    history_window = HistoryWindow(token_budget=history_token_budget) if history_token_budget > 0 else None
+
+    return ChatOrchestrator(
+        client=client,
+        async_client=async_client,
+        model="mock-model",
+        system_message={"role": "system", "content": [{"type": "input_text", "text": system_message_text}]},
+        profile_context=profile_context,
+        tools=TOOLS,
+        tool_results_dir=tool_results_dir,
+        profile_retriever=profile_retriever,
+        answer_cache=cache,
+        history_window=history_window,
+        max_tool_rounds=max_tool_rounds,
+        chain_responses=chain_responses,
+        tool_selector=ToolSelector(TOOLS) if tool_selection else None,
+        local_capture=LocalCapture(tools=TOOLS) if local_capture else None,
+        max_reply_words=max_reply_words,
+        prefilter=ScopePrefilter(classifier=default_classifier(), throttle=SessionThrottle()) if prefilter else None,
+    )
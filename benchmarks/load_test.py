@@ -0,0 +1,209 @@
+# Replays recorded conversations through ChatOrchestrator against the mock Responses API and reports
+# end-to-end latency, time to first token, tokens per request and throughput at each concurrency level.
+#
+#   python benchmarks/load_test.py --mode async --concurrency 1 10 100
+#   python benchmarks/load_test.py --conversations my_sessions.jsonl --mode stream --tool-writer
+
+import argparse
+import asyncio
+import json
+import math
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from harness import build_orchestrator
+from mock_responses import MockAsyncClient, MockBehaviour, MockClient
+
+from careerbot.tools.writer import JsonlWriter, configure_writer
+
+DEFAULT_CONVERSATIONS = Path(__file__).resolve().parent / "conversations.jsonl"
+
+@dataclass
+class TurnSample:
+    latency: float
+    ttft: float
+
+# One conversation per line: {"turns": [...]}, or a single-turn {"message": ...} / {"body": ...}
+def load_conversations(path: Path) -> list[list[str]]:
+    conversations = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            turns = record.get("turns")
+            if not turns:
+                single = record.get("message") or record.get("body") or record.get("question")
+                turns = [single] if single else []
+            if turns:
+                conversations.append([str(t) for t in turns])
+    return conversations
+
+# Nearest-rank percentile
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+# Gradio passes history as role/content dicts
+def _extend_history(history: list[dict], message: str, reply: str) -> list[dict]:
+    return history + [{"role": "user", "content": message}, {"role": "assistant", "content": reply}]
+
+def _run_session_sync(orchestrator, turns: list[str], mode: str) -> list[TurnSample]:
+    samples = []
+    history: list[dict] = []
+
+    for message in turns:
+        start = time.perf_counter()
+        first = None
+        if mode == "stream":
+            reply = ""
+            for reply in orchestrator(message, history):
+                if first is None:
+                    first = time.perf_counter() - start
+        else:
+            reply = orchestrator.chat(message=message, history=history)
+        latency = time.perf_counter() - start
+
+        samples.append(TurnSample(latency=latency, ttft=first if first is not None else latency))
+        history = _extend_history(history, message, reply)
+    return samples
+
+async def _run_session_async(orchestrator, turns: list[str]) -> list[TurnSample]:
+    samples = []
+    history: list[dict] = []
+
+    for message in turns:
+        start = time.perf_counter()
+        first = None
+        reply = ""
+        async for reply in orchestrator.astream_chat(message=message, history=history):
+            if first is None:
+                first = time.perf_counter() - start
+        latency = time.perf_counter() - start
+
+        samples.append(TurnSample(latency=latency, ttft=first if first is not None else latency))
+        history = _extend_history(history, message, reply)
+    return samples
+
+async def _run_async(orchestrator, sessions: list[list[str]], concurrency: int) -> list[TurnSample]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(turns):
+        async with semaphore:
+            return await _run_session_async(orchestrator, turns)
+
+    results = await asyncio.gather(*(bounded(turns) for turns in sessions))
+    return [sample for session in results for sample in session]
+
+# Run every session once at the given concurrency; returns the report row
+def run_level(args, conversations: list[list[str]], concurrency: int) -> dict:
+    behaviour = MockBehaviour(
+        first_token_latency=args.first_token_latency,
+        per_token_latency=args.per_token_latency,
+        jitter=args.jitter,
+        tool_calls=not args.no_tool_calls,
+    )
+    sessions = [conversations[i % len(conversations)] for i in range(max(args.sessions, concurrency))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = None
+        if args.tool_writer:
+            writer = JsonlWriter()
+            configure_writer(writer)
+
+        client = MockClient(behaviour)
+        async_client = MockAsyncClient(behaviour)
+        orchestrator = build_orchestrator(
+            client=client,
+            async_client=async_client,
+            tool_results_dir=Path(tmp),
+            profile_context_mode=args.profile_context,
+            answer_cache=args.answer_cache,
+        )
+
+        start = time.perf_counter()
+        if args.mode == "async":
+            samples = asyncio.run(_run_async(orchestrator, sessions, concurrency))
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = pool.map(lambda turns: _run_session_sync(orchestrator, turns, args.mode), sessions)
+                samples = [sample for session in results for sample in session]
+        wall = time.perf_counter() - start
+
+        if writer is not None:
+            writer.close()
+            configure_writer(None)
+
+    mock = async_client.responses if args.mode == "async" else client.responses
+    usages = mock.usages
+    turns = len(samples)
+    latencies = [s.latency for s in samples]
+    ttfts = [s.ttft for s in samples]
+
+    return {
+        "concurrency": concurrency,
+        "turns": turns,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "ttft_p50_ms": percentile(ttfts, 50) * 1000,
+        "ttft_p95_ms": percentile(ttfts, 95) * 1000,
+        "llm_calls_per_turn": len(usages) / turns if turns else 0.0,
+        "input_tokens_per_request": sum(u.input_tokens for u in usages) / len(usages) if usages else 0.0,
+        "input_tokens_per_turn": sum(u.input_tokens for u in usages) / turns if turns else 0.0,
+        "cached_tokens_per_turn": sum(u.input_tokens_details.cached_tokens for u in usages) / turns if turns else 0.0,
+        "output_tokens_per_turn": sum(u.output_tokens for u in usages) / turns if turns else 0.0,
+        "turns_per_s": turns / wall if wall else 0.0,
+    }
+
+def _print_table(rows: list[dict]) -> None:
+    columns = [
+        ("concurrency", "{:>5}"), ("turns", "{:>6}"),
+        ("p50_ms", "{:>8.1f}"), ("p95_ms", "{:>8.1f}"), ("p99_ms", "{:>8.1f}"),
+        ("ttft_p50_ms", "{:>10.1f}"), ("ttft_p95_ms", "{:>10.1f}"),
+        ("llm_calls_per_turn", "{:>6.2f}"), ("input_tokens_per_turn", "{:>8.0f}"),
+        ("cached_tokens_per_turn", "{:>8.0f}"), ("turns_per_s", "{:>8.1f}"),
+    ]
+    headers = ["conc", "turns", "p50 ms", "p95 ms", "p99 ms", "ttft p50", "ttft p95", "calls", "in tok", "cached", "turns/s"]
+    widths = [len(fmt.format(0)) for _, fmt in columns]
+    print("  ".join(h.rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(fmt.format(row[key]) for key, fmt in columns))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay conversations against a mock Responses API")
+    parser.add_argument("--conversations", type=Path, default=DEFAULT_CONVERSATIONS)
+    parser.add_argument("--mode", choices=["sync", "stream", "async"], default="stream")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--sessions", type=int, default=50, help="sessions per level (at least the concurrency)")
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--per-token-latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--no-tool-calls", action="store_true")
+    parser.add_argument("--tool-writer", action="store_true", help="write tool results through the background writer")
+    parser.add_argument("--profile-context", choices=["full", "retrieval"], default="full")
+    parser.add_argument("--answer-cache", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print rows as JSON lines")
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.conversations)
+    if not conversations:
+        raise SystemExit(f"No conversations in {args.conversations}")
+
+    rows = [run_level(args, conversations, concurrency) for concurrency in args.concurrency]
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        _print_table(rows)
+
+if __name__ == "__main__":
+    main()
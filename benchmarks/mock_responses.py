@@ -0,0 +1,253 @@
+# Local stand-in for client.responses.create - lets benchmarks run without network access.
+# Replies, tool calls, streaming and latency are all simulated from a MockBehaviour.
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import time
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_HIRING_RE = re.compile(r"\b(hiring|recruiting|vacancy|opening)\b.*?\bfor (?:an? )?([A-Z][\w ]+?)(?: role| position|[.,!]|$)", re.IGNORECASE)
+_COMPANY_RE = re.compile(r"(?: role| position)?\s+at\s+([A-Z][\w&]*(?:\s+[A-Z][\w&]*)*)")
+
+# Shape of the simulated model
+@dataclass
+class MockBehaviour:
+    reply: str = "Ali is a Data Engineer at NatWest Group working with Snowflake, SQL and Amazon S3."
+    tool_reply: str = "Thanks - those details have been recorded for Ali."
+    # Seconds before the first token, then per further token
+    first_token_latency: float = 0.4
+    per_token_latency: float = 0.02
+    # Each latency is scaled by a random factor in [1 - jitter, 1 + jitter]
+    jitter: float = 0.0
+    # Emit function calls for emails and hiring messages, like the real model is prompted to
+    tool_calls: bool = True
+    # What a round after tool outputs does: "reply" with tool_reply, "repeat" the same tool calls
+    # (while tools may still be called), or stay "silent" with no text
+    tool_follow_up: str = "reply"
+    seed: int = 0
+
+# Rough token count for the mock usage figures
+def _approx_tokens(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str)) // 4
+
+def _message_item(item_id: str, text: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=item_id,
+        type="message",
+        content=[SimpleNamespace(type="output_text", text=text)]
+    )
+
+def _function_call_item(item_id: str, name: str, arguments: dict) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=item_id,
+        type="function_call",
+        call_id=f"call_{item_id}",
+        name=name,
+        arguments=json.dumps(arguments)
+    )
+
+# Text of the last user message in the input
+def _last_user_text(input_items: list) -> str:
+    for item in reversed(input_items):
+        if isinstance(item, dict) and item.get("role") == "user":
+            return "\n".join(b.get("text", "") for b in item.get("content", []) if isinstance(b, dict))
+    return ""
+
+# A follow-up round is one whose input ends with tool outputs
+def _is_tool_follow_up(input_items: list) -> bool:
+    last = input_items[-1] if input_items else None
+    return isinstance(last, dict) and last.get("type") == "function_call_output"
+
+# Shared planning logic for the sync and async mocks
+class _MockResponsesBase:
+
+    def __init__(self, behaviour: MockBehaviour):
+        self._behaviour = behaviour
+        self._random = random.Random(behaviour.seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._seen_cache_keys: set[str] = set()
+        # Full context (input + output) of every response, for previous_response_id
+        self._stored: dict[str, list] = {}
+        self.calls: list[dict] = []
+        self.usages: list[SimpleNamespace] = []
+        # Approximate tokens of input actually sent with each call
+        self.sent_tokens: list[int] = []
+
+    def _next_id(self, prefix: str) -> str:
+        with self._lock:
+            return f"{prefix}_{next(self._ids)}"
+
+    def _scaled(self, seconds: float) -> float:
+        if not self._behaviour.jitter:
+            return seconds
+        with self._lock:
+            factor = 1 + self._random.uniform(-self._behaviour.jitter, self._behaviour.jitter)
+        return max(0.0, seconds * factor)
+
+    # The whole conversation a call sees - a chained call's stored context plus its new input
+    def _context(self, kwargs: dict) -> tuple[list, list]:
+        previous = kwargs.get("previous_response_id")
+        if not previous:
+            return [], list(kwargs.get("input", []))
+        with self._lock:
+            stored = self._stored.get(previous)
+        if stored is None:
+            raise ValueError(f"Previous response with id '{previous}' not found.")
+        return stored, stored + list(kwargs.get("input", []))
+
+    # Usage with cached_tokens filled in once a prompt_cache_key has been seen before.
+    # Like the real API, a chained call is billed for the stored context as input too
+    def _usage(self, kwargs: dict, stored: list, input_items: list, output_text: str) -> SimpleNamespace:
+        input_tokens = _approx_tokens(input_items) + _approx_tokens(kwargs.get("tools", []))
+        cached = 0
+
+        key = kwargs.get("prompt_cache_key")
+        with self._lock:
+            if stored:
+                cached = _approx_tokens(kwargs.get("tools", [])) + _approx_tokens(stored)
+            elif key in self._seen_cache_keys:
+                cached = _approx_tokens(kwargs.get("tools", [])) + _approx_tokens(input_items[:2])
+            elif key:
+                self._seen_cache_keys.add(key)
+
+        return SimpleNamespace(
+            input_tokens=input_tokens,
+            input_tokens_details=SimpleNamespace(cached_tokens=cached),
+            output_tokens=max(1, len(output_text) // 4)
+        )
+
+    # Decide the response: function calls for captured details on a first round, text otherwise
+    def _plan(self, kwargs: dict) -> tuple[SimpleNamespace, list[str]]:
+        with self._lock:
+            self.calls.append(kwargs)
+            self.sent_tokens.append(_approx_tokens(kwargs.get("input", [])))
+
+        stored, input_items = self._context(kwargs)
+        tool_names = {t.get("name") for t in kwargs.get("tools", []) if isinstance(t, dict)}
+        if kwargs.get("tool_choice") == "none":
+            tool_names = set()
+        follow_up = _is_tool_follow_up(input_items)
+        output = []
+        text = self._behaviour.reply
+
+        if self._behaviour.tool_calls and tool_names and (not follow_up or self._behaviour.tool_follow_up == "repeat"):
+            message = _last_user_text(input_items)
+            email = _EMAIL_RE.search(message)
+            if email and "record_user_details" in tool_names:
+                output.append(_function_call_item(self._next_id("fc"), "record_user_details", {"email": email.group(0)}))
+            for match in _HIRING_RE.finditer(message):
+                if "record_role_interest" in tool_names:
+                    role = {"title": match.group(2).strip()}
+                    company = _COMPANY_RE.match(message, match.end(2))
+                    if company:
+                        role["company"] = company.group(1)
+                    output.append(_function_call_item(self._next_id("fc"), "record_role_interest", role))
+            if output:
+                text = ""
+
+        if follow_up and not output:
+            text = "" if self._behaviour.tool_follow_up == "silent" and tool_names else self._behaviour.tool_reply
+
+        tokens = []
+        if text:
+            output.append(_message_item(self._next_id("msg"), text))
+            tokens = [w + " " for w in text.split(" ")]
+            tokens[-1] = tokens[-1].rstrip()
+
+        usage = self._usage(kwargs, stored, input_items, text)
+        response = SimpleNamespace(
+            id=self._next_id("resp"),
+            status="completed",
+            output=output,
+            usage=usage
+        )
+        with self._lock:
+            self.usages.append(usage)
+            self._stored[response.id] = input_items + output
+        return response, tokens
+
+    def _total_latency(self, tokens: list[str]) -> float:
+        return self._scaled(self._behaviour.first_token_latency) + self._scaled(self._behaviour.per_token_latency) * max(0, len(tokens) - 1)
+
+# Stream events shaped like the Responses streaming API
+class _MockStream:
+
+    def __init__(self, owner: _MockResponsesBase, response: SimpleNamespace, tokens: list[str]):
+        self._owner = owner
+        self._response = response
+        self._tokens = tokens
+        self.closed = False
+
+    def __iter__(self):
+        behaviour = self._owner._behaviour
+        time.sleep(self._owner._scaled(behaviour.first_token_latency))
+        for i, token in enumerate(self._tokens):
+            if self.closed:
+                return
+            if i:
+                time.sleep(self._owner._scaled(behaviour.per_token_latency))
+            yield SimpleNamespace(type="response.output_text.delta", delta=token)
+        yield SimpleNamespace(type="response.completed", response=self._response)
+
+    def close(self) -> None:
+        self.closed = True
+
+class _MockAsyncStream(_MockStream):
+
+    async def __aiter__(self):
+        behaviour = self._owner._behaviour
+        await asyncio.sleep(self._owner._scaled(behaviour.first_token_latency))
+        for i, token in enumerate(self._tokens):
+            if self.closed:
+                return
+            if i:
+                await asyncio.sleep(self._owner._scaled(behaviour.per_token_latency))
+            yield SimpleNamespace(type="response.output_text.delta", delta=token)
+        yield SimpleNamespace(type="response.completed", response=self._response)
+
+    async def close(self) -> None:
+        self.closed = True
+
+class _MockResponses(_MockResponsesBase):
+
+    def create(self, *, stream: bool = False, **kwargs):
+        response, tokens = self._plan(kwargs)
+        if stream:
+            return _MockStream(self, response, tokens)
+
+        # A blocking call returns only once every token has been generated
+        time.sleep(self._total_latency(tokens))
+        return response
+
+class _MockAsyncResponses(_MockResponsesBase):
+
+    async def create(self, *, stream: bool = False, **kwargs):
+        response, tokens = self._plan(kwargs)
+        if stream:
+            return _MockAsyncStream(self, response, tokens)
+
+        await asyncio.sleep(self._total_latency(tokens))
+        return response
+
+# Client exposing the same responses.create surface as openai.OpenAI
+@dataclass
+class MockClient:
+    behaviour: MockBehaviour = field(default_factory=MockBehaviour)
+
+    def __post_init__(self):
+        self.responses = _MockResponses(self.behaviour)
+
+# Client exposing the same responses.create surface as openai.AsyncOpenAI
+@dataclass
+class MockAsyncClient:
+    behaviour: MockBehaviour = field(default_factory=MockBehaviour)
+
+    def __post_init__(self):
+        self.responses = _MockAsyncResponses(self.behaviour)
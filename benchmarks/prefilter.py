@@ -0,0 +1,68 @@
+# Share of traffic the scope prefilter answers without the model, replaying the recorded in-scope
+# conversations and a set of out-of-scope, injection and abusive ones against the mock API. Each
+# conversation is its own session, so the abusive one is paused after its third strike. In-scope
+# turns screened out are false positives and should stay at zero
+#
+#   python benchmarks/prefilter.py
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from harness import build_orchestrator
+from load_test import DEFAULT_CONVERSATIONS, load_conversations
+from mock_responses import MockBehaviour, MockClient
+
+DEFAULT_OUT_OF_SCOPE = Path(__file__).resolve().parent / "out_of_scope.jsonl"
+
+def _run(conversations: list[list[str]], prefilter: bool) -> dict:
+    client = MockClient(MockBehaviour(first_token_latency=0.0, per_token_latency=0.0))
+    responses = client.responses
+    screened, turns = 0, 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = build_orchestrator(client=client, tool_results_dir=Path(tmp), prefilter=prefilter)
+        start = time.perf_counter()
+        for index, messages in enumerate(conversations):
+            history = []
+            for message in messages:
+                before = len(responses.calls)
+                text = orchestrator.chat(message=message, history=history, session_id=f"bench-{index}")
+                turns += 1
+                screened += len(responses.calls) == before
+                history += [{"role": "user", "content": message}, {"role": "assistant", "content": text}]
+        elapsed = time.perf_counter() - start
+        orchestrator.close()
+
+    return {
+        "turns": turns,
+        "screened": screened,
+        "calls": len(responses.calls),
+        "sent": sum(responses.sent_tokens),
+        "ms": elapsed * 1000,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Traffic answered by the scope prefilter without the model")
+    parser.add_argument("--conversations", type=Path, default=DEFAULT_CONVERSATIONS)
+    parser.add_argument("--out-of-scope", type=Path, default=DEFAULT_OUT_OF_SCOPE)
+    args = parser.parse_args()
+
+    traffic = {
+        "in scope": load_conversations(args.conversations),
+        "out of scope": load_conversations(args.out_of_scope),
+    }
+    traffic["combined"] = traffic["in scope"] + traffic["out of scope"]
+
+    print(f"{'traffic':<13} {'prefilter':<10} {'turns':>6} {'no model':>9} {'share':>7} {'llm calls':>10} {'tokens sent':>12} {'ms':>8}")
+    for name, conversations in traffic.items():
+        for prefilter in (False, True):
+            r = _run(conversations, prefilter)
+            print(
+                f"{name:<13} {'on' if prefilter else 'off':<10} {r['turns']:>6} {r['screened']:>9} "
+                f"{r['screened'] / r['turns']:>7.1%} {r['calls']:>10} {r['sent']:>12} {r['ms']:>8.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
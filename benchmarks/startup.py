@@ -0,0 +1,127 @@
+# Measures cold-start time, split into module imports and app initialisation, for each startup mode
+#
+#   python benchmarks/startup.py --runs 3
+#
+# Every run is a fresh interpreter so nothing is warm in sys.modules. Modes:
+#   eager     - build the orchestrator, then the UI (CAREERBOT_LAZY_STARTUP=false)
+#   lazy      - build the UI first, then the orchestrator on a background thread
+#   artifact  - lazy, with the profile context loaded from a prebuilt artifact
+# No network calls are made; the API key is a placeholder.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# Runs in the child interpreter; mirrors build_app() with timestamps between the phases
+CHILD = r"""
+import dataclasses, json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+mode, artifact_path = sys.argv[2], sys.argv[3]
+
+import careerbot.main as main
+from careerbot.config import load_settings
+imported = time.perf_counter()
+
+settings = dataclasses.replace(load_settings(), lazy_startup=(mode != "eager"), artifact_path=artifact_path)
+if settings.lazy_startup:
+    orchestrator = main.LazyOrchestrator(lambda: main.build_orchestrator(settings))
+else:
+    orchestrator = main.build_orchestrator(settings)
+orchestrator_built = time.perf_counter()
+
+from careerbot.ui.gradio_app import build_chat_interface
+gradio_imported = time.perf_counter()
+build_chat_interface(orchestrator, use_async=settings.async_mode, concurrency_limit=settings.max_concurrent_chats)
+ui_ready = time.perf_counter()
+
+if settings.lazy_startup:
+    orchestrator.start()
+    orchestrator.get()
+chat_ready = time.perf_counter()
+
+print(json.dumps({
+    "import_careerbot": imported - start,
+    "orchestrator": (orchestrator_built - imported) if mode == "eager" else orchestrator.build_seconds,
+    "import_gradio": gradio_imported - orchestrator_built,
+    "build_ui": ui_ready - gradio_imported,
+    "ui_ready": ui_ready - start,
+    "chat_ready": chat_ready - start,
+}))
+"""
+
+PHASES = ["import_careerbot", "orchestrator", "import_gradio", "build_ui", "ui_ready", "chat_ready"]
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-startup-benchmark")
+    env["PYTHONPATH"] = str(SRC)
+    return env
+
+def _run_mode(mode: str, artifact_path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, str(SRC), mode, str(artifact_path)],
+        env=_child_env(), capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+# Cumulative import time per top-level package, from python -X importtime
+def _import_breakdown(modules: list[str]) -> dict[str, float]:
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in modules)],
+        env=_child_env(), capture_output=True, text=True, check=True
+    )
+    roots = {m.split(".")[0] for m in modules}
+    totals: dict[str, float] = defaultdict(float)
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Only top-level imports; nested ones are indented and already counted in their parent
+        if not name.startswith("  ") and name.strip().split(".")[0] in roots:
+            name = name.strip()
+            try:
+                totals[name.split(".")[0]] += int(cumulative.strip()) / 1e6
+            except ValueError:
+                continue
+    return dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup-time benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", default=["eager", "lazy", "artifact"])
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_path = Path(tmp) / "careerbot_artifact.json"
+        missing_path = Path(tmp) / "missing.json"
+        subprocess.run(
+            [sys.executable, "-m", "careerbot.artifact", "--out", str(artifact_path)],
+            env=_child_env(), capture_output=True, check=True
+        )
+
+        print("Import time by top-level package (one cold run)")
+        # Third-party packages first, so careerbot's own figure excludes them
+        breakdown = _import_breakdown(["gradio", "openai", "httpx", "careerbot.main", "careerbot.ui.gradio_app"])
+        for name, seconds in list(breakdown.items())[:args.top]:
+            print(f"  {name:<24} {seconds:7.3f}s")
+
+        print(f"\nStartup phases, median of {args.runs} runs (seconds)")
+        print(f"  {'mode':<10}" + "".join(f"{p:>18}" for p in PHASES))
+        for mode in args.modes:
+            path = artifact_path if mode == "artifact" else missing_path
+            runs = [_run_mode(mode, path) for _ in range(args.runs)]
+            medians = {p: statistics.median(r[p] for r in runs) for p in PHASES}
+            print(f"  {mode:<10}" + "".join(f"{medians[p]:>18.3f}" for p in PHASES))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Round trips and tokens per turn for the tool loop, before and after chaining follow-ups on
+# previous_response_id and capping tool rounds. "before" resends the whole transcript and offers
+# tools for up to 10 rounds plus a final call; "after" is the default configuration, and "local"
+# adds the local capture fast path for pasted emails.
+# Each model behaviour is a way the follow-up round can go:
+#   reply   - answers in text once it has the tool outputs
+#   repeat  - calls the same tools again whenever it is allowed to
+#   silent  - returns no text while tools are on offer
+#
+#   python benchmarks/tool_loop.py --behaviours reply repeat silent
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from harness import build_orchestrator
+from mock_responses import MockBehaviour, MockClient
+
+MODES = {
+    "before": {"max_tool_rounds": 10, "chain_responses": False},
+    "after": {"max_tool_rounds": 1, "chain_responses": True},
+    "local": {"max_tool_rounds": 1, "chain_responses": True, "local_capture": True},
+}
+
+# Turns that call tools, each with the history the conversation would have by then
+TOOL_TURNS = [
+    ("Hi, I'm hiring for a Senior Data Engineer role at Acme in London.", []),
+    ("You can reach me at jane.doe@acme.com", [
+        {"role": "user", "content": "Hi, I'm hiring for a Senior Data Engineer role at Acme in London."},
+        {"role": "assistant", "content": "Thanks - I've noted the Senior Data Engineer role for Ali."},
+    ]),
+    ("We are hiring for a Backend Engineer role and also recruiting for an ML Engineer position. Email sam@example.com", []),
+    ("reach me at recruiter@talent.io", []),
+]
+
+def _run(mode: str, behaviour_name: str, runs: int) -> dict:
+    behaviour = MockBehaviour(first_token_latency=0.05, per_token_latency=0.0, tool_follow_up=behaviour_name)
+    client = MockClient(behaviour)
+    calls, sent, billed, cached, latency, answered = [], [], [], [], [], 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = build_orchestrator(client=client, tool_results_dir=Path(tmp), **MODES[mode])
+        responses = client.responses
+
+        for _ in range(runs):
+            for message, history in TOOL_TURNS:
+                before = len(responses.calls)
+                start = time.perf_counter()
+                text = orchestrator.chat(message=message, history=history)
+                latency.append(time.perf_counter() - start)
+
+                usages = responses.usages[before:]
+                calls.append(len(usages))
+                sent.append(sum(responses.sent_tokens[before:]))
+                billed.append(sum(u.input_tokens for u in usages))
+                cached.append(sum(u.input_tokens_details.cached_tokens for u in usages))
+                answered += text != "I couldn't complete that action right now."
+
+    turns = len(calls)
+    return {
+        "calls": statistics.mean(calls),
+        "sent": statistics.mean(sent),
+        "billed": statistics.mean(billed),
+        "uncached": statistics.mean(b - c for b, c in zip(billed, cached)),
+        "latency": statistics.mean(latency),
+        "answered": answered / turns,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tool loop round trips and tokens per turn")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--behaviours", nargs="+", default=["reply", "repeat", "silent"], choices=["reply", "repeat", "silent"])
+    args = parser.parse_args()
+
+    print(f"{'behaviour':<9} {'mode':<7} {'calls/turn':>10} {'sent tok':>9} {'billed in':>10} {'uncached':>9} {'latency':>9} {'answered':>9}")
+    for behaviour_name in args.behaviours:
+        for mode in MODES:
+            r = _run(mode, behaviour_name, args.runs)
+            print(
+                f"{behaviour_name:<9} {mode:<7} {r['calls']:>10.2f} {r['sent']:>9.0f} {r['billed']:>10.0f} "
+                f"{r['uncached']:>9.0f} {r['latency'] * 1000:>7.0f}ms {r['answered']:>8.0%}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Tool schemas sent per turn with every tool offered on every turn ("all") and with the per-turn
+# tool selector ("selected"), replaying the recorded conversations against the mock API.
+# Tool calls made should match between the two - a lower count means a missed capture
+#
+#   python benchmarks/tool_selection.py
+
+import argparse
+import json
+import statistics
+import tempfile
+from pathlib import Path
+
+from harness import build_orchestrator
+from load_test import DEFAULT_CONVERSATIONS, load_conversations
+from mock_responses import MockBehaviour, MockClient
+
+# Rough token count, as the mock bills them
+def _tokens(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str)) // 4
+
+def _run(conversations: list[list[str]], tool_selection: bool) -> dict:
+    client = MockClient(MockBehaviour(first_token_latency=0.0, per_token_latency=0.0))
+    responses = client.responses
+    tool_tokens, offered, first_input = [], [], []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = build_orchestrator(client=client, tool_results_dir=Path(tmp), tool_selection=tool_selection)
+        for turns in conversations:
+            history = []
+            for message in turns:
+                before = len(responses.calls)
+                text = orchestrator.chat(message=message, history=history)
+                first = responses.calls[before]
+                tool_tokens.append(_tokens(first.get("tools", [])))
+                offered.append(len(first.get("tools", [])))
+                first_input.append(responses.usages[before].input_tokens)
+                history += [{"role": "user", "content": message}, {"role": "assistant", "content": text}]
+
+    tool_calls = sum(1 for call in responses.calls for item in call.get("input", []) if isinstance(item, dict) and item.get("type") == "function_call_output")
+    return {
+        "turns": len(offered),
+        "offered": statistics.mean(offered),
+        "tool_tokens": statistics.mean(tool_tokens),
+        "first_input": statistics.mean(first_input),
+        "tool_calls": tool_calls,
+        "no_tools": sum(1 for n in offered if n == 0),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tool schemas sent per turn, with and without per-turn selection")
+    parser.add_argument("--conversations", type=Path, default=DEFAULT_CONVERSATIONS)
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.conversations)
+    print(f"{'tools':<9} {'turns':>6} {'offered/turn':>13} {'schema tok':>11} {'1st call in':>12} {'tool calls':>11} {'no tools':>9}")
+    for name, selection in (("all", False), ("selected", True)):
+        r = _run(conversations, selection)
+        print(
+            f"{name:<9} {r['turns']:>6} {r['offered']:>13.2f} {r['tool_tokens']:>11.0f} "
+            f"{r['first_input']:>12.0f} {r['tool_calls']:>11} {r['no_tools']:>9}"
+        )
+
+if __name__ == "__main__":
+    main()
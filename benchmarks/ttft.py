@@ -0,0 +1,53 @@
+# Measures time-to-first-token for the blocking and streaming chat paths against the mock Responses API
+#
+#   python benchmarks/ttft.py --runs 5
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from harness import build_orchestrator
+from mock_responses import MockBehaviour, MockClient
+
+QUESTION = "What does Ali do at NatWest?"
+
+# Blocking path: the first token is only visible once the whole reply is back
+def _time_blocking(orchestrator) -> tuple[float, float]:
+    start = time.perf_counter()
+    orchestrator.chat(message=QUESTION, history=[])
+    total = time.perf_counter() - start
+    return total, total
+
+# Streaming path: the first token is visible as soon as the first delta arrives
+def _time_streaming(orchestrator) -> tuple[float, float]:
+    start = time.perf_counter()
+    first = None
+    for _ in orchestrator(QUESTION, []):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time-to-first-token benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-token-latency", type=float, default=0.4)
+    parser.add_argument("--per-token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    behaviour = MockBehaviour(first_token_latency=args.first_token_latency, per_token_latency=args.per_token_latency)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        orchestrator = build_orchestrator(client=MockClient(behaviour), tool_results_dir=Path(tmp))
+
+        for label, timer in (("blocking", _time_blocking), ("streaming", _time_streaming)):
+            samples = [timer(orchestrator) for _ in range(args.runs)]
+            ttft = statistics.median(s[0] for s in samples)
+            total = statistics.median(s[1] for s in samples)
+            print(f"{label:<10} ttft={ttft * 1000:7.1f} ms  total={total * 1000:7.1f} ms")
+
+        print(f"prompt cache: {orchestrator.prompt_cache_stats.snapshot()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Streams a reply that overruns the 120-word limit against the mock Responses API, with no limit ("off"),
+# with the limit on a call that may still call tools ("cut" - read to the end, shown text cut) and on a
+# call that cannot ("cancel" - the stream is stopped at the last sentence that fits)
+#
+#   python benchmarks/word_limit.py --runs 5
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from harness import build_orchestrator
+from mock_responses import MockBehaviour, MockClient
+
+QUESTION = "Give me a detailed history of Ali's career."
+
+# 24 sentences of 9 words - about 216 words, well past the limit
+LONG_REPLY = " ".join(
+    f"Ali delivered project number {i} using Snowflake and Python."
+    for i in range(1, 25)
+)
+
+MODES = {
+    "off": {"max_reply_words": None, "max_tool_rounds": 1},
+    "cut": {"max_reply_words": 120, "max_tool_rounds": 1},
+    "cancel": {"max_reply_words": 120, "max_tool_rounds": 0},
+}
+
+def _time_turn(orchestrator) -> tuple[float, str]:
+    start = time.perf_counter()
+    text = ""
+    for text in orchestrator(QUESTION, []):
+        pass
+    return time.perf_counter() - start, text
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streamed reply word-limit benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-token-latency", type=float, default=0.4)
+    parser.add_argument("--per-token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    behaviour = MockBehaviour(
+        reply=LONG_REPLY, first_token_latency=args.first_token_latency, per_token_latency=args.per_token_latency
+    )
+
+    print(f"{'mode':<8} {'total ms':>9} {'words':>6}  ends with")
+    for mode, options in MODES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            orchestrator = build_orchestrator(client=MockClient(behaviour), tool_results_dir=Path(tmp), **options)
+            samples = [_time_turn(orchestrator) for _ in range(args.runs)]
+            orchestrator.close()
+
+        total = statistics.median(s[0] for s in samples)
+        text = samples[-1][1]
+        print(f"{mode:<8} {total * 1000:>9.1f} {len(text.split()):>6}  ...{text[-40:]!r}")
+
+if __name__ == "__main__":
+    main()
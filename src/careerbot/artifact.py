@@ -0,0 +1,123 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from careerbot.config import DEFAULT_ARTIFACT_PATH, DEFAULT_CANDIDATE_NAME, PROJECT_ROOT
+from careerbot.user_profile import prompt as profile_prompt
+from careerbot.user_profile.loader import load_profile
+from careerbot.user_profile.prompt import ProfileChunk, build_profile_chunks, render_profile_context
+from careerbot.tools.definitions import tools_for
+import argparse
+import hashlib
+import json
+import logging
+import os
+
+# Prebuilt startup artifact - the rendered profile context, profile chunks and tool schemas, serialised ahead of time
+#
+#   python -m careerbot.artifact
+#
+# At boot the app loads this instead of parsing and rendering the profile store. The artifact is only used
+# when its source hash matches the current profile store, profile renderer and tool definitions
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_VERSION = 1
+
+@dataclass(frozen=True)
+class StartupArtifact:
+    source_hash: str
+    profile_context: str | None
+    chunks: tuple[ProfileChunk, ...]
+    tools: list[dict]
+
+# Anything that changes the rendered output changes this hash: the profile data, the candidate's name,
+# the profile encoding, the renderer's code and the tool schemas
+def source_hash(profile_store_path: Path, candidate_name: str = DEFAULT_CANDIDATE_NAME, *, compact: bool = False) -> str:
+    digest = hashlib.sha256()
+    digest.update(str(ARTIFACT_VERSION).encode("utf-8"))
+    digest.update(Path(profile_store_path).read_bytes())
+    digest.update(candidate_name.encode("utf-8"))
+    digest.update(b"compact" if compact else b"markdown")
+    digest.update(Path(profile_prompt.__file__).read_bytes())
+    digest.update(json.dumps(tools_for(candidate_name), sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+def build_artifact(profile_store_path: Path, candidate_name: str = DEFAULT_CANDIDATE_NAME, *, compact: bool = False) -> StartupArtifact:
+    chunks = build_profile_chunks(load_profile(profile_store_path), compact=compact)
+    return StartupArtifact(
+        source_hash=source_hash(profile_store_path, candidate_name, compact=compact),
+        profile_context=render_profile_context(chunks, candidate_name=candidate_name, compact=compact),
+        chunks=tuple(chunks),
+        tools=tools_for(candidate_name)
+    )
+
+# Written to a temporary file and renamed, so a booting replica never reads a half-written artifact
+def write_artifact(artifact: StartupArtifact, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    record = {
+        "version": ARTIFACT_VERSION,
+        "source_hash": artifact.source_hash,
+        "profile_context": artifact.profile_context,
+        "chunks": [{"id": c.id, "section": c.section, "lines": list(c.lines)} for c in artifact.chunks],
+        "tools": artifact.tools,
+    }
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+# Returns None when the artifact is missing, unreadable or stale - callers then build from the profile store
+def load_artifact(
+    path: Path,
+    *,
+    profile_store_path: Path,
+    candidate_name: str = DEFAULT_CANDIDATE_NAME,
+    compact: bool = False
+) -> StartupArtifact | None:
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            record = json.load(f)
+        expected = source_hash(profile_store_path, candidate_name, compact=compact)
+        if record.get("version") != ARTIFACT_VERSION or record.get("source_hash") != expected:
+            logger.info("Startup artifact %s is stale; rebuilding the profile context", path)
+            return None
+
+        chunks = tuple(
+            ProfileChunk(id=c["id"], section=c["section"], lines=tuple(c["lines"]))
+            for c in record["chunks"]
+        )
+        return StartupArtifact(
+            source_hash=record["source_hash"],
+            profile_context=record["profile_context"],
+            chunks=chunks,
+            tools=record["tools"]
+        )
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        logger.warning("Ignoring unreadable startup artifact %s: %s", path, exc)
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the careerbot startup artifact")
+    parser.add_argument("--profile", type=Path, default=PROJECT_ROOT / "data" / "profile_store.json")
+    parser.add_argument("--out", type=Path, default=DEFAULT_ARTIFACT_PATH)
+    parser.add_argument("--candidate", default=os.getenv("CAREERBOT_CANDIDATE_NAME", "").strip() or DEFAULT_CANDIDATE_NAME)
+    parser.add_argument(
+        "--encoding",
+        choices=["markdown", "compact"],
+        default=os.getenv("CAREERBOT_PROFILE_ENCODING", "").strip().lower() or "markdown"
+    )
+    args = parser.parse_args()
+
+    artifact = build_artifact(args.profile, args.candidate, compact=args.encoding == "compact")
+    write_artifact(artifact, args.out)
+    print(f"Wrote {args.out} ({len(artifact.chunks)} chunks, source {artifact.source_hash[:12]})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# Caches answers to first-turn questions so repeated recruiter questions skip the LLM
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+import hashlib
+import math
+import re
+import threading
+import time
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s@.+-]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Lowercase, drop punctuation and collapse whitespace, so "What's Ali's tech stack?" == "whats alis tech stack"
+def normalise_question(text: str) -> str:
+    text = text.lower().replace("’", "'").replace("'", "")
+    text = _PUNCTUATION_RE.sub(" ", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return text.rstrip(".")
+
+# Hash of the given texts and the current state of the given files.
+# Any edit to the prompt or to the files produces a different fingerprint.
+def content_fingerprint(*texts: str, paths: tuple[Path, ...] = ()) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    for path in paths:
+        try:
+            stat = Path(path).stat()
+            digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+        except FileNotFoundError:
+            digest.update(f"{path}:missing".encode("utf-8"))
+    return digest.hexdigest()
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+@dataclass
+class _Entry:
+    answer: str
+    created_at: float
+    embedding: list[float] | None = None
+
+# LRU + TTL answer cache keyed on the normalised question, with optional embedding-similarity matching.
+# The whole cache is dropped whenever the fingerprint (prompt + profile) changes.
+class AnswerCache:
+
+    def __init__(
+        self,
+        *,
+        fingerprint: Callable[[], str],
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        embed: Callable[[str], list[float]] | None = None,
+        similarity_threshold: float = 0.92
+    ):
+        self._fingerprint = fingerprint
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._embed = embed
+        self._similarity_threshold = similarity_threshold
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._current_fingerprint = fingerprint()
+        self.hits = 0
+        self.misses = 0
+
+    # Embedding lookups make a network call, so async callers should run them off the event loop
+    @property
+    def uses_embeddings(self) -> bool:
+        return self._embed is not None
+
+    # Clear everything if the prompt or profile changed since the entries were stored
+    def _check_fingerprint(self) -> None:
+        fingerprint = self._fingerprint()
+        if fingerprint != self._current_fingerprint:
+            self._entries.clear()
+            self._current_fingerprint = fingerprint
+
+    def _is_expired(self, entry: _Entry, now: float) -> bool:
+        return now - entry.created_at > self._ttl_seconds
+
+    # Cached answer for the question, or None
+    def get(self, question: str) -> str | None:
+        key = normalise_question(question)
+        if not key:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            self._check_fingerprint()
+
+            entry = self._entries.get(key)
+            if entry is not None and not self._is_expired(entry, now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.answer
+            if entry is not None:
+                del self._entries[key]
+
+            if self._embed is None:
+                self.misses += 1
+                return None
+
+        # Embedding happens outside the lock - it is a network call
+        answer = self._get_similar(key, now)
+
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return answer
+
+    # Closest cached question by embedding similarity, if it is above the threshold
+    def _get_similar(self, key: str, now: float) -> str | None:
+        try:
+            query = self._embed(key)
+        except Exception:
+            return None
+
+        best_key, best_score = None, self._similarity_threshold
+        with self._lock:
+            for cached_key, entry in self._entries.items():
+                if entry.embedding is None or self._is_expired(entry, now):
+                    continue
+                score = _cosine(query, entry.embedding)
+                if score >= best_score:
+                    best_key, best_score = cached_key, score
+
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key].answer
+
+    # Store an answer, evicting the least recently used entries beyond max_entries
+    def put(self, question: str, answer: str) -> None:
+        key = normalise_question(question)
+        if not key or not answer:
+            return
+
+        embedding = None
+        if self._embed is not None:
+            try:
+                embedding = self._embed(key)
+            except Exception:
+                embedding = None
+
+        with self._lock:
+            self._check_fingerprint()
+            self._entries[key] = _Entry(answer=answer, created_at=time.monotonic(), embedding=embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
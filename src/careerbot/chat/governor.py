@@ -0,0 +1,65 @@
+from __future__ import annotations
+import re
+
+# Enforces the reply word limit that the system prompt asks for. A streamed reply is fed to a WordGovernor
+# delta by delta; once no further sentence can fit, it tells the caller to stop, so the upstream stream can
+# be cancelled rather than read to the end for text that would be cut. A reply that runs past the limit
+# is cut back to its last sentence end within it
+
+_WORD_RE = re.compile(r"\S+")
+
+# Where a reply can be cut - terminal punctuation and any closing quotes, brackets or bold markers
+# followed by whitespace, or a line break ending a paragraph or list item. "e.g." and "i.e." are not ends
+_BOUNDARY_RE = re.compile(r"(?<!e\.g)(?<!i\.e)[.!?…][\"'”’)\]*]*(?=\s)|\n")
+
+# End of the last sentence boundary at or before pos, if any
+def _last_boundary(text: str, pos: int) -> int | None:
+    cut = None
+    for match in _BOUNDARY_RE.finditer(text, 0, pos):
+        if text[:match.end()].strip():
+            cut = match.end()
+    return cut
+
+# The text cut to at most max_words, at the last sentence end that fits - or at the word limit with an
+# ellipsis when even the first sentence is too long
+def limit_words(text: str, max_words: int) -> str:
+    words = list(_WORD_RE.finditer(text))
+    if len(words) <= max_words:
+        return text
+
+    cut = _last_boundary(text, words[max_words].start())
+    if cut is None:
+        return text[:words[max_words - 1].end()].rstrip() + "…"
+    return text[:cut].rstrip()
+
+# Word limit for one streamed reply
+class WordGovernor:
+
+    def __init__(self, max_words: int) -> None:
+        self._max_words = max_words
+        self._text = ""
+        # Set once the reply is as long as the limit allows; later deltas are ignored
+        self.stopped = False
+
+    # The reply so far, cut to the limit once stopped
+    @property
+    def text(self) -> str:
+        return self._text
+
+    # Adds a streamed delta. True once the reply is complete as far as the limit allows - a word past
+    # the limit has started, or the last word that fits has ended a sentence
+    def feed(self, delta: str) -> bool:
+        if self.stopped:
+            return True
+
+        self._text += delta
+        words = list(_WORD_RE.finditer(self._text))
+        if len(words) > self._max_words:
+            self.stopped = True
+        elif len(words) == self._max_words:
+            # The boundary needs the whitespace after the last word, so "3." mid-number is not an end
+            self.stopped = any(m.end() >= words[-1].end() for m in _BOUNDARY_RE.finditer(self._text, words[-1].start()))
+
+        if self.stopped:
+            self._text = limit_words(self._text, self._max_words).rstrip()
+        return self.stopped
@@ -0,0 +1,129 @@
+# Keeps conversation history within a token budget - recent turns verbatim, older turns folded into a summary
+
+from collections import OrderedDict
+import hashlib
+import json
+import re
+import threading
+
+from careerbot.tokens import estimate_item_tokens, estimate_tokens
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+# First sentence of the text, cut to max_words
+def _first_sentence(text: str, max_words: int) -> str:
+    text = " ".join(text.split())
+    sentence = _SENTENCE_END_RE.split(text, maxsplit=1)[0]
+    words = sentence.split()
+    if len(words) > max_words:
+        return " ".join(words[:max_words]) + "…"
+    return sentence
+
+def _item_text(item: dict) -> str:
+    content = item.get("content", "")
+    if isinstance(content, str):
+        return content
+    return "\n".join(
+        block.get("text") or "" for block in content if isinstance(block, dict)
+    )
+
+# Group formatted history items into turns - a user message and the replies that follow it
+def _split_turns(items: list[dict]) -> list[list[dict]]:
+    turns: list[list[dict]] = []
+    for item in items:
+        if item.get("role") == "user" or not turns:
+            turns.append([item])
+        else:
+            turns[-1].append(item)
+    return turns
+
+class HistoryWindow:
+
+    def __init__(self, *, token_budget: int = 2000, keep_turns: int = 6, summary_tokens: int = 300, cache_size: int = 4096):
+        self._token_budget = token_budget
+        self._keep_turns = keep_turns
+        self._summary_tokens = summary_tokens
+        self._cache_size = cache_size
+
+        # Summary line per folded turn, keyed by the turn's content hash.
+        # Folding one more turn only summarises that turn; the rest come from here.
+        self._lock = threading.Lock()
+        self._line_cache: OrderedDict[str, str] = OrderedDict()
+
+    # Summary line for one turn, computed once per distinct turn
+    def _summarise_turn(self, turn: list[dict]) -> str:
+        key = hashlib.sha1(json.dumps(turn, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+        with self._lock:
+            line = self._line_cache.get(key)
+            if line is not None:
+                self._line_cache.move_to_end(key)
+                return line
+
+        parts = []
+        for item in turn:
+            speaker = "CareerBot" if item.get("role") == "assistant" else "User"
+            text = _first_sentence(_item_text(item), 30)
+            if text:
+                parts.append(f"{speaker}: {text}")
+        line = "- " + " / ".join(parts)
+
+        with self._lock:
+            self._line_cache[key] = line
+            while len(self._line_cache) > self._cache_size:
+                self._line_cache.popitem(last=False)
+        return line
+
+    # Rolling summary of the folded turns, keeping the newest lines that fit the summary budget
+    def _summary_item(self, folded: list[list[dict]]) -> dict:
+        lines = [self._summarise_turn(turn) for turn in folded]
+
+        kept: list[str] = []
+        used = 0
+        for line in reversed(lines):
+            cost = estimate_tokens(line)
+            if kept and used + cost > self._summary_tokens:
+                break
+            kept.append(line)
+            used += cost
+        kept.reverse()
+
+        header = f"Summary of the earlier conversation ({len(folded)} turns):"
+        if len(kept) < len(lines):
+            header += f" the oldest {len(lines) - len(kept)} are omitted."
+
+        return {
+            "role": "user",
+            "content": [
+                {
+                    "type": "input_text",
+                    "text": "\n".join([header] + kept)
+                }
+            ]
+        }
+
+    # Apply the window to formatted history items
+    def apply(self, items: list[dict]) -> list[dict]:
+        turns = _split_turns(items)
+        if not turns:
+            return items
+
+        # Newest turns first, within keep_turns and the token budget; the last turn is always kept
+        kept: list[list[dict]] = []
+        used = 0
+        for turn in reversed(turns[-self._keep_turns:] if self._keep_turns > 0 else turns[-1:]):
+            cost = sum(estimate_item_tokens(item) for item in turn)
+            if kept and used + cost > self._token_budget:
+                break
+            kept.append(turn)
+            used += cost
+        kept.reverse()
+
+        folded = turns[:len(turns) - len(kept)]
+        if not folded:
+            return items
+
+        windowed = [self._summary_item(folded)]
+        for turn in kept:
+            windowed.extend(turn)
+        return windowed
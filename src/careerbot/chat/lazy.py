@@ -0,0 +1,65 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterator
+import asyncio
+import logging
+import threading
+import time
+
+if TYPE_CHECKING:
+    from careerbot.chat.orchestrator import ChatOrchestrator
+
+# Stands in for a ChatOrchestrator while it is still being built, so the UI can come up first.
+# start() builds the real orchestrator on a background thread; chats that arrive before it is
+# ready wait for it, and a build failure is re-raised to every caller
+
+logger = logging.getLogger(__name__)
+
+class LazyOrchestrator:
+    def __init__(self, factory: Callable[[], ChatOrchestrator]) -> None:
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._orchestrator: ChatOrchestrator | None = None
+        self._error: BaseException | None = None
+        self.build_seconds: float | None = None
+
+    # Begin building in the background; safe to call more than once
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._build, name="careerbot-warmup", daemon=True)
+            self._thread.start()
+
+    def _build(self) -> None:
+        start = time.perf_counter()
+        try:
+            self._orchestrator = self._factory()
+        except BaseException as exc:
+            logger.exception("Building the chat orchestrator failed")
+            self._error = exc
+        finally:
+            self.build_seconds = time.perf_counter() - start
+            self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    # Blocks until the orchestrator is built, starting the build if nothing has yet
+    def get(self) -> ChatOrchestrator:
+        self.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise RuntimeError("Chat orchestrator failed to start") from self._error
+        return self._orchestrator
+
+    def __call__(self, message: str, history: list[dict], session_id: str | None = None) -> Iterator[str]:
+        yield from self.get()(message, history, session_id)
+
+    async def astream_chat(self, *, message: str, history: list[dict], session_id: str | None = None) -> AsyncIterator[str]:
+        # Waiting happens off the event loop so other sessions keep being served
+        orchestrator = self.get() if self.ready else await asyncio.to_thread(self.get)
+        async for text in orchestrator.astream_chat(message=message, history=history, session_id=session_id):
+            yield text
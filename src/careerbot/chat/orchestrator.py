@@ -1,52 +1,572 @@
-from careerbot.llm.openai_client import request_response
+from __future__ import annotations
+
+from careerbot.llm.providers import ProviderChain, openai_provider
+from careerbot.llm.router import DEFAULT as DEFAULT_TIER, ModelRouter, RouteDecision
+from careerbot.llm.types import NormalizedResponse, message_item
+from careerbot.chat.answer_cache import AnswerCache
+from careerbot.chat.governor import WordGovernor, limit_words
+from careerbot.chat.history import HistoryWindow
+from careerbot.chat.prefilter import ScopePrefilter
+from careerbot.chat.sessions import SessionState, SessionStore
+from careerbot.observability.metrics import (
+    PROMPT_BUILD_DURATION, REPLY_WORD_LIMIT, ROUTED_TURN_DURATION, TIME_TO_FIRST_TOKEN, TOOL_CALLS, TURN_DURATION, TURN_ITERATIONS, TURNS,
+    usage_tokens
+)
+from careerbot.observability.tracing import Trace, emit_trace
+from careerbot.chat.prompt_cache import PromptCacheStats, PromptPrefix, build_prompt_prefix
+from careerbot.tools.capture import LocalCapture
 from careerbot.tools.handlers import execute_tool
-from openai import OpenAI
+from careerbot.tools.selector import ToolSelector
+from careerbot.user_profile.retrieval import ProfileRetriever
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import aclosing, closing, contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Generator, Iterator
+import asyncio
 import json
+import time
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+# Outcome of one user turn
+@dataclass
+class TurnResult:
+    text: str
+    tool_calls: int = 0
+    # False when text is the canned fallback rather than a model answer
+    answered: bool = True
+    # Last response of the turn, when a later turn could chain on it
+    response_id: str | None = None
+
+# The model input for one turn. history is the formatted history before windowing, kept for the session
+# store; previous_response_id and new_items are set when the turn chains on the session's last response
+@dataclass
+class _TurnInput:
+    items: list
+    history: list[dict]
+    previous_response_id: str | None = None
+    new_items: list | None = None
+    session_hit: bool = False
+    # Tools already run by the local capture stage, not offered to the model again this turn
+    captured: tuple[str, ...] = ()
+
+# The profile-dependent part of a request, replaced as a whole when the profile reloads
+@dataclass(frozen=True)
+class _ProfileView:
+    prefix: PromptPrefix
+    retriever: ProfileRetriever | None
 
 # Chat loop - build messages, calls LLM, handles tool calls, and returns output
 class ChatOrchestrator:
 
     # Build the ChatOrchestrator object
-    def __init__(self, *, client: OpenAI, model: str, system_message: dict, profile_context: str, tools: list, tool_results_dir: Path):
+    def __init__(
+        self,
+        *,
+        client: OpenAI,
+        model: str,
+        system_message: dict,
+        profile_context: str,
+        tools: list,
+        tool_results_dir: Path,
+        async_client: AsyncOpenAI | None = None,
+        prompt_cache_stats: PromptCacheStats | None = None,
+        profile_retriever: ProfileRetriever | None = None,
+        retrieval_top_k: int = 5,
+        answer_cache: AnswerCache | None = None,
+        history_window: HistoryWindow | None = None,
+        tool_timeout: float = 10.0,
+        tool_max_workers: int = 8,
+        tool_executor: ThreadPoolExecutor | None = None,
+        router: ModelRouter | None = None,
+        reasoning_effort: str = "low",
+        max_output_tokens: int = 300,
+        llm: ProviderChain | None = None,
+        max_tool_rounds: int = 1,
+        chain_responses: bool = True,
+        session_store: SessionStore | None = None,
+        tool_selector: ToolSelector | None = None,
+        local_capture: LocalCapture | None = None,
+        max_reply_words: int | None = None,
+        prefilter: ScopePrefilter | None = None
+    ):
         if not model or not model.strip():
             raise ValueError("Missing OpenAI model")
         
         self._client = client
+        self._async_client = async_client
+        # Backends in failover order; by default just OpenAI on the given clients
+        self._llm = llm or ProviderChain([openai_provider(client, async_client)])
         self._model = model
+        # Picks the model, reasoning effort and output cap per turn; without one every turn uses the defaults
+        self._router = router
+        self._default_route = RouteDecision(
+            tier=DEFAULT_TIER, model=model, reasoning_effort=reasoning_effort, max_output_tokens=max_output_tokens, reason="unrouted"
+        )
         self._system_message = system_message
-        self._profile_context = profile_context
         self._tools = tools
         self._tool_results_dir = tool_results_dir
-
-    # Call the chat function
-    def __call__(self, message: str, history: list[dict]) -> str:
-        return self.chat(message=message, history=history)
+        self._retrieval_top_k = retrieval_top_k
+        # Answers to first-turn questions that needed no tools
+        self._answer_cache = answer_cache
+        # Token budget for history; None sends the full history
+        self._history_window = history_window
+        # Tool calls from one model turn run concurrently, each with its own timeout
+        self._tool_timeout = tool_timeout
+        # A shared executor (multi-profile mode) belongs to the caller; otherwise this orchestrator owns one
+        self._owns_tool_executor = tool_executor is None
+        self._tool_executor = tool_executor or ThreadPoolExecutor(max_workers=tool_max_workers, thread_name_prefix="careerbot-tool")
+        # Rounds of tool calls before the model must answer in text
+        self._max_tool_rounds = max(0, max_tool_rounds)
+        # Follow-ups send previous_response_id and the tool outputs instead of the whole transcript
+        self._chain_responses = chain_responses
+        # Formatted history and last response id per Gradio session; None formats the history every turn
+        self._session_store = session_store
+        # Narrows the tools offered per turn; None offers every tool on every turn
+        self._tool_selector = tool_selector
+        # Records unambiguous contact and role details before the model is called
+        self._local_capture = local_capture
+        # Words a reply may run to; streams stop at the last sentence that fits. None leaves replies uncut
+        self._max_reply_words = max_reply_words or None
+        # Answers out-of-scope, injection and abusive messages without the model
+        self._prefilter = prefilter
+
+        self._profile = self._build_profile_view(profile_context, profile_retriever)
+        self._prompt_cache_stats = prompt_cache_stats or PromptCacheStats()
+
+    # Call the chat function - yields the partial reply as it streams in
+    def __call__(self, message: str, history: list[dict], session_id: str | None = None) -> Iterator[str]:
+        yield from self.stream_chat(message=message, history=history, session_id=session_id)
     
     # Build the message, call the LLM & any tools, and return the response
-    def chat(self, *, message: str, history: list[dict]) -> str:
+    def chat(self, *, message: str, history: list[dict], session_id: str | None = None) -> str:
+
+        with self._traced_turn("chat") as trace:
+            screened = self._screen(message=message, history=history, session_id=session_id, trace=trace)
+            if screened is not None:
+                return screened
+
+            cached = self._cached_answer(message=message, history=history, trace=trace)
+            if cached is not None:
+                return cached
+
+            # New message + history
+            turn_input = self._build_traced_request(history=history, message=message, session_id=session_id, trace=trace)
+            local = self._run_local_capture(message=message, turn_input=turn_input, trace=trace)
+            if local is not None:
+                self._save_session(session_id, turn_input, message, local)
+                return local.text
+            route = self._route_turn(history=history, message=message, trace=trace)
+            tools = self._turn_tools(history=history, message=message, trace=trace, captured=turn_input.captured)
+            turn = self._tool_loop(
+                turn_input.items, trace, route,
+                tools=tools, previous_response_id=turn_input.previous_response_id, new_items=turn_input.new_items
+            )
+
+            try:
+                request = next(turn)
+                while True:
+                    # The response from the first healthy provider
+                    response = self._llm.request(request)
+                    request = turn.send(response)
+            except StopIteration as done:
+                result = done.value
+
+            self._remember_answer(message=message, history=history, result=result)
+            self._save_session(session_id, turn_input, message, result)
+            return result.text
+
+    # Same as chat, but yields the reply text so far each time a delta arrives
+    def stream_chat(self, *, message: str, history: list[dict], session_id: str | None = None) -> Iterator[str]:
+
+        with self._traced_turn("stream") as trace:
+            screened = self._screen(message=message, history=history, session_id=session_id, trace=trace)
+            if screened is not None:
+                yield screened
+                return
+
+            cached = self._cached_answer(message=message, history=history, trace=trace)
+            if cached is not None:
+                yield cached
+                return
+
+            turn_input = self._build_traced_request(history=history, message=message, session_id=session_id, trace=trace)
+            local = self._run_local_capture(message=message, turn_input=turn_input, trace=trace)
+            if local is not None:
+                self._save_session(session_id, turn_input, message, local)
+                yield local.text
+                return
+            route = self._route_turn(history=history, message=message, trace=trace)
+            tools = self._turn_tools(history=history, message=message, trace=trace, captured=turn_input.captured)
+            turn = self._tool_loop(
+                turn_input.items, trace, route,
+                tools=tools, previous_response_id=turn_input.previous_response_id, new_items=turn_input.new_items
+            )
+            # Last text shown to the user
+            shown = ""
+
+            try:
+                request = next(turn)
+                while True:
+                    partial = ""
+                    response = None
+                    governor = self._reply_governor()
+
+                    with closing(self._llm.stream(request)) as stream:
+                        for chunk in stream:
+                            if chunk.response is not None:
+                                response = chunk.response
+                                continue
+                            if not shown:
+                                self._record_first_token(trace)
+                            partial += chunk.delta
+                            if governor is not None:
+                                stop = governor.feed(chunk.delta)
+                                partial = governor.text
+                                if stop and self._can_cancel(request):
+                                    break
+                            if partial != shown:
+                                shown = partial
+                                yield shown
+
+                    if response is None and governor is not None and governor.stopped:
+                        response = self._cut_response(request, governor.text, trace)
+                    request = turn.send(response)
+            except StopIteration as done:
+                result = done.value
+
+            self._remember_answer(message=message, history=history, result=result)
+            self._save_session(session_id, turn_input, message, result)
+            if result.text != shown:
+                yield result.text
+
+    # Async version of chat - runs on the event loop instead of a worker thread
+    async def achat(self, *, message: str, history: list[dict], session_id: str | None = None) -> str:
+
+        with self._traced_turn("achat") as trace:
+            screened = await asyncio.to_thread(self._screen, message=message, history=history, session_id=session_id, trace=trace)
+            if screened is not None:
+                return screened
+
+            cached = await self._acached_answer(message=message, history=history, trace=trace)
+            if cached is not None:
+                return cached
+
+            turn_input = await asyncio.to_thread(
+                self._build_traced_request, history=history, message=message, session_id=session_id, trace=trace
+            )
+            local = await asyncio.to_thread(self._run_local_capture, message=message, turn_input=turn_input, trace=trace)
+            if local is not None:
+                await asyncio.to_thread(self._save_session, session_id, turn_input, message, local)
+                return local.text
+            route = self._route_turn(history=history, message=message, trace=trace)
+            tools = self._turn_tools(history=history, message=message, trace=trace, captured=turn_input.captured)
+            turn = self._tool_loop(
+                turn_input.items, trace, route,
+                tools=tools, previous_response_id=turn_input.previous_response_id, new_items=turn_input.new_items
+            )
+
+            step = await self._astep(turn)
+            while not isinstance(step, TurnResult):
+                step = await self._astep(turn, await self._llm.arequest(step))
+            result = step
+
+            await self._aremember_answer(message=message, history=history, result=result)
+            await asyncio.to_thread(self._save_session, session_id, turn_input, message, result)
+            return result.text
+
+    # Async version of stream_chat
+    async def astream_chat(self, *, message: str, history: list[dict], session_id: str | None = None) -> AsyncIterator[str]:
+
+        with self._traced_turn("astream") as trace:
+            screened = await asyncio.to_thread(self._screen, message=message, history=history, session_id=session_id, trace=trace)
+            if screened is not None:
+                yield screened
+                return
+
+            cached = await self._acached_answer(message=message, history=history, trace=trace)
+            if cached is not None:
+                yield cached
+                return
+
+            turn_input = await asyncio.to_thread(
+                self._build_traced_request, history=history, message=message, session_id=session_id, trace=trace
+            )
+            local = await asyncio.to_thread(self._run_local_capture, message=message, turn_input=turn_input, trace=trace)
+            if local is not None:
+                await asyncio.to_thread(self._save_session, session_id, turn_input, message, local)
+                yield local.text
+                return
+            route = self._route_turn(history=history, message=message, trace=trace)
+            tools = self._turn_tools(history=history, message=message, trace=trace, captured=turn_input.captured)
+            turn = self._tool_loop(
+                turn_input.items, trace, route,
+                tools=tools, previous_response_id=turn_input.previous_response_id, new_items=turn_input.new_items
+            )
+            shown = ""
+
+            step = await self._astep(turn)
+            while not isinstance(step, TurnResult):
+                partial = ""
+                response = None
+                governor = self._reply_governor()
+
+                async with aclosing(self._llm.astream(step)) as stream:
+                    async for chunk in stream:
+                        if chunk.response is not None:
+                            response = chunk.response
+                            continue
+                        if not shown:
+                            self._record_first_token(trace)
+                        partial += chunk.delta
+                        if governor is not None:
+                            stop = governor.feed(chunk.delta)
+                            partial = governor.text
+                            if stop and self._can_cancel(step):
+                                break
+                        if partial != shown:
+                            shown = partial
+                            yield shown
+
+                if response is None and governor is not None and governor.stopped:
+                    response = self._cut_response(step, governor.text, trace)
+                step = await self._astep(turn, response)
+            result = step
+
+            await self._aremember_answer(message=message, history=history, result=result)
+            await asyncio.to_thread(self._save_session, session_id, turn_input, message, result)
+            if result.text != shown:
+                yield result.text
+
+    # Advance the tool loop on a worker thread - a step runs the tools, which block on the lead store,
+    # JSONL files and the dedupe index. Returns the next request, or the turn result once the loop is done
+    async def _astep(self, turn: Generator[dict, Any, TurnResult], response=None) -> dict | TurnResult:
+        def step() -> dict | TurnResult:
+            try:
+                return turn.send(response)
+            except StopIteration as done:
+                return done.value
+        return await asyncio.to_thread(step)
+
+    # Trace one turn and record its metrics, whether it answers, errors or is abandoned mid-stream
+    @contextmanager
+    def _traced_turn(self, path: str) -> Iterator[Trace]:
+        trace = Trace(path=path)
+        outcome = "ok"
+        try:
+            yield trace
+        except GeneratorExit:
+            outcome = "cancelled"
+            raise
+        except BaseException as e:
+            outcome = "error"
+            trace.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            if trace.attributes.get("answer_cache") == "hit":
+                outcome = "cached"
+            elif trace.attributes.get("local_capture") == "answered" and outcome == "ok":
+                outcome = "local"
+            elif "prefilter" in trace.attributes and outcome == "ok":
+                outcome = "prefiltered"
+            trace.set(outcome=outcome)
+            TURNS.inc(path=path, outcome=outcome)
+            duration = trace.finish()
+            TURN_DURATION.observe(duration, path=path)
+            tier = trace.attributes.get("route_tier")
+            if tier is not None:
+                ROUTED_TURN_DURATION.observe(duration, tier=tier)
+            emit_trace(trace)
+
+    def _build_traced_request(self, *, history: list[dict], message: str, session_id: str | None, trace: Trace) -> _TurnInput:
+        start = time.perf_counter()
+        with trace.span("prompt_build") as span:
+            turn_input = self._build_turn_input(history=history, message=message, session_id=session_id)
+            if session_id is not None and self._session_store is not None:
+                span.update(session="chained" if turn_input.previous_response_id else "hit" if turn_input.session_hit else "miss")
+        PROMPT_BUILD_DURATION.observe(time.perf_counter() - start)
+        return turn_input
+
+    # Model tier for this turn - the router's pick, or the configured model when routing is off
+    def _route_turn(self, *, history: list[dict], message: str, trace: Trace) -> RouteDecision:
+        route = self._default_route if self._router is None else self._router.route(message, history)
+        trace.set(route_tier=route.tier, route_reason=route.reason, model=route.model)
+        return route
+
+    # Tools offered this turn - the selector's pick, or all of them - minus any the local capture ran
+    def _turn_tools(self, *, history: list[dict], message: str, trace: Trace, captured: tuple[str, ...] = ()) -> list:
+        tools = self._tools
+        if self._tool_selector is not None:
+            selection = self._tool_selector.select(message, history)
+            trace.set(tool_selection=selection.reason, tools_offered=len(selection.tools))
+            tools = selection.tools
+        if captured:
+            tools = [tool for tool in tools if tool.get("name") not in captured]
+        return tools
+
+    # Record what the local parsers can take from the message. Returns the turn's result when a template
+    # answers it outright; otherwise a note that the details are recorded is added to the user message
+    def _run_local_capture(self, *, message: str, turn_input: _TurnInput, trace: Trace) -> TurnResult | None:
+        if self._local_capture is None:
+            return None
+        plan = self._local_capture.plan(message)
+        if plan is None:
+            return None
+
+        with trace.span("local_capture", tools=",".join(plan.tool_names)) as span:
+            results = [execute_tool(name, args, out_dir=self._tool_results_dir) for name, args in plan.calls]
+            span["ok"] = all(result.ok for result in results)
+        # A failed write is left to the model and the normal tool path
+        if not all(result.ok for result in results):
+            trace.set(local_capture="failed")
+            return None
+
+        if plan.capture_only:
+            trace.set(local_capture="answered", llm_calls=0, tool_calls=len(results))
+            return TurnResult(text=self._local_capture.acknowledge(plan, results), tool_calls=len(results))
+
+        trace.set(local_capture="assisted")
+        turn_input.items[-1]["content"].append({"type": "input_text", "text": self._local_capture.note(plan)})
+        turn_input.captured = plan.tool_names
+        return None
+
+    # The canned reply when the prefilter screens the message out, else None. The exchange is saved to the
+    # session like any turn, keeping the session's last response id so the next turn still chains and the
+    # model never sees the screened message
+    def _screen(self, *, message: str, history: list[dict], session_id: str | None, trace: Trace) -> str | None:
+        if self._prefilter is None:
+            return None
+
+        with trace.span("prefilter") as span:
+            screening = self._prefilter.screen(message, session_id=session_id)
+            span["label"] = screening.label if screening is not None else "pass"
+        if screening is None:
+            return None
+
+        trace.set(prefilter=screening.label, prefilter_source=screening.source, llm_calls=0, tool_calls=0)
+        state = self._session_history(session_id, history)
+        formatted_history = list(state.items) if state is not None else self._format_gradio_history(history)
+        chained = state is not None and state.prefix_key == self._profile.prefix.cache_key
+        self._save_session(
+            session_id,
+            _TurnInput(items=[], history=formatted_history),
+            message,
+            TurnResult(text=screening.reply, response_id=state.last_response_id if chained else None)
+        )
+        return screening.reply
+
+    # Word limit for one streamed call, or None when replies are not limited
+    def _reply_governor(self) -> WordGovernor | None:
+        if self._max_reply_words is None:
+            return None
+        return WordGovernor(self._max_reply_words)
+
+    # A call that cannot call tools is cancelled once its text is complete. One that can is read to the
+    # end, since a tool call may follow the text - only the text shown stops growing
+    def _can_cancel(self, request: dict) -> bool:
+        return not request.get("tools") or request.get("tool_choice") == "none"
+
+    # Stands in for the response of a stream cancelled at the word limit, holding the text shown. With no
+    # id it is not chained on, so the next turn sends the transcript instead of a response that never finished
+    def _cut_response(self, request: dict, text: str, trace: Trace) -> NormalizedResponse:
+        REPLY_WORD_LIMIT.inc(action="cancelled")
+        trace.set(word_limit="cancelled")
+        return NormalizedResponse(id="", model=request["model"], status="incomplete", output=[message_item(text)])
+
+    def _record_first_token(self, trace: Trace) -> None:
+        elapsed = trace.elapsed()
+        trace.set(ttft_ms=round(elapsed * 1000, 3))
+        TIME_TO_FIRST_TOKEN.observe(elapsed, path=trace.path)
+
+    # Only first-turn, history-free questions are answered from the cache
+    def _cached_answer(self, *, message: str, history: list[dict], trace: Trace | None = None) -> str | None:
+        if self._answer_cache is None or history or self._capturable(message):
+            return None
+        answer = self._answer_cache.get(message)
+        if trace is not None:
+            trace.set(answer_cache="hit" if answer is not None else "miss")
+        return answer
+
+    # Cache the answer if the turn was a first-turn question that made no tool calls
+    def _remember_answer(self, *, message: str, history: list[dict], result: TurnResult) -> None:
+        if self._answer_cache is None or history or result.tool_calls or not result.answered or self._capturable(message):
+            return
+        self._answer_cache.put(message, result.text)
+
+    # Messages whose details the local capture records run tools even when the model makes no tool call, so
+    # they are neither cached nor answered from the cache - a cached reply would skip recording them
+    def _capturable(self, message: str) -> bool:
+        return self._local_capture is not None and self._local_capture.plan(message) is not None
+
+    # Embedding lookups are network calls, so keep them off the event loop
+    async def _acached_answer(self, *, message: str, history: list[dict], trace: Trace | None = None) -> str | None:
+        if self._answer_cache is not None and self._answer_cache.uses_embeddings:
+            return await asyncio.to_thread(self._cached_answer, message=message, history=history, trace=trace)
+        return self._cached_answer(message=message, history=history, trace=trace)
+
+    async def _aremember_answer(self, *, message: str, history: list[dict], result: TurnResult) -> None:
+        if self._answer_cache is not None and self._answer_cache.uses_embeddings:
+            await asyncio.to_thread(self._remember_answer, message=message, history=history, result=result)
+            return
+        self._remember_answer(message=message, history=history, result=result)
+
+    # Tool loop shared by the blocking, streaming and async paths.
+    # Yields the arguments for each LLM call, is sent the response back, and returns the turn result.
+    # Tools are offered for max_tool_rounds rounds; the call after that must answer in text, so a
+    # tool-only turn costs one extra call. Follow-ups chain on the previous response where the backend
+    # stores it, sending only the tool outputs rather than the whole transcript again
+    def _tool_loop(
+        self,
+        input_items: list,
+        trace: Trace,
+        route: RouteDecision,
+        *,
+        tools: list | None = None,
+        previous_response_id: str | None = None,
+        new_items: list | None = None
+    ) -> Generator[dict, Any, TurnResult]:
+
+        tools = self._tools if tools is None else tools
 
-        # Maximum tool calls
-        max_iterations = 10
-        # New message + history
-        input_items = self._build_model_request(history=history, message=message)
         # Fallback in case of no response
         last_text = ""
-        # Track response.output ids that are already appended
-        seen_output_ids = set() 
-
-        # Loop to allow for tool calls until max_iterations
-        for _ in range(max_iterations):
-
-            # The response from the OpenAI client
-            response = request_response(
-                client=self._client,
-                model=self._model,
-                input=input_items,
-                tools=self._tools
-            )
+        # Number of tool calls executed this turn
+        tool_call_count = 0
+        # LLM calls made this turn
+        llm_calls = 0
+        # Rounds whose tool calls have been run
+        tool_rounds = 0
+        # Set when the next call can continue from the last response - from the start when the
+        # session's previous turn can be chained on
+        if previous_response_id is None:
+            new_items = input_items
+        # Set when a call came back empty and the model is asked again without tools
+        force_text = False
+
+        while True:
+            final = force_text or tool_rounds >= self._max_tool_rounds
+            llm_calls += 1
+            with trace.span("llm_request", iteration=llm_calls, tools=0 if final else len(tools), chained=previous_response_id is not None) as span:
+                response = yield self._request_args(
+                    input_items,
+                    tools,
+                    route,
+                    previous_response_id=previous_response_id,
+                    new_items=new_items,
+                    tool_choice="none" if final else None
+                )
+                span.update(usage_tokens(response))
+            self._prompt_cache_stats.record(response)
 
             assistant_text = self._extract_assistant_text(response)
+            if assistant_text and self._max_reply_words is not None:
+                limited = limit_words(assistant_text, self._max_reply_words)
+                if limited != assistant_text:
+                    REPLY_WORD_LIMIT.inc(action="cut")
+                    trace.set(word_limit="cut")
+                    assistant_text = limited
             if assistant_text:
                 last_text = assistant_text
 
@@ -56,72 +576,138 @@ class ChatOrchestrator:
                 if item.type == "function_call"
                 ]
 
-            # If no tools called then return response
-            if not tool_calls:
+            # Done once the model answers without tools - or ignores tool_choice on the final call
+            if final or (not tool_calls and last_text):
                 break
 
-            # Appends the response.output to input_items if we haven't seen the id before
-            for item in response.output:
-                item_id = getattr(item, "id", None)
-                if not item_id:
-                    input_items.append(item)
-                    continue
-                if item_id in seen_output_ids:
-                    continue
-                seen_output_ids.add(item_id)
-                input_items.append(item)
-
-            # Execute each tool call and append tool outputs
-            for call in tool_calls:
-                # Parse tool args
-                try:
-                    args = json.loads(call.arguments) if call.arguments else {}
-                except Exception as e:
-                    # If error, feed this back as tool output
-                    input_items.append(
-                        {
-                            "type": "function_call_output",
-                            "call_id": call.call_id,
-                            "output": json.dumps(
-                                {"ok": False, "error": f"Invalid tool arguments JSON: {e}", "raw": call.arguments},
-                                ensure_ascii=False,
-                            ),
-                        }
-                    )
-                    continue
-
-                result = execute_tool(
-                    call.name,
-                    args,
-                    out_dir=self._tool_results_dir
-                )
-
-                if result.ok:
-                    out_str = result.content if isinstance(result.content, str) else json.dumps(result.content, ensure_ascii=False)
-                else:
-                    out_str = result.error if isinstance(result.error, str) else json.dumps({"error": result.error}, ensure_ascii=False)
+            # Neither text nor tool calls - the same request once more, this time requiring text
+            if not tool_calls:
+                force_text = True
+                continue
 
-                input_items.append(
+            # Execute the tool calls; the transcript keeps the model's output and the tool outputs
+            tool_rounds += 1
+            tool_call_count += len(tool_calls)
+            outputs = self._run_tool_calls(tool_calls, trace)
+            input_items.extend(response.output)
+            input_items.extend(outputs)
+
+            if self._chain_responses and self._is_chainable(response):
+                previous_response_id, new_items = response.id, outputs
+            else:
+                previous_response_id, new_items = None, input_items
+
+        self._finish_turn_trace(trace, llm_calls=llm_calls, tool_calls=tool_call_count)
+
+        response_id = response.id if self._chain_responses and self._is_chainable(response) else None
+        if not last_text:
+            return TurnResult(text="I couldn't complete that action right now.", tool_calls=tool_call_count, answered=False)
+        return TurnResult(text=last_text, tool_calls=tool_call_count, response_id=response_id)
+
+    # Only native Responses objects are stored server-side; a normalised response from another
+    # backend has nothing to chain on
+    def _is_chainable(self, response) -> bool:
+        return bool(getattr(response, "id", None)) and not isinstance(response, NormalizedResponse)
+
+    # Turn-level attributes: LLM calls, tool calls and summed token usage from the spans
+    def _finish_turn_trace(self, trace: Trace, *, llm_calls: int, tool_calls: int) -> None:
+        totals = {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0}
+        for span in trace.spans:
+            if span["name"] == "llm_request":
+                for kind in ("input", "output", "cached"):
+                    totals[f"{kind}_tokens"] += span.get(kind, 0)
+
+        trace.set(llm_calls=llm_calls, tool_calls=tool_calls, **totals)
+        TURN_ITERATIONS.observe(llm_calls)
+
+    # Arguments for one LLM call, minus the client. A chained call sends only new_items, with the
+    # whole transcript alongside for backends that cannot chain
+    def _request_args(
+        self,
+        input_items: list,
+        tools: list,
+        route: RouteDecision,
+        *,
+        previous_response_id: str | None = None,
+        new_items: list | None = None,
+        tool_choice: str | None = None
+    ) -> dict:
+        args = {
+            "model": route.model,
+            "input": input_items,
+            "tools": tools,
+            "prompt_cache_key": self._profile.prefix.cache_key,
+            "reasoning_effort": route.reasoning_effort,
+            "max_output_tokens": route.max_output_tokens
+        }
+        if previous_response_id:
+            args.update(input=list(new_items), previous_response_id=previous_response_id, transcript=list(input_items))
+        # tool_choice means nothing without tools
+        if tool_choice and tools:
+            args["tool_choice"] = tool_choice
+        return args
+
+    # Run the turn's tool calls concurrently. Outputs come back in the order the model issued
+    # the calls, so the next request is the same whichever handler finishes first.
+    def _run_tool_calls(self, tool_calls: list, trace: Trace) -> list[dict]:
+        futures = [self._tool_executor.submit(self._run_tool_call, call, trace) for call in tool_calls]
+        deadline = time.monotonic() + self._tool_timeout
+
+        outputs = []
+        for call, future in zip(tool_calls, futures):
+            try:
+                outputs.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                # The handler keeps running in its thread, but the reply no longer waits for it
+                TOOL_CALLS.inc(tool=call.name, outcome="timeout")
+                trace.set(tool_timeouts=trace.attributes.get("tool_timeouts", 0) + 1)
+                outputs.append(
                     {
                         "type": "function_call_output",
                         "call_id": call.call_id,
-                        "output": out_str
+                        "output": json.dumps(
+                            {"ok": False, "error": f"Tool timed out after {self._tool_timeout:g}s"},
+                            ensure_ascii=False,
+                        ),
                     }
                 )
-                
-        if last_text:
-            return last_text
-
-        final_response = request_response(
-            client=self._client,
-            model=self._model,
-            input=input_items,
-            tools=[]
+        return outputs
+
+    # Execute a single tool call and return its function_call_output item
+    def _run_tool_call(self, call, trace: Trace) -> dict:
+        with trace.span("tool", tool=call.name, call_id=call.call_id) as span:
+            # Parse tool args
+            try:
+                args = json.loads(call.arguments) if call.arguments else {}
+            except Exception as e:
+                # If error, feed this back as tool output
+                span["ok"] = False
+                return {
+                    "type": "function_call_output",
+                    "call_id": call.call_id,
+                    "output": json.dumps(
+                        {"ok": False, "error": f"Invalid tool arguments JSON: {e}", "raw": call.arguments},
+                        ensure_ascii=False,
+                    ),
+                }
+
+            result = execute_tool(
+                call.name,
+                args,
+                out_dir=self._tool_results_dir
             )
+            span["ok"] = result.ok
 
-        final_text = self._extract_assistant_text(final_response)
+        if result.ok:
+            out_str = result.content if isinstance(result.content, str) else json.dumps(result.content, ensure_ascii=False)
+        else:
+            out_str = result.error if isinstance(result.error, str) else json.dumps({"error": result.error}, ensure_ascii=False)
 
-        return final_text or "I couldn't complete that action right now."
+        return {
+            "type": "function_call_output",
+            "call_id": call.call_id,
+            "output": out_str
+        }
 
     # Format the user's input
     def _wrap_text(self, message: str) -> dict:
@@ -192,25 +778,131 @@ class ChatOrchestrator:
             ]
         }
 
-    # Build the overall input for the LLM
-    def _build_model_request(self, *, history: list[dict], message: str) -> list[dict]:
-
-        model_request = []
-
-        model_request.append(self._system_message)
-
-        if self._profile_context:
-            formatted_profile_context = self._format_profile_context(self._profile_context)
-            model_request.append(formatted_profile_context)
-        
-        formatted_history = self._format_gradio_history(history)
-        model_request += formatted_history
+    # The stable start of every request - system message then profile context
+    def _build_prefix_items(self, profile_context: str | None) -> list[dict]:
+        items = [self._system_message]
+
+        if profile_context:
+            items.append(self._format_profile_context(profile_context))
+
+        return items
+
+    # System message + profile context only change on a profile reload, so build them once as a
+    # byte-identical prefix that the API can serve from its prompt cache.
+    # With a retriever, profile_context is only the core and the rest is retrieved per turn
+    def _build_profile_view(self, profile_context: str | None, profile_retriever: ProfileRetriever | None) -> _ProfileView:
+        return _ProfileView(
+            prefix=build_prompt_prefix(self._build_prefix_items(profile_context)),
+            retriever=profile_retriever
+        )
+
+    # Swap in a reloaded profile. New turns see the new context; turns already in flight keep the
+    # view they started with, because the swap is a single attribute assignment
+    def update_profile(self, *, profile_context: str | None, profile_retriever: ProfileRetriever | None = None) -> None:
+        self._profile = self._build_profile_view(profile_context, profile_retriever)
+
+    # Release this orchestrator's own threads; shared clients and executors are left to their owner
+    def close(self) -> None:
+        if self._owns_tool_executor:
+            self._tool_executor.shutdown(wait=False)
+
+    # Prompt-cache counters for this orchestrator
+    @property
+    def prompt_cache_stats(self) -> PromptCacheStats:
+        return self._prompt_cache_stats
+
+    # Retrieval query - the new message plus the previous user message, so follow-ups keep their topic
+    def _retrieval_query(self, *, history: list[dict], message: str) -> str:
+        for item in reversed(history):
+            if item.get("role", "user") == "user":
+                previous = self._normalise_history_content_to_text(item.get("content", ""))
+                return f"{previous}\n{message}"
+        return message
+
+    # Formatted history within the token budget; the same list when nothing had to be folded
+    def _windowed_history(self, formatted_history: list[dict]) -> list[dict]:
+        if self._history_window is None:
+            return formatted_history
+        return self._history_window.apply(formatted_history)
+
+    # Build the overall input for the LLM. windowed_history skips re-formatting the Gradio history
+    def _build_model_request(self, *, history: list[dict], message: str, windowed_history: list[dict] | None = None) -> list[dict]:
+
+        profile = self._profile
+        model_request = list(profile.prefix.items)
+
+        if windowed_history is None:
+            windowed_history = self._windowed_history(self._format_gradio_history(history))
+        model_request += windowed_history
+
+        # Retrieved excerpts go after the history so the prefix and history stay cacheable
+        if profile.retriever is not None:
+            excerpts = profile.retriever.excerpts_for(
+                self._retrieval_query(history=history, message=message),
+                self._retrieval_top_k
+            )
+            if excerpts:
+                model_request.append(self._format_profile_context(excerpts))
 
         user_message = self._wrap_text(message)
         model_request.append(user_message)
 
         return model_request
 
+    # The session's stored history, if it still matches what Gradio sent. Retry, undo and edit
+    # rewrite the client's history, so the length and the last message are checked before trusting it
+    def _session_history(self, session_id: str | None, history: list[dict]) -> SessionState | None:
+        if session_id is None or self._session_store is None:
+            return None
+
+        state = self._session_store.get(session_id)
+        if state is None or len(state.items) != len(history):
+            return None
+        if history:
+            last, stored = history[-1], state.items[-1]
+            if last.get("role", "user") != stored.get("role") or \
+                    self._normalise_history_content_to_text(last.get("content", "")) != stored["content"][0]["text"]:
+                return None
+        return state
+
+    # Model input for a turn, reusing the session's formatted history when it has one. The turn chains
+    # on the session's last response when nothing sent with it would differ: same profile prefix, no
+    # history folded by the window, and no per-turn retrieved excerpts
+    def _build_turn_input(self, *, history: list[dict], message: str, session_id: str | None) -> _TurnInput:
+        state = self._session_history(session_id, history)
+        formatted_history = list(state.items) if state is not None else self._format_gradio_history(history)
+        windowed_history = self._windowed_history(formatted_history)
+        items = self._build_model_request(history=history, message=message, windowed_history=windowed_history)
+        turn_input = _TurnInput(items=items, history=formatted_history, session_hit=state is not None)
+
+        profile = self._profile
+        if (
+            state is not None
+            and state.last_response_id
+            and self._chain_responses
+            and state.prefix_key == profile.prefix.cache_key
+            and profile.retriever is None
+            and windowed_history is formatted_history
+        ):
+            turn_input.previous_response_id = state.last_response_id
+            turn_input.new_items = items[-1:]
+        return turn_input
+
+    # Append the turn to the session - the new message and the reply, already formatted
+    def _save_session(self, session_id: str | None, turn_input: _TurnInput, message: str, result: TurnResult) -> None:
+        if session_id is None or self._session_store is None:
+            return
+
+        items = turn_input.history + [
+            self._wrap_text(message),
+            {"role": "assistant", "content": [{"type": "output_text", "text": result.text}]}
+        ]
+        self._session_store.put(session_id, SessionState(
+            items=items,
+            last_response_id=result.response_id,
+            prefix_key=self._profile.prefix.cache_key
+        ))
+
     # Get text from responses.output
     def _extract_assistant_text(self, response) -> str:
         texts: list[str] = []
@@ -0,0 +1,316 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from careerbot.config import DEFAULT_CANDIDATE_NAME
+from careerbot.observability.metrics import PREFILTER_DECISIONS
+import argparse
+import math
+import re
+import sys
+import threading
+import time
+
+# Local screening in front of the model. Messages that are plainly out of scope - prompt injection, abuse,
+# political opinion, the candidate's pay, or requests with nothing to do with a career - get a canned reply
+# without an LLM call, and a session that keeps sending injection or abuse is throttled for a while.
+# Rules catch the clear cases; a small nearest-neighbour model over word and character n-grams catches general
+# off-topic requests the rules do not name. Anything that mentions careers, hiring or contact details is
+# left to the model, so a recruiter is never turned away by a guess
+#
+#   python -m careerbot.chat.prefilter < messages.txt
+
+INJECTION = "injection"
+ABUSE = "abuse"
+POLITICS = "politics"
+SALARY = "salary"
+OFF_TOPIC = "off_topic"
+THROTTLED = "throttled"
+
+_REPLIES = {
+    INJECTION: "CareerBot can only help with questions about {candidate}'s career, skills and experience.",
+    ABUSE: "CareerBot is here to answer professional questions about {candidate}. Please keep the conversation respectful.",
+    POLITICS: "CareerBot doesn't discuss political views or opinions, but can tell you about {candidate}'s professional experience and skills.",
+    SALARY: "CareerBot doesn't discuss {candidate}'s salary history or compensation expectations, but can cover "
+            "{candidate}'s experience, skills and the kinds of roles of interest.",
+    OFF_TOPIC: "CareerBot only answers questions about {candidate}'s career, skills, experience and projects. "
+               "Is there anything about {candidate}'s background you'd like to know?",
+    THROTTLED: "This chat has been paused for a while. Please try again later.",
+}
+
+# Instructions to the bot to drop its instructions, read them back or take on another persona - phrased as
+# commands, so a question that merely mentions prompts, tools or modes is left to the model. Each match counts
+# as a strike towards pausing the session
+_INJECTION_RE = re.compile(
+    r"\b(?:ignore|disregard|forget|override|bypass) (?:all |any )?(?:of )?"
+    r"(?:your|the|these|those|previous|prior|above|earlier|preceding|all)\b(?: \w+){0,3} (?:instructions|prompts?|rules|guidelines)\b"
+    r"|\b(?:reveal|show|print|repeat|output|dump|tell) (?:me )?"
+    r"(?:your (?:\w+ )?(?:prompt|instructions|rules|configuration)|the (?:system|initial|hidden) (?:prompt|message|instructions))\b"
+    r"|(?:^|[.!?]\s+)you (?:are|will) now\b|\bfrom now on,? you (?:are|will|must)\b|(?:^|[.!?]\s+)(?:now |please )?pretend (?:to be|you are|you're)\b"
+    r"|\b(?:enable|enter|activate|switch (?:on|to)) (?:DAN|developer|god|jailbreak) mode\b"
+    r"|<\|?im_start\|?>|\[/?INST\]|^\s*#{2,}\s*(?:system|instruction)",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Whole words only, so "fire retardant" or "Scunthorpe" is not abuse
+_ABUSE_RE = re.compile(
+    r"\b(?:(?:mother)?fuck(?:s|ed|er|ers|ing|in|off)?|cunts?|bitch(?:es)?|assholes?|arseholes?|bastards?|dickheads?|"
+    r"wankers?|twats?|retard(?:s|ed)?|kill yourself|kys|piece of shit)\b",
+    re.IGNORECASE
+)
+
+# Asking for an opinion on politics, not about a political client or project
+_POLITICS_RE = re.compile(
+    r"\b(?:political (?:views?|opinions?|leanings?|party|affiliation|beliefs?|stance)|politics|vot(?:e|es|ed|ing) for"
+    r"|who (?:should|will|would) (?:i |you |\w+ )?vote|(?:think|opinion|feel|views?|stance) (?:of|on|about) "
+    r"(?:trump|biden|brexit|abortion|immigration|the election|the government|the prime minister|the president)"
+    r"|(?:left|right)[- ]wing|democrat|republican|tory|tories)\b",
+    re.IGNORECASE
+)
+
+# Questions about the candidate's own pay - "what does he earn", "salary expectations?" - rather than a
+# recruiter's stated salary for a role, which the hiring tools record. Matched with the name as "candidate".
+# "Make" and "expect" only count next to a pay word, so "what did he make at NatWest" is left to the model
+_PAY = r"(?:salary|pay|paid|compensation|income|wages?|day rate|per (?:year|annum|day|hour)|a year|an hour|[£$€]\s?\d|\d+k)\b"
+_SALARY_RE = re.compile(
+    r"\b(?:how much|what) (?:does|did|do|is|was|would|will) (?:\w+ ){0,3}(?:earn|get paid|charge)"
+    r"|\bhow much (?:does|did|do|would|will) (?:\w+ ){0,3}make\b"
+    r"|\b(?:candidate|he|she|they)(?:'d| would| will| does| did| do)? (?:expect|want|ask|earn|make|charge)\w*\b.{0,40}" + _PAY +
+    r"|\b(?:his|her|their|candidate's|current|previous|last|expected) (?:salary|pay|compensation|income|day rate|wage)"
+    r"|\bwhat (?:salary|pay|compensation|day rate)\b|\bsalary (?:expectations?|history|requirements?)\b",
+    re.IGNORECASE
+)
+_QUESTION_RE = re.compile(r"\?|^\s*(?:what|how|is|are|does|do|did|tell|can|could|would|will)\b", re.IGNORECASE)
+
+_OFF_TOPIC_RE = re.compile(
+    r"^\s*(?:please |can you |could you )?(?:write|compose|generate|make up) (?:me )?(?:a|an|some) "
+    r"(?:poem|story|song|essay|joke|haiku|limerick|lyrics)\b"
+    r"|\btell me a joke\b|\brecipe\b|\bhoroscope\b|\bweather (?:in|today|tomorrow|forecast)\b"
+    r"|\bwhat is the capital of\b|\btranslate\b.{0,60}\binto\b",
+    re.IGNORECASE
+)
+
+# Career, hiring and contact talk - a message with any of these is never screened as off topic
+_CAREER_RE = re.compile(
+    r"@|\b(?:experience\w*|skills?|projects?|roles?|jobs?|work\w*|career|cv|resume|résumé|education|degree|studied|"
+    r"stud(?:y|ies)|universit\w*|certif\w*|employ\w*|hir(?:e|ed|ing)|recruit\w*|interview\w*|vacanc\w*|position|"
+    r"team|company|contact|email|reach|touch|relocat\w*|remote|portfolio|linkedin|background|qualif\w*|"
+    r"engineer\w*|developer|data|technolog\w*|tech|stack|tools?|languages?|profile|availab\w*|notice)\b",
+    re.IGNORECASE
+)
+
+# A person - most likely the candidate, so a question about them is the model's to answer or record
+_PERSON_RE = re.compile(r"\b(?:he|him|his|she|her|hers|they|them|their)\b", re.IGNORECASE)
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+# Seed examples for the nearest-neighbour model; "candidate" stands in for the candidate's name
+_IN_SCOPE_EXAMPLES = (
+    "What does candidate do now?", "What about before that?", "And the bootcamp?", "Any embedded work?",
+    "Which languages does he know?", "Has candidate used Snowflake?", "What certifications does she have?",
+    "Where would candidate relocate to?", "Where did candidate study?", "What was the dissertation about?",
+    "How long was he at NatWest?", "Is candidate open to remote work?", "Tell me about candidate's projects.",
+    "What technologies did that use?", "Does candidate know Python and SQL?", "What cloud platforms has he used?",
+    "Is candidate a good fit for a data engineering team?", "What is candidate looking for next?",
+    "Can I get in touch with candidate?", "Hi", "Hello there", "Thanks, that's all.", "Great, thank you!",
+    "Who is candidate?", "What are candidate's strengths?", "Has she led a team?", "What did he build there?",
+    "When did candidate graduate?", "What is candidate's notice period?", "Any AWS or Azure?", "Where is he based?",
+    "Which industries has candidate worked in?", "Summarise candidate in two sentences.", "What was that about?",
+    "Did they use Airflow or dbt?", "Is candidate available to start soon?", "Why did he move into data?",
+)
+_OFF_TOPIC_EXAMPLES = (
+    "What's the weather like in London today?", "Write me a poem about the sea.", "Tell me a joke.",
+    "What is the capital of Australia?", "Give me a recipe for lasagne.", "Who won the football last night?",
+    "How do I lose weight fast?", "Translate this sentence into French.", "What is 17 times 23?",
+    "Recommend a good film to watch tonight.", "Explain quantum computing to me.", "What is the meaning of life?",
+    "Write my homework essay on the French revolution.", "Can you fix this error in my code?",
+    "How do I reverse a linked list in Java?", "What's the best phone to buy?", "Plan a holiday to Spain for me.",
+    "Who is the richest person in the world?", "How tall is Mount Everest?", "What should I cook for dinner?",
+    "Can you do my maths homework?", "Tell me a bedtime story.", "What's the latest news?", "Who are you dating?",
+    "Are you conscious?", "What is your favourite colour?", "Sing me a song.", "How do I bake bread?",
+    "What time is it in Tokyo?", "Help me write a cover letter for my own application.", "Roll a dice for me.",
+)
+
+def _features(text: str) -> list[str]:
+    words = _TOKEN_RE.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        features.extend("#" + padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+# Tf-idf over word, word-pair and character-trigram features, scored by cosine similarity to the nearest
+# seed example of each label. Vectors are sparse dicts - a few dozen examples need nothing heavier
+class ScopeClassifier:
+
+    def __init__(self, examples: dict[str, tuple[str, ...]]) -> None:
+        counted = [(label, self._counts(text)) for label, texts in examples.items() for text in texts]
+        df: dict[str, int] = {}
+        for _, counts in counted:
+            for feature in counts:
+                df[feature] = df.get(feature, 0) + 1
+        self._idf = {feature: math.log((1 + len(counted)) / (1 + n)) + 1 for feature, n in df.items()}
+        self._examples = [(label, self._vector(counts)) for label, counts in counted]
+
+    def _counts(self, text: str) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for feature in _features(text):
+            counts[feature] = counts.get(feature, 0) + 1
+        return counts
+
+    # Unit-length tf-idf vector; features no example has carry no weight
+    def _vector(self, counts: dict[str, int]) -> dict[str, float]:
+        vector = {f: (1 + math.log(n)) * self._idf[f] for f, n in counts.items() if f in self._idf}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {f: w / norm for f, w in vector.items()} if norm else {}
+
+    # Best similarity to each label's examples
+    def scores(self, text: str) -> dict[str, float]:
+        vector = self._vector(self._counts(text))
+        best: dict[str, float] = {}
+        for label, example in self._examples:
+            similarity = sum(w * example.get(f, 0.0) for f, w in vector.items())
+            best[label] = max(best.get(label, 0.0), similarity)
+        return best
+
+def default_classifier() -> ScopeClassifier:
+    return ScopeClassifier({"in_scope": _IN_SCOPE_EXAMPLES, OFF_TOPIC: _OFF_TOPIC_EXAMPLES})
+
+# Strikes per session for injection and abuse. strikes within window_seconds pause the session for
+# cooldown_seconds; least recently seen sessions are dropped beyond max_sessions
+class SessionThrottle:
+
+    def __init__(self, *, strikes: int = 3, window_seconds: float = 600.0, cooldown_seconds: float = 900.0, max_sessions: int = 10000) -> None:
+        if strikes < 1:
+            raise ValueError("strikes must be at least 1")
+
+        self._strikes = strikes
+        self._window_seconds = window_seconds
+        self._cooldown_seconds = cooldown_seconds
+        self._max_sessions = max_sessions
+        # session id -> (strike times, paused until)
+        self._sessions: OrderedDict[str, tuple[list[float], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def paused(self, session_id: str) -> bool:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return entry is not None and entry[1] > time.monotonic()
+
+    # Records a strike; True if it pauses the session
+    def strike(self, session_id: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            times, until = self._sessions.pop(session_id, ([], 0.0))
+            times = [t for t in times if now - t < self._window_seconds] + [now]
+            if len(times) >= self._strikes:
+                times, until = [], now + self._cooldown_seconds
+            self._sessions[session_id] = (times, until)
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+            return until > now
+
+# A message answered locally, and why
+@dataclass(frozen=True)
+class Screening:
+    label: str
+    reply: str
+    # "rule", "model" or "throttle"
+    source: str
+
+class ScopePrefilter:
+
+    def __init__(
+        self,
+        *,
+        candidate_name: str = DEFAULT_CANDIDATE_NAME,
+        classifier: ScopeClassifier | None = None,
+        throttle: SessionThrottle | None = None,
+        min_similarity: float = 0.45,
+        margin: float = 0.1
+    ) -> None:
+        self._candidate_name = candidate_name
+        # None screens on the rules alone
+        self._classifier = classifier
+        # None never pauses a session
+        self._throttle = throttle
+        # The model answers only when the nearest off-topic example is this close and beats the
+        # nearest in-scope one by margin
+        self._min_similarity = min_similarity
+        self._margin = margin
+        names = [re.escape(part) for part in candidate_name.split() if len(part) > 1]
+        self._name_re = re.compile(r"\b(?:" + "|".join(names) + r")\b", re.IGNORECASE) if names else None
+
+    def _screening(self, label: str, source: str) -> Screening:
+        PREFILTER_DECISIONS.inc(label=label, source=source)
+        return Screening(label=label, reply=_REPLIES[label].replace("{candidate}", self._candidate_name), source=source)
+
+    # The label for a message, by rules then model; None when it should go to the model
+    def _classify(self, message: str) -> tuple[str, str] | None:
+        if _INJECTION_RE.search(message):
+            return INJECTION, "rule"
+        if _ABUSE_RE.search(message):
+            return ABUSE, "rule"
+
+        career = bool(_CAREER_RE.search(message))
+        if _POLITICS_RE.search(message) and not career:
+            return POLITICS, "rule"
+        named = self._name_re.sub("candidate", message) if self._name_re is not None else message
+        if _SALARY_RE.search(named) and _QUESTION_RE.search(message):
+            return SALARY, "rule"
+
+        if career or named != message or _PERSON_RE.search(message):
+            return None
+        if _OFF_TOPIC_RE.search(message):
+            return OFF_TOPIC, "rule"
+
+        if self._classifier is not None:
+            scores = self._classifier.scores(message)
+            off_topic, in_scope = scores.get(OFF_TOPIC, 0.0), scores.get("in_scope", 0.0)
+            if off_topic >= self._min_similarity and off_topic - in_scope >= self._margin:
+                return OFF_TOPIC, "model"
+        return None
+
+    # The canned reply for a message, or None to send it to the model
+    def screen(self, message: str, *, session_id: str | None = None) -> Screening | None:
+        if session_id is not None and self._throttle is not None and self._throttle.paused(session_id):
+            return self._screening(THROTTLED, "throttle")
+
+        decision = self._classify(message)
+        if decision is None:
+            PREFILTER_DECISIONS.inc(label="pass", source="none")
+            return None
+
+        label, source = decision
+        if label in (INJECTION, ABUSE) and session_id is not None and self._throttle is not None:
+            if self._throttle.strike(session_id):
+                return self._screening(THROTTLED, "throttle")
+        return self._screening(label, source)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Screen messages, one per line on stdin, and report the share answered locally")
+    parser.add_argument("--candidate", default=DEFAULT_CANDIDATE_NAME)
+    parser.add_argument("--rules-only", action="store_true", help="Screen without the nearest-neighbour model")
+    parser.add_argument("--quiet", action="store_true", help="Print only the summary")
+    args = parser.parse_args()
+
+    prefilter = ScopePrefilter(candidate_name=args.candidate, classifier=None if args.rules_only else default_classifier())
+    counts: dict[str, int] = {}
+    total = 0
+    for line in sys.stdin:
+        message = line.strip()
+        if not message:
+            continue
+        total += 1
+        screening = prefilter.screen(message)
+        label = f"{screening.label} ({screening.source})" if screening else "pass"
+        counts[label] = counts.get(label, 0) + 1
+        if not args.quiet:
+            print(f"{label:<20} {message}")
+
+    handled = total - counts.get("pass", 0)
+    print(f"\n{handled}/{total} messages ({handled / total if total else 0:.1%}) answered without the model")
+    for label, count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"  {label:<20} {count}")
+
+if __name__ == "__main__":
+    main()
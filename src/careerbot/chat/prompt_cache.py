@@ -0,0 +1,77 @@
+# Builds the cacheable prompt prefix and tracks prompt-cache hits from response usage
+
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# The part of every request that never changes between turns
+@dataclass(frozen=True)
+class PromptPrefix:
+    items: tuple[dict, ...]
+    cache_key: str
+
+# Build the prefix once: a JSON round trip gives private copies, so nothing can mutate them after startup
+def build_prompt_prefix(items: list[dict], *, key_prefix: str = "careerbot") -> PromptPrefix:
+    serialised = json.dumps(items, ensure_ascii=False, sort_keys=True)
+    frozen = tuple(json.loads(serialised))
+    digest = hashlib.sha256(serialised.encode("utf-8")).hexdigest()[:16]
+
+    return PromptPrefix(items=frozen, cache_key=f"{key_prefix}-{digest}")
+
+# Read cached_tokens from a response's usage, tolerating responses without usage
+def _cached_tokens(response) -> tuple[int, int]:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+
+    input_tokens = getattr(usage, "input_tokens", 0) or 0
+    details = getattr(usage, "input_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    return input_tokens, cached
+
+# Running prompt-cache counters, shared by every chat in the process
+class PromptCacheStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+
+    # Record one response - a hit is any request where part of the prompt was served from cache
+    def record(self, response) -> bool:
+        input_tokens, cached = _cached_tokens(response)
+        hit = cached > 0
+
+        with self._lock:
+            self.requests += 1
+            self.hits += int(hit)
+            self.input_tokens += input_tokens
+            self.cached_tokens += cached
+
+        logger.debug(
+            "prompt cache %s: cached_tokens=%d input_tokens=%d",
+            "hit" if hit else "miss", cached, input_tokens
+        )
+        return hit
+
+    @property
+    def misses(self) -> int:
+        return self.requests - self.hits
+
+    # Copy of the counters for reporting
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hits": self.hits,
+                "misses": self.requests - self.hits,
+                "hit_rate": self.hits / self.requests if self.requests else 0.0,
+                "input_tokens": self.input_tokens,
+                "cached_tokens": self.cached_tokens,
+            }
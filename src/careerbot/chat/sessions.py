@@ -0,0 +1,144 @@
+# Server-side conversation state, keyed by Gradio session id. Each session keeps its history as
+# already-formatted input items plus the id of its last response, so a turn only appends the new
+# message instead of re-normalising the whole history Gradio sends back every time
+
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SessionState:
+    # Formatted history items - user and assistant messages, as sent to the model
+    items: list[dict] = field(default_factory=list)
+    # Last response of the previous turn, for chaining the next turn on previous_response_id
+    last_response_id: str | None = None
+    # Prompt prefix the last response was made with; a profile reload breaks the chain
+    prefix_key: str | None = None
+    updated_at: float = field(default_factory=time.time)
+
+# In-process store: least recently used sessions are evicted beyond max_sessions, and sessions idle
+# for longer than ttl_seconds expire
+class MemorySessionStore:
+    def __init__(self, *, max_sessions: int = 10000, ttl_seconds: float = 86400.0) -> None:
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+
+        self._max_sessions = max_sessions
+        self._ttl_seconds = ttl_seconds
+        self._sessions: OrderedDict[str, SessionState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> SessionState | None:
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                return None
+            if self._ttl_seconds > 0 and time.time() - state.updated_at > self._ttl_seconds:
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return state
+
+    def put(self, session_id: str, state: SessionState) -> None:
+        with self._lock:
+            self._sessions[session_id] = state
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def close(self) -> None:
+        pass
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    items TEXT NOT NULL,
+    last_response_id TEXT,
+    prefix_key TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+"""
+
+# SQLite store, so sessions survive a restart. Sessions are small and written once per turn, so one
+# WAL-mode connection behind a lock is enough; expired sessions are purged every purge_every writes
+class SqliteSessionStore:
+    def __init__(self, path: Path, *, ttl_seconds: float = 86400.0, purge_every: int = 500) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._ttl_seconds = ttl_seconds
+        self._purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._purge()
+
+    def _purge(self) -> None:
+        if self._ttl_seconds > 0:
+            self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self._ttl_seconds,))
+
+    def get(self, session_id: str) -> SessionState | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT items, last_response_id, prefix_key, updated_at FROM sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        items, last_response_id, prefix_key, updated_at = row
+        if self._ttl_seconds > 0 and time.time() - updated_at > self._ttl_seconds:
+            self.delete(session_id)
+            return None
+
+        try:
+            return SessionState(items=json.loads(items), last_response_id=last_response_id, prefix_key=prefix_key, updated_at=updated_at)
+        except ValueError:
+            logger.warning("Dropping unreadable session %s", session_id)
+            self.delete(session_id)
+            return None
+
+    def put(self, session_id: str, state: SessionState) -> None:
+        payload = json.dumps(state.items, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, items, last_response_id, prefix_key, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, payload, state.last_response_id, state.prefix_key, state.updated_at)
+            )
+            self._writes += 1
+            if self._writes % self._purge_every == 0:
+                self._purge()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+SessionStore = MemorySessionStore | SqliteSessionStore
@@ -8,44 +8,355 @@ from pathlib import Path
 @dataclass(frozen=True)
 class Settings:
     openai_api_key: str
+    # LLM backends in failover order, e.g. ("openai", "anthropic")
+    llm_providers: tuple[str, ...]
+    anthropic_api_key: str
+    anthropic_model: str
+    # Hedged requests - fire the next provider when the first outlives its p95 latency
+    hedge_enabled: bool
+    hedge_percentile: float
+    hedge_min_delay: float
+    hedge_min_samples: int
+    # Retries with jittered backoff, per-model RPM/TPM/concurrency limits (0 = off) and the circuit breaker
+    llm_max_retries: int
+    llm_retry_base_delay: float
+    llm_retry_max_delay: float
+    llm_rpm: int
+    llm_tpm: int
+    llm_max_concurrency: int
+    circuit_failure_threshold: int
+    circuit_reset_seconds: float
     openai_model: str
     summary_txt_path: Path
     linkedin_pdf_path: Path
     tool_results_dir: Path
     profile_store_path: Path
     debug: bool
+    # Async serving and the shared HTTP connection pool
+    async_mode: bool
+    max_concurrent_chats: int
+    http_timeout: float
+    http_max_connections: int
+    http_max_keepalive_connections: int
+    http_keepalive_expiry: float
+    http2: bool
+    # "full" sends the whole profile every turn, "retrieval" sends the core plus top-k relevant chunks
+    profile_context_mode: str
+    # Profile context layout - "markdown" (readable) or "compact" (same facts, fewer tokens)
+    profile_encoding: str
+    retrieval_top_k: int
+    # Per-turn model routing - the default tier is openai_model; fast and strong default to it too
+    router_enabled: bool
+    reasoning_effort: str
+    max_output_tokens: int
+    fast_model: str
+    fast_reasoning_effort: str
+    fast_max_output_tokens: int
+    strong_model: str
+    strong_reasoning_effort: str
+    strong_max_output_tokens: int
+    # Words a reply may run to, matching the system prompt; streams stop at the last sentence that fits. 0 disables
+    max_reply_words: int
+    # Seconds between checks of profile_store.json for edits; 0 disables hot reload
+    profile_watch_interval: float
+    # First-turn answer cache
+    answer_cache_enabled: bool
+    answer_cache_max_entries: int
+    answer_cache_ttl_seconds: float
+    answer_cache_embedding_model: str
+    answer_cache_similarity: float
+    # History window - 0 budget sends the full history
+    history_token_budget: int
+    history_keep_turns: int
+    history_summary_tokens: int
+    # Background writer for tool results
+    tool_writer_enabled: bool
+    tool_writer_queue_size: int
+    tool_writer_fsync_interval: float
+    # Indexed SQLite copy of captured leads and unknown questions, alongside or instead of the JSONL files
+    lead_store_enabled: bool
+    lead_db_path: Path
+    tool_jsonl_enabled: bool
+    # Skip repeat record_user_details / record_role_interest calls for a contact or role already saved
+    tool_dedupe_enabled: bool
+    # Concurrent tool execution within one model turn
+    tool_timeout_seconds: float
+    tool_max_workers: int
+    # Tool rounds per turn before a text answer is required, and chaining follow-ups on previous_response_id
+    max_tool_rounds: int
+    chain_responses: bool
+    # Offer each turn only the tools its message could need, rather than all of them
+    tool_selection_enabled: bool
+    # Record unambiguous emails and structured roles locally, before the model is called
+    local_capture_enabled: bool
+    # Canned replies for out-of-scope, injection and abusive messages, without the model; sessions with
+    # prefilter_strikes injection or abuse messages in ten minutes are paused for prefilter_cooldown seconds
+    prefilter_enabled: bool
+    prefilter_model_enabled: bool
+    prefilter_strikes: int
+    prefilter_cooldown: float
+    # Observability - /metrics endpoint and optional JSONL trace file
+    metrics_enabled: bool
+    trace_path: Path | None
+    # Candidate the bot speaks about in single-profile mode
+    candidate_name: str
+    # Multi-profile mode - one bot per <profiles_dir>/<profile_id>/profile_store.json, None for single-profile
+    profiles_dir: Path | None
+    profile_cache_size: int
+    profile_header: str
+    default_profile: str
+    # Startup - build the orchestrator in the background, and reuse a prebuilt profile artifact when it is current
+    lazy_startup: bool
+    artifact_path: Path
+    # Server-side session state - "memory", "sqlite" (survives restarts) or "off"
+    session_store: str
+    session_db_path: Path
+    session_max: int
+    session_ttl_seconds: float
 
-def _parse_bool_env(name:str) -> bool:
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_ARTIFACT_PATH = PROJECT_ROOT / "build" / "careerbot_artifact.json"
+DEFAULT_SESSION_DB_PATH = PROJECT_ROOT / "var" / "sessions.sqlite3"
+DEFAULT_LEAD_DB_PATH = PROJECT_ROOT / "var" / "leads.sqlite3"
+DEFAULT_CANDIDATE_NAME = "Ali"
+
+# "true", "1", "yes" and "on" enable a flag; any other non-empty value disables it
+def _parse_bool_env(name:str, default: bool = False) -> bool:
     value = os.getenv(name, "")
-    return value.strip().lower() == "true"
+    if not value.strip():
+        return default
+    return value.strip().lower() in ("true", "1", "yes", "on")
+
+def _parse_int_env(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise RuntimeError(f"{name} must be an integer, got {value!r}")
+
+def _parse_float_env(name: str, default: float) -> float:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise RuntimeError(f"{name} must be a number, got {value!r}")
     
+_REASONING_EFFORTS = ("minimal", "low", "medium", "high")
+
+def _parse_effort_env(name: str, default: str) -> str:
+    value = os.getenv(name, "").strip().lower() or default
+    if value not in _REASONING_EFFORTS:
+        raise RuntimeError(f"{name} must be one of {', '.join(_REASONING_EFFORTS)}, got {value!r}")
+    return value
+
 def load_settings() -> Settings:
     load_dotenv(override=True)
 
-    project_root = Path(__file__).resolve().parents[2]
-    data_dir = project_root / "data"
+    data_dir = PROJECT_ROOT / "data"
 
     openai_api_key = os.getenv("OPENAI_API_KEY", "").strip()
     openai_model = os.getenv("OPENAI_MODEL", "gpt-5-mini").strip()
 
+    llm_providers = tuple(p.strip().lower() for p in os.getenv("CAREERBOT_LLM_PROVIDERS", "openai").split(",") if p.strip())
+    unknown = [p for p in llm_providers if p not in ("openai", "anthropic")]
+    if not llm_providers or unknown:
+        raise RuntimeError(f"CAREERBOT_LLM_PROVIDERS must list openai and/or anthropic, got {unknown or 'nothing'}")
+    anthropic_api_key = os.getenv("ANTHROPIC_API_KEY", "").strip()
+    anthropic_model = os.getenv("CAREERBOT_ANTHROPIC_MODEL", "claude-sonnet-4-5").strip()
+    hedge_enabled = _parse_bool_env("CAREERBOT_HEDGE")
+    hedge_percentile = _parse_float_env("CAREERBOT_HEDGE_PERCENTILE", 95.0)
+    hedge_min_delay = _parse_float_env("CAREERBOT_HEDGE_MIN_DELAY", 1.0)
+    hedge_min_samples = _parse_int_env("CAREERBOT_HEDGE_MIN_SAMPLES", 20)
+    llm_max_retries = _parse_int_env("CAREERBOT_LLM_MAX_RETRIES", 2)
+    llm_retry_base_delay = _parse_float_env("CAREERBOT_LLM_RETRY_BASE_DELAY", 0.5)
+    llm_retry_max_delay = _parse_float_env("CAREERBOT_LLM_RETRY_MAX_DELAY", 8.0)
+    llm_rpm = _parse_int_env("CAREERBOT_LLM_RPM", 0)
+    llm_tpm = _parse_int_env("CAREERBOT_LLM_TPM", 0)
+    llm_max_concurrency = _parse_int_env("CAREERBOT_LLM_MAX_CONCURRENCY", 0)
+    circuit_failure_threshold = _parse_int_env("CAREERBOT_CIRCUIT_FAILURES", 5)
+    circuit_reset_seconds = _parse_float_env("CAREERBOT_CIRCUIT_RESET_SECONDS", 30.0)
+
     summary_txt_path = data_dir / "summary.txt"
     linkedin_pdf_path = data_dir / "linkedin.pdf"
     profile_store_path = data_dir / "profile_store.json"
-    tool_results_dir = project_root / "toolresults"
+    tool_results_dir = PROJECT_ROOT / "toolresults"
 
     debug = _parse_bool_env("CAREERBOT_DEBUG")
 
-    if not openai_api_key:
+    async_mode = _parse_bool_env("CAREERBOT_ASYNC", default=True)
+    max_concurrent_chats = _parse_int_env("CAREERBOT_MAX_CONCURRENT_CHATS", 256)
+    http_timeout = _parse_float_env("CAREERBOT_HTTP_TIMEOUT", 30.0)
+    http_max_connections = _parse_int_env("CAREERBOT_HTTP_MAX_CONNECTIONS", 200)
+    http_max_keepalive_connections = _parse_int_env("CAREERBOT_HTTP_MAX_KEEPALIVE", 50)
+    http_keepalive_expiry = _parse_float_env("CAREERBOT_HTTP_KEEPALIVE_EXPIRY", 60.0)
+    # HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+    http2 = _parse_bool_env("CAREERBOT_HTTP2")
+
+    profile_context_mode = os.getenv("CAREERBOT_PROFILE_CONTEXT", "full").strip().lower()
+    if profile_context_mode not in ("full", "retrieval"):
+        raise RuntimeError(f"CAREERBOT_PROFILE_CONTEXT must be 'full' or 'retrieval', got {profile_context_mode!r}")
+    retrieval_top_k = _parse_int_env("CAREERBOT_RETRIEVAL_TOP_K", 5)
+    profile_encoding = os.getenv("CAREERBOT_PROFILE_ENCODING", "markdown").strip().lower()
+    if profile_encoding not in ("markdown", "compact"):
+        raise RuntimeError(f"CAREERBOT_PROFILE_ENCODING must be 'markdown' or 'compact', got {profile_encoding!r}")
+    router_enabled = _parse_bool_env("CAREERBOT_ROUTER", default=True)
+    reasoning_effort = _parse_effort_env("CAREERBOT_REASONING_EFFORT", "low")
+    max_output_tokens = _parse_int_env("CAREERBOT_MAX_OUTPUT_TOKENS", 300)
+    fast_model = os.getenv("CAREERBOT_FAST_MODEL", "").strip() or openai_model
+    fast_reasoning_effort = _parse_effort_env("CAREERBOT_FAST_REASONING_EFFORT", "minimal")
+    fast_max_output_tokens = _parse_int_env("CAREERBOT_FAST_MAX_OUTPUT_TOKENS", 200)
+    strong_model = os.getenv("CAREERBOT_STRONG_MODEL", "").strip() or openai_model
+    strong_reasoning_effort = _parse_effort_env("CAREERBOT_STRONG_REASONING_EFFORT", "medium")
+    strong_max_output_tokens = _parse_int_env("CAREERBOT_STRONG_MAX_OUTPUT_TOKENS", 600)
+    max_reply_words = _parse_int_env("CAREERBOT_MAX_REPLY_WORDS", 120)
+
+    profile_watch_interval = _parse_float_env("CAREERBOT_PROFILE_WATCH_INTERVAL", 2.0)
+
+    answer_cache_enabled = _parse_bool_env("CAREERBOT_ANSWER_CACHE", default=True)
+    answer_cache_max_entries = _parse_int_env("CAREERBOT_ANSWER_CACHE_MAX_ENTRIES", 1024)
+    answer_cache_ttl_seconds = _parse_float_env("CAREERBOT_ANSWER_CACHE_TTL", 3600.0)
+    # Empty disables embedding-similarity matching; exact normalised matches still work
+    answer_cache_embedding_model = os.getenv("CAREERBOT_ANSWER_CACHE_EMBEDDING_MODEL", "").strip()
+    answer_cache_similarity = _parse_float_env("CAREERBOT_ANSWER_CACHE_SIMILARITY", 0.92)
+
+    history_token_budget = _parse_int_env("CAREERBOT_HISTORY_TOKEN_BUDGET", 2000)
+    history_keep_turns = _parse_int_env("CAREERBOT_HISTORY_KEEP_TURNS", 6)
+    history_summary_tokens = _parse_int_env("CAREERBOT_HISTORY_SUMMARY_TOKENS", 300)
+
+    tool_writer_enabled = _parse_bool_env("CAREERBOT_TOOL_WRITER", default=True)
+    tool_writer_queue_size = _parse_int_env("CAREERBOT_TOOL_WRITER_QUEUE_SIZE", 10000)
+    tool_writer_fsync_interval = _parse_float_env("CAREERBOT_TOOL_WRITER_FSYNC_INTERVAL", 1.0)
+    lead_store_enabled = _parse_bool_env("CAREERBOT_LEAD_STORE", default=True)
+    lead_db_env = os.getenv("CAREERBOT_LEAD_DB", "").strip()
+    lead_db_path = Path(lead_db_env) if lead_db_env else DEFAULT_LEAD_DB_PATH
+    tool_jsonl_enabled = _parse_bool_env("CAREERBOT_TOOL_JSONL", default=True)
+    tool_dedupe_enabled = _parse_bool_env("CAREERBOT_TOOL_DEDUPE", default=True)
+
+    tool_timeout_seconds = _parse_float_env("CAREERBOT_TOOL_TIMEOUT", 10.0)
+    tool_max_workers = _parse_int_env("CAREERBOT_TOOL_MAX_WORKERS", 8)
+    max_tool_rounds = _parse_int_env("CAREERBOT_MAX_TOOL_ROUNDS", 1)
+    chain_responses = _parse_bool_env("CAREERBOT_CHAIN_RESPONSES", default=True)
+    tool_selection_enabled = _parse_bool_env("CAREERBOT_TOOL_SELECTION", default=True)
+    local_capture_enabled = _parse_bool_env("CAREERBOT_LOCAL_CAPTURE", default=True)
+    prefilter_enabled = _parse_bool_env("CAREERBOT_PREFILTER", default=True)
+    prefilter_model_enabled = _parse_bool_env("CAREERBOT_PREFILTER_MODEL", default=True)
+    prefilter_strikes = _parse_int_env("CAREERBOT_PREFILTER_STRIKES", 3)
+    prefilter_cooldown = _parse_float_env("CAREERBOT_PREFILTER_COOLDOWN", 900.0)
+
+    metrics_enabled = _parse_bool_env("CAREERBOT_METRICS", default=True)
+    trace_path_env = os.getenv("CAREERBOT_TRACE_PATH", "").strip()
+    trace_path = Path(trace_path_env) if trace_path_env else None
+
+    candidate_name = os.getenv("CAREERBOT_CANDIDATE_NAME", "").strip() or DEFAULT_CANDIDATE_NAME
+    profiles_dir_env = os.getenv("CAREERBOT_PROFILES_DIR", "").strip()
+    profiles_dir = Path(profiles_dir_env) if profiles_dir_env else None
+    profile_cache_size = _parse_int_env("CAREERBOT_PROFILE_CACHE_SIZE", 128)
+    profile_header = os.getenv("CAREERBOT_PROFILE_HEADER", "x-careerbot-profile").strip().lower()
+    default_profile = os.getenv("CAREERBOT_DEFAULT_PROFILE", "").strip()
+
+    lazy_startup = _parse_bool_env("CAREERBOT_LAZY_STARTUP", default=True)
+    artifact_path_env = os.getenv("CAREERBOT_ARTIFACT_PATH", "").strip()
+    artifact_path = Path(artifact_path_env) if artifact_path_env else DEFAULT_ARTIFACT_PATH
+
+    session_store = os.getenv("CAREERBOT_SESSION_STORE", "memory").strip().lower()
+    if session_store not in ("memory", "sqlite", "off"):
+        raise RuntimeError(f"CAREERBOT_SESSION_STORE must be memory, sqlite or off, got {session_store!r}")
+    session_db_env = os.getenv("CAREERBOT_SESSION_DB", "").strip()
+    session_db_path = Path(session_db_env) if session_db_env else DEFAULT_SESSION_DB_PATH
+    session_max = _parse_int_env("CAREERBOT_SESSION_MAX", 10000)
+    session_ttl_seconds = _parse_float_env("CAREERBOT_SESSION_TTL", 86400.0)
+
+    if "openai" in llm_providers and not openai_api_key:
         raise RuntimeError("Missing OPENAI_API_KEY in .env")
+    if "anthropic" in llm_providers and not anthropic_api_key:
+        raise RuntimeError("Missing ANTHROPIC_API_KEY in .env")
 
     return Settings(
         openai_api_key=openai_api_key,
+        llm_providers=llm_providers,
+        anthropic_api_key=anthropic_api_key,
+        anthropic_model=anthropic_model,
+        hedge_enabled=hedge_enabled,
+        hedge_percentile=hedge_percentile,
+        hedge_min_delay=hedge_min_delay,
+        hedge_min_samples=hedge_min_samples,
+        llm_max_retries=llm_max_retries,
+        llm_retry_base_delay=llm_retry_base_delay,
+        llm_retry_max_delay=llm_retry_max_delay,
+        llm_rpm=llm_rpm,
+        llm_tpm=llm_tpm,
+        llm_max_concurrency=llm_max_concurrency,
+        circuit_failure_threshold=circuit_failure_threshold,
+        circuit_reset_seconds=circuit_reset_seconds,
         openai_model=openai_model,
         summary_txt_path=summary_txt_path,
         linkedin_pdf_path=linkedin_pdf_path,
         profile_store_path=profile_store_path,
         tool_results_dir=tool_results_dir,
-        debug=debug
+        debug=debug,
+        async_mode=async_mode,
+        max_concurrent_chats=max_concurrent_chats,
+        http_timeout=http_timeout,
+        http_max_connections=http_max_connections,
+        http_max_keepalive_connections=http_max_keepalive_connections,
+        http_keepalive_expiry=http_keepalive_expiry,
+        http2=http2,
+        profile_context_mode=profile_context_mode,
+        profile_encoding=profile_encoding,
+        retrieval_top_k=retrieval_top_k,
+        router_enabled=router_enabled,
+        reasoning_effort=reasoning_effort,
+        max_output_tokens=max_output_tokens,
+        fast_model=fast_model,
+        fast_reasoning_effort=fast_reasoning_effort,
+        fast_max_output_tokens=fast_max_output_tokens,
+        strong_model=strong_model,
+        strong_reasoning_effort=strong_reasoning_effort,
+        strong_max_output_tokens=strong_max_output_tokens,
+        max_reply_words=max_reply_words,
+        profile_watch_interval=profile_watch_interval,
+        answer_cache_enabled=answer_cache_enabled,
+        answer_cache_max_entries=answer_cache_max_entries,
+        answer_cache_ttl_seconds=answer_cache_ttl_seconds,
+        answer_cache_embedding_model=answer_cache_embedding_model,
+        answer_cache_similarity=answer_cache_similarity,
+        history_token_budget=history_token_budget,
+        history_keep_turns=history_keep_turns,
+        history_summary_tokens=history_summary_tokens,
+        tool_writer_enabled=tool_writer_enabled,
+        tool_writer_queue_size=tool_writer_queue_size,
+        tool_writer_fsync_interval=tool_writer_fsync_interval,
+        lead_store_enabled=lead_store_enabled,
+        lead_db_path=lead_db_path,
+        tool_jsonl_enabled=tool_jsonl_enabled,
+        tool_dedupe_enabled=tool_dedupe_enabled,
+        tool_timeout_seconds=tool_timeout_seconds,
+        tool_max_workers=tool_max_workers,
+        max_tool_rounds=max_tool_rounds,
+        chain_responses=chain_responses,
+        tool_selection_enabled=tool_selection_enabled,
+        local_capture_enabled=local_capture_enabled,
+        prefilter_enabled=prefilter_enabled,
+        prefilter_model_enabled=prefilter_model_enabled,
+        prefilter_strikes=prefilter_strikes,
+        prefilter_cooldown=prefilter_cooldown,
+        metrics_enabled=metrics_enabled,
+        trace_path=trace_path,
+        candidate_name=candidate_name,
+        profiles_dir=profiles_dir,
+        profile_cache_size=profile_cache_size,
+        profile_header=profile_header,
+        default_profile=default_profile,
+        lazy_startup=lazy_startup,
+        artifact_path=artifact_path,
+        session_store=session_store,
+        session_db_path=session_db_path,
+        session_max=session_max,
+        session_ttl_seconds=session_ttl_seconds
     )
 
 
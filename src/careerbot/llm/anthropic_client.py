@@ -0,0 +1,247 @@
+# Wraps Anthropic Messages calls behind the same functions as openai_client, translating
+# Responses-style input and tools in, and normalising messages back out (see llm/types.py)
+
+from __future__ import annotations
+
+from careerbot.llm.types import (
+    InputTokensDetails,
+    NormalizedResponse,
+    StreamChunk,
+    Usage,
+    function_call_item,
+    item_field,
+    message_item,
+)
+from careerbot.observability.metrics import record_llm_call
+from typing import TYPE_CHECKING, AsyncIterator, Iterator
+import json
+import time
+
+# Messages calls are stateless - every call carries the whole conversation
+SUPPORTS_PREVIOUS_RESPONSE_ID = False
+
+# anthropic is only imported when a client is built, which keeps it off the startup path
+if TYPE_CHECKING:
+    from anthropic import Anthropic, AsyncAnthropic
+
+# Initialises and returns the Anthropic clients
+def build_anthropic_client(api_key: str, *, timeout: float = 30.0) -> Anthropic:
+    if not api_key or not api_key.strip():
+        raise ValueError("Missing Anthropic API key")
+
+    from anthropic import Anthropic
+
+    return Anthropic(api_key=api_key, timeout=timeout)
+
+def build_async_anthropic_client(api_key: str, *, timeout: float = 30.0) -> AsyncAnthropic:
+    if not api_key or not api_key.strip():
+        raise ValueError("Missing Anthropic API key")
+
+    from anthropic import AsyncAnthropic
+
+    return AsyncAnthropic(api_key=api_key, timeout=timeout)
+
+def _text_of(content) -> str:
+    if isinstance(content, str):
+        return content
+    parts = []
+    for block in content or []:
+        text = item_field(block, "text")
+        if text:
+            parts.append(text)
+    return "\n".join(parts)
+
+# Responses input items -> Anthropic system text and alternating messages.
+# Reasoning items are OpenAI-only and are dropped; consecutive same-role items are merged
+def _to_messages(input: list, *, cache_prefix: bool) -> tuple[list[dict], list[dict]]:
+    system: list[dict] = []
+    messages: list[dict] = []
+
+    def add(role: str, block: dict) -> None:
+        if messages and messages[-1]["role"] == role:
+            messages[-1]["content"].append(block)
+        else:
+            messages.append({"role": role, "content": [block]})
+
+    for item in input:
+        item_type = item_field(item, "type")
+        role = item_field(item, "role")
+
+        if item_type == "function_call":
+            try:
+                arguments = json.loads(item_field(item, "arguments") or "{}")
+            except ValueError:
+                arguments = {}
+            add("assistant", {
+                "type": "tool_use",
+                "id": item_field(item, "call_id"),
+                "name": item_field(item, "name"),
+                "input": arguments,
+            })
+        elif item_type == "function_call_output":
+            add("user", {
+                "type": "tool_result",
+                "tool_use_id": item_field(item, "call_id"),
+                "content": str(item_field(item, "output", "")),
+            })
+        elif role == "system" or role == "developer":
+            text = _text_of(item_field(item, "content"))
+            if text:
+                system.append({"type": "text", "text": text})
+        elif role in ("user", "assistant"):
+            text = _text_of(item_field(item, "content"))
+            if not text:
+                continue
+            block = {"type": "text", "text": text}
+            # The first user message is the profile context - the end of the stable, cacheable prefix
+            if cache_prefix and not messages and role == "user":
+                block["cache_control"] = {"type": "ephemeral"}
+            add(role, block)
+
+    if cache_prefix and system:
+        system[-1]["cache_control"] = {"type": "ephemeral"}
+
+    return system, messages
+
+def _to_tools(tools: list) -> list[dict]:
+    return [
+        {
+            "name": tool["name"],
+            "description": tool.get("description", ""),
+            "input_schema": tool.get("parameters", {"type": "object", "properties": {}}),
+        }
+        for tool in tools
+        if tool.get("type", "function") == "function"
+    ]
+
+# Builds the arguments for messages.create. Anthropic has no reasoning-effort equivalent at this
+# output size (extended thinking needs a 1024-token budget), so reasoning_effort is accepted and ignored
+def _request_kwargs(model: str, input: list, tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, tool_choice: str | None = None) -> dict:
+
+    if not model or not model.strip():
+        raise ValueError("Missing Anthropic model")
+
+    if not input or not isinstance(input, list):
+        raise ValueError("Input must be a non-empty list of messages")
+
+    system, messages = _to_messages(input, cache_prefix=bool(prompt_cache_key))
+    kwargs = {
+        "model": model,
+        "messages": messages,
+        "max_tokens": max_output_tokens,
+    }
+    if system:
+        kwargs["system"] = system
+    if tools:
+        kwargs["tools"] = _to_tools(tools)
+        if tool_choice:
+            kwargs["tool_choice"] = {"type": tool_choice}
+    return kwargs
+
+# Anthropic message -> Responses-shaped NormalizedResponse
+def normalize_message(message) -> NormalizedResponse:
+    output = []
+    for block in message.content:
+        if block.type == "text" and block.text:
+            output.append(message_item(block.text))
+        elif block.type == "tool_use":
+            output.append(function_call_item(
+                call_id=block.id,
+                name=block.name,
+                arguments=json.dumps(block.input, ensure_ascii=False)
+            ))
+
+    # Anthropic counts cache reads and writes apart from input_tokens; OpenAI includes them
+    usage = message.usage
+    cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+    return NormalizedResponse(
+        id=message.id,
+        model=message.model,
+        status="incomplete" if message.stop_reason == "max_tokens" else "completed",
+        output=output,
+        usage=Usage(
+            input_tokens=(usage.input_tokens or 0) + cache_read + cache_write,
+            output_tokens=usage.output_tokens or 0,
+            input_tokens_details=InputTokensDetails(cached_tokens=cache_read)
+        ),
+        provider="anthropic"
+    )
+
+def _text_delta(event) -> str:
+    if getattr(event, "type", None) != "content_block_delta":
+        return ""
+    delta = event.delta
+    return getattr(delta, "text", "") if getattr(delta, "type", None) == "text_delta" else ""
+
+# Sends the request and returns the normalised response
+def request_response(*, client: Anthropic, model: str, input: list, tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, tool_choice: str | None = None):
+
+    kwargs = _request_kwargs(model, input, tools, prompt_cache_key, reasoning_effort, max_output_tokens, tool_choice)
+    start = time.perf_counter()
+    try:
+        response = normalize_message(client.messages.create(**kwargs))
+    except Exception:
+        record_llm_call(model=model, mode="blocking", start=start, outcome="error")
+        raise
+
+    record_llm_call(model=model, mode="blocking", start=start, response=response)
+    return response
+
+# Async version of request_response
+async def arequest_response(*, client: AsyncAnthropic, model: str, input: list, tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, tool_choice: str | None = None):
+
+    kwargs = _request_kwargs(model, input, tools, prompt_cache_key, reasoning_effort, max_output_tokens, tool_choice)
+    start = time.perf_counter()
+    try:
+        response = normalize_message(await client.messages.create(**kwargs))
+    except Exception:
+        record_llm_call(model=model, mode="async", start=start, outcome="error")
+        raise
+
+    record_llm_call(model=model, mode="async", start=start, response=response)
+    return response
+
+# Streams the request, yielding text deltas as they arrive and the normalised response last
+def stream_response(*, client: Anthropic, model: str, input: list, tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, tool_choice: str | None = None) -> Iterator[StreamChunk]:
+
+    kwargs = _request_kwargs(model, input, tools, prompt_cache_key, reasoning_effort, max_output_tokens, tool_choice)
+    start = time.perf_counter()
+    response = None
+    outcome = "cancelled"
+
+    try:
+        with client.messages.stream(**kwargs) as stream:
+            for event in stream:
+                delta = _text_delta(event)
+                if delta:
+                    yield StreamChunk(delta=delta)
+            response, outcome = normalize_message(stream.get_final_message()), None
+        yield StreamChunk(response=response)
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        record_llm_call(model=model, mode="stream", start=start, response=response, outcome=outcome)
+
+# Async version of stream_response
+async def astream_response(*, client: AsyncAnthropic, model: str, input: list, tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, tool_choice: str | None = None) -> AsyncIterator[StreamChunk]:
+
+    kwargs = _request_kwargs(model, input, tools, prompt_cache_key, reasoning_effort, max_output_tokens, tool_choice)
+    start = time.perf_counter()
+    response = None
+    outcome = "cancelled"
+
+    try:
+        async with client.messages.stream(**kwargs) as stream:
+            async for event in stream:
+                delta = _text_delta(event)
+                if delta:
+                    yield StreamChunk(delta=delta)
+            response, outcome = normalize_message(await stream.get_final_message()), None
+        yield StreamChunk(response=response)
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        record_llm_call(model=model, mode="async_stream", start=start, response=response, outcome=outcome)
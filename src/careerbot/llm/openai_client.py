@@ -1,33 +1,231 @@
 # Wraps OpenAI calls - allows for easy LLM switching without changing logic
 
-from openai import OpenAI
-import httpx
+from __future__ import annotations
+
+from careerbot.llm.types import StreamChunk
+from careerbot.observability.metrics import record_llm_call
+from typing import TYPE_CHECKING, AsyncIterator, Iterator
+import time
+
+# openai and httpx are only imported when a client is built, which keeps them off the startup path
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+# Responses are stored server-side, so a follow-up can name the previous response instead of resending it
+SUPPORTS_PREVIOUS_RESPONSE_ID = True
+
+# Terminal stream events that carry the finished response object
+_TERMINAL_EVENTS = {"response.completed", "response.incomplete", "response.failed"}
+
+# Timeout and pool limits shared by the sync and async clients
+def _http_client_kwargs(*, timeout: float, max_connections: int, max_keepalive_connections: int, keepalive_expiry: float, http2: bool) -> dict:
+    import httpx
+
+    return {
+        "timeout": timeout,
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        "http2": http2,
+    }
+
+# Initialises and returns the OpenAI client, pooled like the async one
+def build_client(
+    api_key: str,
+    *,
+    timeout: float = 30.0,
+    max_connections: int = 200,
+    max_keepalive_connections: int = 50,
+    keepalive_expiry: float = 60.0,
+    http2: bool = False
+) -> OpenAI:
 
-# Initialises and returns the OpenAI client
-def build_client(api_key: str) -> OpenAI:
-    
     if not api_key or not api_key.strip():
         raise ValueError("Missing OpenAI API key")
-    
-    return OpenAI(api_key = api_key, http_client=httpx.Client(timeout=30.0)
-)
 
-# Sends the request to the LLM and returns the LLM's response
-def request_response(*, client: OpenAI, model: str, input: list[dict], tools: list):
+    from openai import OpenAI
+    import httpx
+
+    http_client = httpx.Client(**_http_client_kwargs(
+        timeout=timeout,
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+        http2=http2
+    ))
+
+    return OpenAI(api_key=api_key, http_client=http_client)
+
+# Initialises and returns the async OpenAI client on a shared, pooled connection.
+# One client is shared by every concurrent chat, so the pool limits cap total upstream connections.
+def build_async_client(
+    api_key: str,
+    *,
+    timeout: float = 30.0,
+    max_connections: int = 200,
+    max_keepalive_connections: int = 50,
+    keepalive_expiry: float = 60.0,
+    http2: bool = False
+) -> AsyncOpenAI:
+
+    if not api_key or not api_key.strip():
+        raise ValueError("Missing OpenAI API key")
+
+    from openai import AsyncOpenAI
+    import httpx
+
+    http_client = httpx.AsyncClient(**_http_client_kwargs(
+        timeout=timeout,
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+        http2=http2
+    ))
+
+    return AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+# Builds the arguments shared by every responses.create call
+def _request_kwargs(model: str, input: list[dict], tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, previous_response_id: str | None = None, tool_choice: str | None = None) -> dict:
 
     if not model or not model.strip():
         raise ValueError("Missing OpenAI model")
     
     if not input or not isinstance(input, list):
         raise ValueError("Input must be a non-empty list of messages")
-    
-    response = client.responses.create(
-        model=model,
-        tools=tools,
-        input=input,
-        max_output_tokens=300,
-        reasoning={
-            "effort": "low"
+
+    kwargs = {
+        "model": model,
+        "tools": tools,
+        "input": input,
+        "max_output_tokens": max_output_tokens,
+        "reasoning": {
+            "effort": reasoning_effort
         }
-    )
-    return response
\ No newline at end of file
+    }
+
+    # Routes requests sharing a prompt prefix to the same cache
+    if prompt_cache_key:
+        kwargs["prompt_cache_key"] = prompt_cache_key
+
+    # Continues from a stored response; input then holds only the items added since
+    if previous_response_id:
+        kwargs["previous_response_id"] = previous_response_id
+
+    if tool_choice:
+        kwargs["tool_choice"] = tool_choice
+
+    return kwargs
+
+# Sends the request to the LLM and returns the LLM's response
+def request_response(*, client: OpenAI, model: str, input: list[dict], tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, previous_response_id: str | None = None, tool_choice: str | None = None):
+
+    kwargs = _request_kwargs(model, input, tools, prompt_cache_key, reasoning_effort, max_output_tokens, previous_response_id, tool_choice)
+    start = time.perf_counter()
+    try:
+        response = client.responses.create(**kwargs)
+    except Exception:
+        record_llm_call(model=model, mode="blocking", start=start, outcome="error")
+        raise
+
+    record_llm_call(model=model, mode="blocking", start=start, response=response)
+    return response
+
+# Async version of request_response
+async def arequest_response(*, client: AsyncOpenAI, model: str, input: list[dict], tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, previous_response_id: str | None = None, tool_choice: str | None = None):
+
+    kwargs = _request_kwargs(model, input, tools, prompt_cache_key, reasoning_effort, max_output_tokens, previous_response_id, tool_choice)
+    start = time.perf_counter()
+    try:
+        response = await client.responses.create(**kwargs)
+    except Exception:
+        record_llm_call(model=model, mode="async", start=start, outcome="error")
+        raise
+
+    record_llm_call(model=model, mode="async", start=start, response=response)
+    return response
+
+# Returns the embedding vector for a piece of text
+def embed_text(*, client: OpenAI, model: str, text: str) -> list[float]:
+
+    if not model or not model.strip():
+        raise ValueError("Missing embedding model")
+
+    response = client.embeddings.create(model=model, input=text)
+    return response.data[0].embedding
+
+# Turns a stream event into a StreamChunk, or None if the event is not needed
+def _chunk_from_event(event) -> StreamChunk | None:
+    event_type = getattr(event, "type", None)
+
+    if event_type == "response.output_text.delta":
+        return StreamChunk(delta=event.delta) if event.delta else None
+
+    if event_type in _TERMINAL_EVENTS:
+        return StreamChunk(response=event.response)
+
+    return None
+
+# Streams the request to the LLM, yielding text deltas as they arrive and the finished response last
+def stream_response(*, client: OpenAI, model: str, input: list[dict], tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, previous_response_id: str | None = None, tool_choice: str | None = None) -> Iterator[StreamChunk]:
+
+    kwargs = _request_kwargs(model, input, tools, prompt_cache_key, reasoning_effort, max_output_tokens, previous_response_id, tool_choice)
+    start = time.perf_counter()
+    # Set once the call is recorded; "cancelled" if the caller stops reading early
+    response = None
+    outcome = "cancelled"
+
+    # Function call arguments also arrive as deltas, but they are only acted on once the
+    # terminal event delivers the finished response with every argument string complete
+    try:
+        stream = client.responses.create(**kwargs, stream=True)
+        try:
+            for event in stream:
+                chunk = _chunk_from_event(event)
+                if chunk is None:
+                    continue
+                if chunk.response is not None:
+                    response, outcome = chunk.response, None
+                yield chunk
+                if chunk.response is not None:
+                    return
+        finally:
+            stream.close()
+        outcome = "error"
+        raise RuntimeError("Response stream ended without a completed response")
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        record_llm_call(model=model, mode="stream", start=start, response=response, outcome=outcome)
+
+# Async version of stream_response
+async def astream_response(*, client: AsyncOpenAI, model: str, input: list[dict], tools: list, prompt_cache_key: str | None = None, reasoning_effort: str = "low", max_output_tokens: int = 300, previous_response_id: str | None = None, tool_choice: str | None = None) -> AsyncIterator[StreamChunk]:
+
+    kwargs = _request_kwargs(model, input, tools, prompt_cache_key, reasoning_effort, max_output_tokens, previous_response_id, tool_choice)
+    start = time.perf_counter()
+    response = None
+    outcome = "cancelled"
+
+    try:
+        stream = await client.responses.create(**kwargs, stream=True)
+        try:
+            async for event in stream:
+                chunk = _chunk_from_event(event)
+                if chunk is None:
+                    continue
+                if chunk.response is not None:
+                    response, outcome = chunk.response, None
+                yield chunk
+                if chunk.response is not None:
+                    return
+        finally:
+            await stream.close()
+        outcome = "error"
+        raise RuntimeError("Response stream ended without a completed response")
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        record_llm_call(model=model, mode="async_stream", start=start, response=response, outcome=outcome)
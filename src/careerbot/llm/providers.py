@@ -0,0 +1,318 @@
+# LLM backends behind one interface, with failover between them and optional hedged requests.
+# Every backend module exposes request_response / arequest_response / stream_response /
+# astream_response with the same arguments and Responses-shaped results
+
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from types import ModuleType
+from typing import Any, AsyncIterator, Iterator
+from careerbot.llm import anthropic_client, openai_client
+from careerbot.llm.resilience import Resilience
+from careerbot.llm.types import StreamChunk
+from careerbot.observability.metrics import LLM_FAILOVERS, LLM_HEDGES
+import asyncio
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Error class names that mean the provider, not the request, is the problem
+_FAILOVER_ERRORS = {
+    "APITimeoutError", "APIConnectionError", "InternalServerError", "ServiceUnavailableError",
+    "OverloadedError", "TimeoutException", "ConnectError", "ReadTimeout", "ConnectTimeout", "TimeoutError",
+    "RateLimitError", "CircuitOpenError",
+}
+
+# Timeouts, connection failures, rate limits that outlasted the retries, open circuits and 5xx/529
+# responses move on to the next provider; bad requests do not
+def is_failover_error(exc: BaseException) -> bool:
+    if any(cls.__name__ in _FAILOVER_ERRORS for cls in type(exc).__mro__):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+# One backend with its clients. model overrides the routed model, since tier model names are per provider.
+# resilience adds retries, rate limits and a circuit breaker around every call (see llm/resilience.py)
+class Provider:
+    def __init__(
+        self,
+        name: str,
+        *,
+        backend: ModuleType,
+        client: Any,
+        async_client: Any = None,
+        model: str | None = None,
+        resilience: Resilience | None = None
+    ) -> None:
+        self.name = name
+        self._backend = backend
+        self._client = client
+        self._async_client = async_client
+        self._model = model
+        self._resilience = resilience or Resilience(name)
+
+    # A chained follow-up (previous_response_id plus only the new items) also carries the whole
+    # transcript, which is sent instead to backends that keep no server-side state
+    def _args(self, request: dict) -> dict:
+        args = dict(request)
+        transcript = args.pop("transcript", None)
+        if not self._backend.SUPPORTS_PREVIOUS_RESPONSE_ID:
+            if args.pop("previous_response_id", None) and transcript is not None:
+                args["input"] = transcript
+        if self._model:
+            args["model"] = self._model
+        return args
+
+    def _require_async_client(self) -> Any:
+        if self._async_client is None:
+            raise RuntimeError(f"LLM provider {self.name!r} was built without an async client")
+        return self._async_client
+
+    @property
+    def resilience(self) -> Resilience:
+        return self._resilience
+
+    def request(self, request: dict):
+        return self._resilience.call(
+            self._args(request),
+            lambda args: self._backend.request_response(client=self._client, **args)
+        )
+
+    async def arequest(self, request: dict):
+        async_client = self._require_async_client()
+        return await self._resilience.acall(
+            self._args(request),
+            lambda args: self._backend.arequest_response(client=async_client, **args)
+        )
+
+    def stream(self, request: dict) -> Iterator[StreamChunk]:
+        return self._resilience.stream(
+            self._args(request),
+            lambda args: self._backend.stream_response(client=self._client, **args)
+        )
+
+    def astream(self, request: dict) -> AsyncIterator[StreamChunk]:
+        async_client = self._require_async_client()
+        return self._resilience.astream(
+            self._args(request),
+            lambda args: self._backend.astream_response(client=async_client, **args)
+        )
+
+def openai_provider(client: Any, async_client: Any = None, *, model: str | None = None, resilience: Resilience | None = None) -> Provider:
+    return Provider("openai", backend=openai_client, client=client, async_client=async_client, model=model, resilience=resilience)
+
+def anthropic_provider(client: Any, async_client: Any = None, *, model: str | None = None, resilience: Resilience | None = None) -> Provider:
+    return Provider("anthropic", backend=anthropic_client, client=client, async_client=async_client, model=model, resilience=resilience)
+
+# Rolling window of successful call latencies, for the hedging threshold
+class LatencyWindow:
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(pct / 100 * len(samples)) - 1))
+        return samples[index]
+
+# Providers in preference order. A call goes to the first; a failover error moves it to the next.
+# With hedging on, a blocking call that outlives the primary's p95 latency also fires at the second
+# provider, and whichever answers first wins; if both fail, the call moves on to the third. Streams fail over only before their first chunk,
+# since text already shown to the user cannot be taken back
+class ProviderChain:
+    def __init__(
+        self,
+        providers: list[Provider],
+        *,
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 1.0,
+        hedge_min_samples: int = 20,
+        hedge_workers: int = 16
+    ) -> None:
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+
+        self._providers = list(providers)
+        self._hedge = hedge and len(self._providers) > 1
+        self._hedge_percentile = hedge_percentile
+        self._hedge_min_delay = hedge_min_delay
+        self._hedge_min_samples = max(1, hedge_min_samples)
+        self._latency = LatencyWindow()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="careerbot-hedge") if self._hedge else None
+
+    @property
+    def providers(self) -> list[Provider]:
+        return list(self._providers)
+
+    # Seconds to wait on the primary before hedging, or None until there are enough samples
+    def hedge_delay(self) -> float | None:
+        if not self._hedge or len(self._latency) < self._hedge_min_samples:
+            return None
+        return max(self._hedge_min_delay, self._latency.percentile(self._hedge_percentile))
+
+    def _failover(self, index: int, exc: BaseException) -> None:
+        source, target = self._providers[index].name, self._providers[index + 1].name
+        LLM_FAILOVERS.inc(source=source, target=target, reason=type(exc).__name__)
+        logger.warning("LLM provider %s failed (%s: %s); failing over to %s", source, type(exc).__name__, exc, target)
+
+    # Both hedged calls failed. The rest of the chain is tried in order, as in plain failover, when there is
+    # one and the error is a failover error
+    def _fail_past_hedge(self, exc: BaseException) -> bool:
+        if len(self._providers) <= 2 or not is_failover_error(exc):
+            return False
+        self._failover(1, exc)
+        return True
+
+    def _timed(self, provider: Provider, request: dict, *, primary: bool):
+        start = time.perf_counter()
+        response = provider.request(request)
+        if primary:
+            self._latency.add(time.perf_counter() - start)
+        return response
+
+    def request(self, request: dict):
+        start = 0
+        delay = self.hedge_delay()
+        if delay is not None:
+            try:
+                return self._hedged_request(request, delay)
+            except Exception as exc:
+                if not self._fail_past_hedge(exc):
+                    raise
+                start = 2
+
+        for index, provider in enumerate(self._providers[start:], start):
+            try:
+                return self._timed(provider, request, primary=index == 0)
+            except Exception as exc:
+                if index == len(self._providers) - 1 or not is_failover_error(exc):
+                    raise
+                self._failover(index, exc)
+
+    # Primary first; the backup only if the primary is slower than the threshold or fails over
+    def _hedged_request(self, request: dict, delay: float):
+        primary, backup = self._providers[0], self._providers[1]
+        futures = {self._hedge_executor.submit(self._timed, primary, request, primary=True): primary}
+        done, _ = wait(futures, timeout=delay)
+
+        if not done:
+            LLM_HEDGES.inc(outcome="fired")
+            futures[self._hedge_executor.submit(self._timed, backup, request, primary=False)] = backup
+
+        errors = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                exc = future.exception()
+                if exc is None:
+                    if len(futures) > 1:
+                        LLM_HEDGES.inc(outcome="primary_won" if futures[future] is primary else "backup_won")
+                    # The losing call runs to completion in its thread; its result is discarded
+                    return future.result()
+                errors.append(exc)
+                if futures[future] is primary and backup not in futures.values() and is_failover_error(exc):
+                    self._failover(0, exc)
+                    futures[self._hedge_executor.submit(self._timed, backup, request, primary=False)] = backup
+                    pending = {f for f in futures if not f.done()}
+        # A bad request is the answer whichever call hit it; only failover errors move down the chain
+        raise next((e for e in errors if not is_failover_error(e)), errors[-1])
+
+    async def _atimed(self, provider: Provider, request: dict, *, primary: bool):
+        start = time.perf_counter()
+        response = await provider.arequest(request)
+        if primary:
+            self._latency.add(time.perf_counter() - start)
+        return response
+
+    async def arequest(self, request: dict):
+        start = 0
+        delay = self.hedge_delay()
+        if delay is not None:
+            try:
+                return await self._ahedged_request(request, delay)
+            except Exception as exc:
+                if not self._fail_past_hedge(exc):
+                    raise
+                start = 2
+
+        for index, provider in enumerate(self._providers[start:], start):
+            try:
+                return await self._atimed(provider, request, primary=index == 0)
+            except Exception as exc:
+                if index == len(self._providers) - 1 or not is_failover_error(exc):
+                    raise
+                self._failover(index, exc)
+
+    async def _ahedged_request(self, request: dict, delay: float):
+        primary, backup = self._providers[0], self._providers[1]
+        tasks = {asyncio.ensure_future(self._atimed(primary, request, primary=True)): primary}
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+
+        if not done:
+            LLM_HEDGES.inc(outcome="fired")
+            tasks[asyncio.ensure_future(self._atimed(backup, request, primary=False))] = backup
+
+        errors = []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    exc = task.exception()
+                    if exc is None:
+                        if len(tasks) > 1:
+                            LLM_HEDGES.inc(outcome="primary_won" if tasks[task] is primary else "backup_won")
+                        return task.result()
+                    errors.append(exc)
+                    if tasks[task] is primary and backup not in tasks.values() and is_failover_error(exc):
+                        self._failover(0, exc)
+                        backup_task = asyncio.ensure_future(self._atimed(backup, request, primary=False))
+                        tasks[backup_task] = backup
+                        pending.add(backup_task)
+            raise next((e for e in errors if not is_failover_error(e)), errors[-1])
+        finally:
+            # Unlike threads, the losing task can be cancelled
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stream(self, request: dict) -> Iterator[StreamChunk]:
+        for index, provider in enumerate(self._providers):
+            started = False
+            try:
+                for chunk in provider.stream(request):
+                    started = True
+                    yield chunk
+                return
+            except Exception as exc:
+                if started or index == len(self._providers) - 1 or not is_failover_error(exc):
+                    raise
+                self._failover(index, exc)
+
+    async def astream(self, request: dict) -> AsyncIterator[StreamChunk]:
+        for index, provider in enumerate(self._providers):
+            started = False
+            try:
+                async for chunk in provider.astream(request):
+                    started = True
+                    yield chunk
+                return
+            except Exception as exc:
+                if started or index == len(self._providers) - 1 or not is_failover_error(exc):
+                    raise
+                self._failover(index, exc)
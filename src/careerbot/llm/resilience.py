@@ -0,0 +1,487 @@
+# Retries, rate limits and a circuit breaker around one provider's calls.
+# Transient failures (429, 5xx, timeouts) are retried with jittered exponential backoff, honouring
+# Retry-After; requests wait for per-model RPM/TPM token buckets and a concurrency cap rather than
+# bursting into 429s; and after repeated upstream failures the breaker fails calls fast until a probe succeeds
+
+from __future__ import annotations
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Iterator, TypeVar
+from careerbot.observability.metrics import LLM_CIRCUIT_TRANSITIONS, LLM_RATE_LIMIT_WAIT, LLM_RETRIES, usage_tokens
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Error class names worth another attempt - the same call may well succeed a moment later
+_RETRYABLE_ERRORS = {
+    "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError", "ServiceUnavailableError",
+    "OverloadedError", "TimeoutException", "ConnectError", "ReadTimeout", "ConnectTimeout", "TimeoutError",
+}
+_RETRYABLE_STATUSES = {408, 409, 429}
+
+# Raised instead of calling a provider whose circuit is open
+class CircuitOpenError(RuntimeError):
+    pass
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    return status if isinstance(status, int) else None
+
+def is_retryable_error(exc: BaseException) -> bool:
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if any(cls.__name__ in _RETRYABLE_ERRORS for cls in type(exc).__mro__):
+        return True
+    status = _status_code(exc)
+    return status is not None and (status in _RETRYABLE_STATUSES or status >= 500)
+
+# Rate limiting says nothing about upstream health, so 429s do not count towards the breaker
+def _is_upstream_failure(exc: BaseException) -> bool:
+    if _status_code(exc) == 429 or type(exc).__name__ == "RateLimitError":
+        return False
+    return is_retryable_error(exc)
+
+# Seconds the server asked us to wait, from retry-after-ms or retry-after (seconds or an HTTP date)
+def retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        value = headers.get("retry-after-ms")
+        if value:
+            return max(0.0, float(value) / 1000)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    # Attempts in total, including the first
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    # A longer Retry-After gives up instead, so the caller can fail over rather than stall the turn
+    max_retry_after: float = 20.0
+
+    # Seconds to sleep before the next attempt, or None to give up
+    def delay(self, attempt: int, exc: BaseException) -> float | None:
+        if attempt + 1 >= self.max_attempts or not is_retryable_error(exc):
+            return None
+
+        hinted = retry_after(exc)
+        if hinted is not None:
+            return hinted if hinted <= self.max_retry_after else None
+
+        # Full jitter: clients retrying together spread out instead of arriving in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+# A token bucket refilled continuously at rate_per_minute, holding at most a minute's worth.
+# Callers reserve up front and sleep for the returned wait, so waiters are served in arrival order
+class TokenBucket:
+    def __init__(self, rate_per_minute: float) -> None:
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+
+        self._capacity = float(rate_per_minute)
+        self._rate = rate_per_minute / 60.0
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    # Takes amount (capped at the capacity) and returns the seconds to wait before using it
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= min(amount, self._capacity)
+            return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+
+    # Returns tokens reserved but not used, e.g. when a request's estimate exceeded its real usage
+    def refund(self, amount: float) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._capacity, self._tokens + amount)
+
+# Caps calls in flight. Shared by threads and the event loop, so async waiters poll rather than
+# holding an asyncio primitive bound to one loop
+class ConcurrencyLimit:
+    def __init__(self, limit: int) -> None:
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+
+        self._limit = limit
+        self._active = 0
+        self._cond = threading.Condition()
+
+    def _try_acquire(self) -> bool:
+        if self._active < self._limit:
+            self._active += 1
+            return True
+        return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            self._cond.wait_for(self._try_acquire)
+
+    async def aacquire(self) -> None:
+        delay = 0.005
+        while True:
+            with self._cond:
+                if self._try_acquire():
+                    return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+@dataclass
+class _ModelLimits:
+    requests: TokenBucket | None
+    tokens: TokenBucket | None
+    concurrency: ConcurrencyLimit | None
+
+# Rough token count of a request: ~4 characters a token for the input, plus the full output cap
+def estimate_request_tokens(request: dict) -> int:
+    text = json.dumps(request.get("input", []), default=str, ensure_ascii=False)
+    return len(text) // 4 + int(request.get("max_output_tokens") or 0)
+
+# Per-model RPM, TPM and concurrency limits. Every model gets its own buckets, as the API's limits are per model.
+# A limit of 0 is off
+class RateLimiter:
+    def __init__(self, *, rpm: int = 0, tpm: int = 0, max_concurrency: int = 0) -> None:
+        self._rpm = rpm
+        self._tpm = tpm
+        self._max_concurrency = max_concurrency
+        self._models: dict[str, _ModelLimits] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._rpm > 0 or self._tpm > 0 or self._max_concurrency > 0
+
+    def _limits(self, model: str) -> _ModelLimits:
+        with self._lock:
+            limits = self._models.get(model)
+            if limits is None:
+                limits = self._models[model] = _ModelLimits(
+                    requests=TokenBucket(self._rpm) if self._rpm > 0 else None,
+                    tokens=TokenBucket(self._tpm) if self._tpm > 0 else None,
+                    concurrency=ConcurrencyLimit(self._max_concurrency) if self._max_concurrency > 0 else None
+                )
+            return limits
+
+    # Seconds to wait before sending a request of this many tokens
+    def reserve(self, model: str, tokens: int) -> float:
+        limits = self._limits(model)
+        wait = 0.0
+        if limits.requests is not None:
+            wait = max(wait, limits.requests.reserve(1))
+        if limits.tokens is not None:
+            wait = max(wait, limits.tokens.reserve(tokens))
+        if wait:
+            LLM_RATE_LIMIT_WAIT.observe(wait, model=model)
+        return wait
+
+    # Squares the estimate with the usage the API reported - refunding what was not used, or charging
+    # what was under-counted (a follow-up chained on previous_response_id is billed for the stored context too)
+    def settle(self, model: str, estimated: int, response) -> None:
+        limits = self._limits(model)
+        tokens = usage_tokens(response)
+        if limits.tokens is None or not tokens:
+            return
+        unused = estimated - tokens["input"] - tokens["output"]
+        if unused > 0:
+            limits.tokens.refund(unused)
+        elif unused < 0:
+            limits.tokens.reserve(-unused)
+
+    # Squares the estimate for a stream closed before the API reported usage. The input estimate stands and the
+    # output is counted from the text streamed so far, so the rest of the output cap is refunded
+    def settle_partial(self, model: str, request: dict, output_tokens: int) -> None:
+        limits = self._limits(model)
+        if limits.tokens is None:
+            return
+        unused = int(request.get("max_output_tokens") or 0) - output_tokens
+        if unused > 0:
+            limits.tokens.refund(unused)
+
+    def acquire(self, model: str) -> None:
+        concurrency = self._limits(model).concurrency
+        if concurrency is not None:
+            concurrency.acquire()
+
+    async def aacquire(self, model: str) -> None:
+        concurrency = self._limits(model).concurrency
+        if concurrency is not None:
+            await concurrency.aacquire()
+
+    def release(self, model: str) -> None:
+        concurrency = self._limits(model).concurrency
+        if concurrency is not None:
+            concurrency.release()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Opens after failure_threshold consecutive upstream failures; after reset_timeout one probe call is let
+# through (half-open), which closes the circuit on success or re-opens it on failure
+class CircuitBreaker:
+    def __init__(self, name: str, *, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _transition(self, state: str) -> None:
+        if state != self._state:
+            self._state = state
+            LLM_CIRCUIT_TRANSITIONS.inc(provider=self.name, state=state)
+            log = logger.warning if state == OPEN else logger.info
+            log("LLM provider %s circuit %s", self.name, state.replace("_", "-"))
+
+    # Raises CircuitOpenError unless a call may go ahead
+    def before_call(self) -> None:
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(f"LLM provider {self.name!r} is unavailable (circuit open)")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._transition(CLOSED)
+
+    # A call that ended without a result (cancelled, or its stream closed early) frees the probe slot
+    def record_abandoned(self) -> None:
+        with self._lock:
+            self._probing = False
+
+    # Only upstream failures count; anything else just ends a probe without a verdict
+    def record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            probing, self._probing = self._probing, False
+            if not _is_upstream_failure(exc):
+                return
+            self._failures += 1
+            if probing or self._failures >= self._failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+# The resilience layer for one provider. Each attempt passes the breaker, waits its turn under the
+# rate limits, and is retried per the policy. Streams are only retried before their first chunk
+class Resilience:
+    def __init__(
+        self,
+        name: str,
+        *,
+        retry: RetryPolicy | None = None,
+        limiter: RateLimiter | None = None,
+        breaker: CircuitBreaker | None = None
+    ) -> None:
+        self.name = name
+        self._retry = retry or RetryPolicy(max_attempts=1)
+        self._limiter = limiter if limiter is not None and limiter.enabled else None
+        self._breaker = breaker
+
+    @property
+    def breaker(self) -> CircuitBreaker | None:
+        return self._breaker
+
+    def _before_attempt(self, request: dict) -> tuple[str, int, float]:
+        if self._breaker is not None:
+            self._breaker.before_call()
+        model = request.get("model", "")
+        if self._limiter is None:
+            return model, 0, 0.0
+        estimated = estimate_request_tokens(request)
+        return model, estimated, self._limiter.reserve(model, estimated)
+
+    def _on_success(self, model: str, estimated: int, response) -> None:
+        if self._breaker is not None:
+            self._breaker.record_success()
+        if self._limiter is not None:
+            self._limiter.settle(model, estimated, response)
+
+    # Seconds until the retry, or None when the call is not retried. A stream that has sent chunks never is
+    def _on_failure(self, attempt: int, exc: BaseException, *, started: bool = False) -> float | None:
+        if self._breaker is not None:
+            self._breaker.record_failure(exc)
+        delay = None if started else self._retry.delay(attempt, exc)
+        if delay is not None:
+            LLM_RETRIES.inc(provider=self.name, reason=type(exc).__name__)
+            logger.info("LLM provider %s failed (%s); retrying in %.2fs", self.name, type(exc).__name__, delay)
+        return delay
+
+    def _on_abandoned(self) -> None:
+        if self._breaker is not None:
+            self._breaker.record_abandoned()
+
+    # A stream closed early - by the caller, or by a word limit - still used tokens. Settle with the usage
+    # if it arrived, else with the text streamed so far (about 4 characters a token)
+    def _on_stream_abandoned(self, model: str, estimated: int, request: dict, response, streamed_chars: int) -> None:
+        self._on_abandoned()
+        if self._limiter is None:
+            return
+        if usage_tokens(response):
+            self._limiter.settle(model, estimated, response)
+        else:
+            self._limiter.settle_partial(model, request, streamed_chars // 4)
+
+    def call(self, request: dict, send: Callable[[dict], T]) -> T:
+        attempt = 0
+        while True:
+            model, estimated, wait = self._before_attempt(request)
+            if wait:
+                time.sleep(wait)
+            if self._limiter is not None:
+                self._limiter.acquire(model)
+            try:
+                response = send(request)
+            except Exception as exc:
+                delay = self._on_failure(attempt, exc)
+                if delay is None:
+                    raise
+            except BaseException:
+                self._on_abandoned()
+                raise
+            else:
+                self._on_success(model, estimated, response)
+                return response
+            finally:
+                if self._limiter is not None:
+                    self._limiter.release(model)
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, request: dict, send: Callable[[dict], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            model, estimated, wait = self._before_attempt(request)
+            if wait:
+                await asyncio.sleep(wait)
+            if self._limiter is not None:
+                await self._limiter.aacquire(model)
+            try:
+                response = await send(request)
+            except Exception as exc:
+                delay = self._on_failure(attempt, exc)
+                if delay is None:
+                    raise
+            except BaseException:
+                self._on_abandoned()
+                raise
+            else:
+                self._on_success(model, estimated, response)
+                return response
+            finally:
+                if self._limiter is not None:
+                    self._limiter.release(model)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stream(self, request: dict, send: Callable[[dict], Iterator]) -> Iterator:
+        attempt = 0
+        while True:
+            model, estimated, wait = self._before_attempt(request)
+            if wait:
+                time.sleep(wait)
+            if self._limiter is not None:
+                self._limiter.acquire(model)
+            started = False
+            response = None
+            streamed_chars = 0
+            try:
+                for chunk in send(request):
+                    started = True
+                    response = getattr(chunk, "response", None) or response
+                    streamed_chars += len(getattr(chunk, "delta", None) or "")
+                    yield chunk
+            except Exception as exc:
+                delay = self._on_failure(attempt, exc, started=started)
+                if delay is None:
+                    raise
+            except BaseException:
+                self._on_stream_abandoned(model, estimated, request, response, streamed_chars)
+                raise
+            else:
+                self._on_success(model, estimated, response)
+                return
+            finally:
+                if self._limiter is not None:
+                    self._limiter.release(model)
+            time.sleep(delay)
+            attempt += 1
+
+    async def astream(self, request: dict, send: Callable[[dict], AsyncIterator]) -> AsyncIterator:
+        attempt = 0
+        while True:
+            model, estimated, wait = self._before_attempt(request)
+            if wait:
+                await asyncio.sleep(wait)
+            if self._limiter is not None:
+                await self._limiter.aacquire(model)
+            started = False
+            response = None
+            streamed_chars = 0
+            try:
+                async for chunk in send(request):
+                    started = True
+                    response = getattr(chunk, "response", None) or response
+                    streamed_chars += len(getattr(chunk, "delta", None) or "")
+                    yield chunk
+            except Exception as exc:
+                delay = self._on_failure(attempt, exc, started=started)
+                if delay is None:
+                    raise
+            except BaseException:
+                self._on_stream_abandoned(model, estimated, request, response, streamed_chars)
+                raise
+            else:
+                self._on_success(model, estimated, response)
+                return
+            finally:
+                if self._limiter is not None:
+                    self._limiter.release(model)
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,121 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from careerbot.observability.metrics import ROUTE_DECISIONS
+from careerbot.tools.patterns import EMAIL_RE, ROLE_TITLE_RE
+import logging
+import re
+
+# Picks a model tier, reasoning effort and output-token cap per turn with cheap local rules,
+# so FAQ-style questions take a faster path and multi-role hiring messages a stronger one
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+DEFAULT = "default"
+STRONG = "strong"
+
+# What one tier sends to the API
+@dataclass(frozen=True)
+class ModelTier:
+    model: str
+    reasoning_effort: str = "low"
+    max_output_tokens: int = 300
+
+# The tier chosen for a turn, and why
+@dataclass(frozen=True)
+class RouteDecision:
+    tier: str
+    model: str
+    reasoning_effort: str
+    max_output_tokens: int
+    reason: str
+
+    @classmethod
+    def for_tier(cls, tier: str, spec: ModelTier, reason: str) -> RouteDecision:
+        return cls(
+            tier=tier,
+            model=spec.model,
+            reasoning_effort=spec.reasoning_effort,
+            max_output_tokens=spec.max_output_tokens,
+            reason=reason
+        )
+
+_WORD_RE = re.compile(r"\S+")
+
+# Statements of hiring intent, as opposed to questions about the candidate's own roles
+_HIRING_RE = re.compile(
+    r"\b(?:we(?:'re| are)|i(?:'m| am)|currently|are you|is (?:he|she|they))\s+(?:hiring|recruiting|looking for)\b"
+    r"|\bhiring for\b|\b(?:open|vacant) (?:roles?|positions?)\b|\bjob (?:spec|description)\b",
+    re.IGNORECASE
+)
+
+# Several roles named at once - "two roles", "a few open positions"
+_MULTI_ROLE_RE = re.compile(
+    r"\b(?:two|three|four|five|several|multiple|a few|few|some|[2-9])\s+(?:open\s+)?(?:roles|positions|openings|vacancies|jobs)\b",
+    re.IGNORECASE
+)
+
+# Short factual questions the profile answers directly, and small talk
+_FAQ_RE = re.compile(
+    r"\b(?:where|location|located|based|remote|hybrid|relocat\w*|education|degree|universit\w*|stud(?:y|ied)"
+    r"|skills?|stack|languages?|certif\w*|current(?:ly)?|who is|what does|hi|hello|hey|thanks|thank you)\b",
+    re.IGNORECASE
+)
+
+# Requests for reasoning rather than recall
+_ANALYSIS_RE = re.compile(
+    r"\b(?:compare|contrast|versus|vs\.?|trade-?offs?|why|explain|walk me through|in depth|assess|evaluate|suitab\w*|fit for)\b",
+    re.IGNORECASE
+)
+
+class ModelRouter:
+    def __init__(
+        self,
+        *,
+        tiers: dict[str, ModelTier],
+        tools: list[dict] = (),
+        fast_max_words: int = 25,
+        long_message_words: int = 150
+    ) -> None:
+        missing = {FAST, DEFAULT, STRONG} - set(tiers)
+        if missing:
+            raise ValueError(f"Missing model tiers: {sorted(missing)}")
+
+        self._tiers = dict(tiers)
+        # Hiring and contact rules only apply when the tools that act on them are offered
+        tool_names = {tool.get("name") for tool in tools}
+        self._hiring_tool = "record_role_interest" in tool_names
+        self._contact_tool = "record_user_details" in tool_names
+        self._fast_max_words = fast_max_words
+        self._long_message_words = long_message_words
+
+    def _decide(self, tier: str, reason: str) -> RouteDecision:
+        decision = RouteDecision.for_tier(tier, self._tiers[tier], reason)
+        ROUTE_DECISIONS.inc(tier=tier, reason=reason)
+        logger.info("Routed turn to %s tier (%s): model=%s effort=%s max_output_tokens=%d",
+                    tier, reason, decision.model, decision.reasoning_effort, decision.max_output_tokens)
+        return decision
+
+    # Route one turn on the new message; the history only marks it as a follow-up
+    def route(self, message: str, history: list[dict] = ()) -> RouteDecision:
+        words = len(_WORD_RE.findall(message))
+
+        if self._hiring_tool and _HIRING_RE.search(message):
+            titles = {m.group(0).lower().rstrip("s") for m in ROLE_TITLE_RE.finditer(message)}
+            if len(titles) >= 2 or _MULTI_ROLE_RE.search(message):
+                return self._decide(STRONG, "multi_role_hiring")
+            if words >= self._long_message_words:
+                return self._decide(STRONG, "detailed_hiring")
+            return self._decide(DEFAULT, "hiring")
+
+        if self._contact_tool and EMAIL_RE.search(message):
+            return self._decide(DEFAULT, "contact_details")
+
+        if _ANALYSIS_RE.search(message):
+            return self._decide(DEFAULT, "analysis")
+
+        # Very short follow-ups ("and before that?") lean on the history, so they stay on the default tier
+        if words <= self._fast_max_words and _FAQ_RE.search(message) and (not history or words >= 4):
+            return self._decide(FAST, "faq")
+
+        return self._decide(DEFAULT, "general")
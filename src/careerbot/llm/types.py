@@ -0,0 +1,62 @@
+# Provider-neutral response shapes. The orchestrator reads OpenAI Responses-style objects
+# (response.output items with .type, function calls with .call_id/.name/.arguments, usage with
+# input_tokens_details.cached_tokens), so other providers are normalised into the same shape
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any
+
+# A piece of a streamed response - either a text delta or the finished response
+@dataclass(frozen=True)
+class StreamChunk:
+    delta: str = ""
+    response: Any = None
+
+# A dict that also reads as attributes. Output items are both inspected by the orchestrator
+# (item.type) and sent back as input on the next call, where a plain dict serialises as-is
+class OutputItem(dict):
+    def __getattr__(self, name: str):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+def message_item(text: str) -> OutputItem:
+    return OutputItem(type="message", role="assistant", content=[{"type": "output_text", "text": text}])
+
+def function_call_item(*, call_id: str, name: str, arguments: str) -> OutputItem:
+    return OutputItem(type="function_call", call_id=call_id, name=name, arguments=arguments)
+
+@dataclass(frozen=True)
+class InputTokensDetails:
+    cached_tokens: int = 0
+
+@dataclass(frozen=True)
+class Usage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    input_tokens_details: InputTokensDetails = field(default_factory=InputTokensDetails)
+
+@dataclass(frozen=True)
+class NormalizedResponse:
+    id: str
+    model: str
+    status: str
+    output: list[OutputItem]
+    usage: Usage | None = None
+    # Which backend produced it, e.g. "anthropic"
+    provider: str = ""
+
+    @property
+    def output_text(self) -> str:
+        return "".join(
+            block.get("text", "")
+            for item in self.output if item.get("type") == "message"
+            for block in item.get("content", [])
+        )
+
+# Read a field from an input item that may be a dict or an SDK object
+def item_field(item, name: str, default=None):
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
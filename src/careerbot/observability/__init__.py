@@ -0,0 +1 @@
+# Marks as an importable package
\ No newline at end of file
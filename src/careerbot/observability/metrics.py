@@ -0,0 +1,188 @@
+# In-process metrics with Prometheus text exposition - no client library needed
+
+from __future__ import annotations
+
+import math
+import time
+import threading
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = _DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: bucket counts, sum, count
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {bucket_count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = _DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    # Prometheus text exposition format (version 0.0.4)
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry served on /metrics
+REGISTRY = MetricsRegistry()
+
+TURNS = REGISTRY.counter("careerbot_turns_total", "Chat turns handled", ("path", "outcome"))
+TURN_DURATION = REGISTRY.histogram("careerbot_turn_duration_seconds", "End-to-end duration of a chat turn", ("path",))
+TURN_ITERATIONS = REGISTRY.histogram("careerbot_turn_llm_calls", "LLM calls made in one chat turn", (), buckets=(1, 2, 3, 4, 6, 8, 11))
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram("careerbot_time_to_first_token_seconds", "Time from turn start to the first streamed text", ("path",))
+REPLY_WORD_LIMIT = REGISTRY.counter("careerbot_reply_word_limit_total", "Replies held to the word limit: streams cancelled early or text cut", ("action",))
+PROMPT_BUILD_DURATION = REGISTRY.histogram("careerbot_prompt_build_duration_seconds", "Time spent building the model input", (), buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+
+ROUTE_DECISIONS = REGISTRY.counter("careerbot_route_decisions_total", "Model tier chosen per turn", ("tier", "reason"))
+ROUTED_TURN_DURATION = REGISTRY.histogram("careerbot_routed_turn_duration_seconds", "End-to-end duration of a chat turn by model tier", ("tier",))
+
+LLM_REQUESTS = REGISTRY.counter("careerbot_llm_requests_total", "Calls to the LLM API", ("model", "mode", "outcome"))
+LLM_DURATION = REGISTRY.histogram("careerbot_llm_request_duration_seconds", "Duration of LLM API calls", ("model", "mode"))
+LLM_TOKENS = REGISTRY.counter("careerbot_llm_tokens_total", "Tokens reported in LLM usage", ("model", "kind"))
+LLM_FAILOVERS = REGISTRY.counter("careerbot_llm_failovers_total", "Calls moved to the next LLM provider", ("source", "target", "reason"))
+LLM_HEDGES = REGISTRY.counter("careerbot_llm_hedges_total", "Hedged LLM requests: backups fired and which call won", ("outcome",))
+LLM_RETRIES = REGISTRY.counter("careerbot_llm_retries_total", "LLM calls retried after a transient failure", ("provider", "reason"))
+LLM_RATE_LIMIT_WAIT = REGISTRY.histogram("careerbot_llm_rate_limit_wait_seconds", "Time LLM calls waited for the local RPM/TPM limits", ("model",))
+LLM_CIRCUIT_TRANSITIONS = REGISTRY.counter("careerbot_llm_circuit_transitions_total", "LLM provider circuit breaker state changes", ("provider", "state"))
+
+PREFILTER_DECISIONS = REGISTRY.counter("careerbot_prefilter_decisions_total", "Messages screened before the model, by label and what decided it", ("label", "source"))
+
+TOOL_SELECTIONS = REGISTRY.counter("careerbot_tool_selections_total", "Tool sets offered per turn", ("reason",))
+TOOL_CALLS = REGISTRY.counter("careerbot_tool_calls_total", "Tool executions", ("tool", "outcome"))
+TOOL_DURATION = REGISTRY.histogram("careerbot_tool_duration_seconds", "Tool execution time", ("tool",))
+
+# Token counts from a response's usage, tolerating responses without usage
+def usage_tokens(response) -> dict[str, int]:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+
+    details = getattr(usage, "input_tokens_details", None)
+    return {
+        "input": getattr(usage, "input_tokens", 0) or 0,
+        "output": getattr(usage, "output_tokens", 0) or 0,
+        "cached": getattr(details, "cached_tokens", 0) or 0,
+    }
+
+# Record the token usage of one LLM response
+def record_llm_usage(model: str, response) -> dict[str, int]:
+    tokens = usage_tokens(response)
+    for kind, count in tokens.items():
+        if count:
+            LLM_TOKENS.inc(count, model=model, kind=kind)
+    return tokens
+
+# Record the outcome, duration and token usage of one LLM call
+def record_llm_call(*, model: str, mode: str, start: float, response=None, outcome: str | None = None) -> None:
+    if outcome is None:
+        outcome = getattr(response, "status", None) or "completed"
+
+    LLM_REQUESTS.inc(model=model, mode=mode, outcome=outcome)
+    LLM_DURATION.observe(time.perf_counter() - start, model=model, mode=mode)
+    if response is not None:
+        record_llm_usage(model, response)
@@ -0,0 +1,98 @@
+# Per-turn traces: timed spans for prompt building, each LLM call and each tool, with an optional JSONL sink
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+import threading
+import time
+import uuid
+
+from careerbot.tools.writer import JsonlWriter
+
+class Trace:
+
+    def __init__(self, *, path: str):
+        self.trace_id = uuid.uuid4().hex
+        self.path = path
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.attributes: dict = {}
+        self.spans: list[dict] = []
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.duration: float | None = None
+
+    # Seconds since the trace started
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def set(self, **attributes) -> None:
+        with self._lock:
+            self.attributes.update(attributes)
+
+    # Time a block; the yielded dict can be filled with attributes while the span is open
+    @contextmanager
+    def span(self, name: str, **attributes):
+        start = self.elapsed()
+        attrs = dict(attributes)
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            end = self.elapsed()
+            with self._lock:
+                self.spans.append({
+                    "name": name,
+                    "start_ms": round(start * 1000, 3),
+                    "duration_ms": round((end - start) * 1000, 3),
+                    **attrs,
+                })
+
+    def finish(self) -> float:
+        if self.duration is None:
+            self.duration = self.elapsed()
+        return self.duration
+
+    def to_record(self) -> dict:
+        with self._lock:
+            return {
+                "trace_id": self.trace_id,
+                "path": self.path,
+                "started_at": self.started_at,
+                "duration_ms": round((self.duration if self.duration is not None else self.elapsed()) * 1000, 3),
+                **self.attributes,
+                "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+            }
+
+# Writes finished traces as JSON lines through the background writer
+class TraceSink:
+
+    def __init__(self, path: Path, writer: JsonlWriter | None = None):
+        self._path = Path(path)
+        self._writer = writer or JsonlWriter()
+
+    def emit(self, trace: Trace) -> None:
+        self._writer.write(self._path, trace.to_record())
+
+    def close(self) -> None:
+        self._writer.close()
+
+# Process-wide trace sink; None means traces are only used for metrics
+_sink: TraceSink | None = None
+
+def configure_trace_sink(sink: TraceSink | None) -> None:
+    global _sink
+    _sink = sink
+
+def emit_trace(trace: Trace) -> None:
+    sink = _sink
+    if sink is None:
+        return
+    try:
+        sink.emit(trace)
+    except Exception:
+        # Tracing must never fail a chat turn
+        pass
@@ -0,0 +1,148 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from careerbot.chat.system_prompt import render_system_message
+from careerbot.config import DEFAULT_CANDIDATE_NAME, PROJECT_ROOT
+from careerbot.tokens import estimate_tokens
+from careerbot.tools.definitions import tools_for
+from careerbot.user_profile.loader import load_profile
+from careerbot.user_profile.prompt import PROFILE_SECTIONS, build_profile_chunks, render_profile_context
+import argparse
+import json
+import os
+import re
+
+# Token cost of everything sent ahead of the conversation on every request - the system message, each
+# tool schema and the profile context by section and entry - in the markdown and compact profile encodings
+#
+#   python -m careerbot.token_report
+#
+# Counts are local: tiktoken when it is installed and its encoding is available, otherwise the
+# estimate from careerbot.tokens. Also checks that every profile value in the markdown context is
+# still in the compact one
+
+_NEWLINES_RE = re.compile(r"\n+")
+
+# Local estimate plus a token per run of newlines, which estimate_tokens leaves out but the encodings
+# differ most in
+def _estimate(text: str) -> int:
+    return estimate_tokens(text) + len(_NEWLINES_RE.findall(text))
+
+# (name, count function) - the tiktoken encoding if it can be loaded without a network call failing
+def token_counter(encoding: str = "o200k_base", *, local_only: bool = False) -> tuple[str, Callable[[str], int]]:
+    if not local_only:
+        try:
+            import tiktoken
+            enc = tiktoken.get_encoding(encoding)
+            return f"{encoding} (tiktoken)", lambda text: len(enc.encode(text))
+        except Exception:
+            pass
+    return "local estimate", _estimate
+
+@dataclass(frozen=True)
+class TokenRow:
+    name: str
+    markdown: int
+    compact: int | None = None
+    depth: int = 0
+
+# Every non-empty string value in the profile store - the facts either encoding has to carry
+def _profile_values(value) -> set[str]:
+    if isinstance(value, str):
+        return {value.strip()} if value.strip() else set()
+    if isinstance(value, dict):
+        return set().union(*(_profile_values(v) for v in value.values())) if value else set()
+    if isinstance(value, list):
+        return set().union(*(_profile_values(v) for v in value)) if value else set()
+    return set()
+
+# Values rendered in the markdown context but missing from the compact one
+def missing_facts(data: dict, markdown: str, compact: str) -> list[str]:
+    return sorted(v for v in _profile_values(data) if v in markdown and v not in compact)
+
+def profile_rows(profile_store_path: Path, count: Callable[[str], int], *, candidate_name: str = DEFAULT_CANDIDATE_NAME) -> tuple[list[TokenRow], list[str]]:
+    profile_data = load_profile(profile_store_path)
+    readable = build_profile_chunks(profile_data)
+    compact = {c.id: c for c in build_profile_chunks(profile_data, compact=True)}
+
+    markdown_context = render_profile_context(readable, candidate_name=candidate_name) or ""
+    compact_context = render_profile_context(list(compact.values()), candidate_name=candidate_name, compact=True) or ""
+
+    rows = [
+        TokenRow("profile context", count(markdown_context), count(compact_context)),
+        TokenRow(
+            "title, rules and end marker",
+            count(render_profile_context([], candidate_name=candidate_name) or ""),
+            count(render_profile_context([], candidate_name=candidate_name, compact=True) or ""),
+            depth=1
+        ),
+    ]
+
+    # A section's cost includes its header and spacing, so it is measured as the section rendered alone
+    # minus the empty frame
+    frame = (rows[1].markdown, rows[1].compact)
+    for section in PROFILE_SECTIONS:
+        section_chunks = [c for c in readable if c.section == section]
+        if not section_chunks:
+            continue
+        compact_chunks = [compact[c.id] for c in section_chunks if c.id in compact]
+        rows.append(TokenRow(
+            section,
+            count(render_profile_context(section_chunks, candidate_name=candidate_name)) - frame[0],
+            count(render_profile_context(compact_chunks, candidate_name=candidate_name, compact=True)) - frame[1],
+            depth=1
+        ))
+        if len(section_chunks) > 1:
+            for chunk in sorted(section_chunks, key=lambda c: count(c.text), reverse=True):
+                rows.append(TokenRow(chunk.id, count(chunk.text), count(compact[chunk.id].text) if chunk.id in compact else None, depth=2))
+
+    return rows, missing_facts(profile_data.data, markdown_context, compact_context)
+
+def prefix_rows(count: Callable[[str], int], *, candidate_name: str = DEFAULT_CANDIDATE_NAME) -> list[TokenRow]:
+    tools = tools_for(candidate_name)
+    rows = [
+        TokenRow("system message", count(render_system_message(candidate_name))),
+        TokenRow("tool schemas", sum(count(json.dumps(tool, ensure_ascii=False)) for tool in tools)),
+    ]
+    rows.extend(TokenRow(tool["name"], count(json.dumps(tool, ensure_ascii=False)), depth=1) for tool in tools)
+    return rows
+
+def _print_row(row: TokenRow) -> None:
+    name = "  " * row.depth + row.name
+    if row.compact is None:
+        print(f"{name:<52} {row.markdown:>9}")
+        return
+    saved = row.markdown - row.compact
+    pct = f"{saved / row.markdown:>6.1%}" if row.markdown else ""
+    print(f"{name:<52} {row.markdown:>9} {row.compact:>9} {saved:>7} {pct}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Token cost of the system message, tool schemas and profile context")
+    parser.add_argument("--profile", type=Path, default=PROJECT_ROOT / "data" / "profile_store.json")
+    parser.add_argument("--candidate", default=os.getenv("CAREERBOT_CANDIDATE_NAME", "").strip() or DEFAULT_CANDIDATE_NAME)
+    parser.add_argument("--encoding", default="o200k_base", help="tiktoken encoding, when tiktoken is installed")
+    parser.add_argument("--local", action="store_true", help="Use the local estimate even if tiktoken is installed")
+    args = parser.parse_args()
+
+    tokenizer, count = token_counter(args.encoding, local_only=args.local)
+    prefix = prefix_rows(count, candidate_name=args.candidate)
+    profile, missing = profile_rows(args.profile, count, candidate_name=args.candidate)
+
+    print(f"Tokenizer: {tokenizer}\n")
+    print(f"{'':<52} {'markdown':>9} {'compact':>9} {'saved':>7}")
+    for row in prefix + profile:
+        _print_row(row)
+
+    fixed = sum(row.markdown for row in prefix if row.depth == 0)
+    _print_row(TokenRow("total per request", fixed + profile[0].markdown, fixed + profile[0].compact))
+
+    if missing:
+        print(f"\nCompact encoding drops {len(missing)} value(s):")
+        for value in missing:
+            print(f"  {value}")
+    else:
+        print("\nCompact encoding keeps every profile value in the markdown context")
+
+if __name__ == "__main__":
+    main()
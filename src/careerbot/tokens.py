@@ -0,0 +1,28 @@
+# Fast local token estimates - close enough to BPE counts for budgeting, with no API call or tokenizer download
+
+import math
+import re
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+# Roughly one token per 4 characters of a word, and one per punctuation mark
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+
+    count = 0
+    for piece in _WORD_RE.findall(text):
+        count += max(1, math.ceil(len(piece) / 4)) if piece[0].isalnum() or piece[0] == "_" else 1
+    return count
+
+# Estimate for a Responses API input item, counting only its text blocks
+def estimate_item_tokens(item: dict) -> int:
+    content = item.get("content", "")
+    if isinstance(content, str):
+        return estimate_tokens(content) + 4
+
+    total = 4
+    for block in content if isinstance(content, list) else []:
+        if isinstance(block, dict):
+            total += estimate_tokens(block.get("text") or "")
+    return total
@@ -0,0 +1,134 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from careerbot.config import DEFAULT_CANDIDATE_NAME
+from careerbot.tools.handlers import ToolResult
+from careerbot.tools.patterns import EMAIL_RE
+import re
+
+# Local fast path for contact and role capture. Unambiguous details - a single email address, or a role
+# given as "Title: ..." / "Company: ..." lines - are parsed without the model and recorded directly.
+# A message that is only contact details is answered with a templated acknowledgement and no model call;
+# otherwise the model gets one call with the capture already done, instead of a call that emits the tool
+# call and another that confirms it. Roles always go to the model, which is prompted to connect hiring
+# interest to the candidate's experience
+
+USER_DETAILS = "record_user_details"
+ROLE_INTEREST = "record_role_interest"
+
+# "my name is Jane Doe" / "I'm Jane" / "This is Jane Doe" - the name itself must be capitalised
+_NAME_RE = re.compile(r"\b(?i:my name is|i am|i'm|this is)\s+([A-Z][a-z'-]+(?:\s+[A-Z][a-z'-]+){0,2})\b")
+
+# "Key: value" lines of a structured role, by the schema field they fill
+_ROLE_FIELDS = {
+    "title": ("title", "job title", "role", "position"),
+    "company": ("company", "employer", "organisation", "organization", "client"),
+    "location": ("location", "based in", "office"),
+    "level": ("level", "seniority", "grade"),
+    "salary": ("salary", "compensation", "pay", "package", "rate", "day rate"),
+    "responsibilities": ("responsibilities", "duties", "description", "about the role"),
+}
+_FIELD_BY_KEY = {key: field for field, keys in _ROLE_FIELDS.items() for key in keys}
+_FIELD_LINE_RE = re.compile(r"^\s*[-*•]?\s*([A-Za-z ]{2,20}?)\s*:\s*(.+?)\s*$")
+
+# "... role at Acme" / "at Acme Data Ltd" in the free text around the field lines, for a role with no company line
+_AT_COMPANY_RE = re.compile(r"\bat\s+([A-Z][\w&.'-]*(?:\s+[A-Z][\w&.'-]*){0,3})")
+
+# Words that carry nothing beyond the contact details - "you can reach me at", "thanks", "hi" and the like.
+# A message made only of these and an email address needs no model to answer it
+_FILLER = frozenset("""
+    a an and the or to at on in via by of for is it its it's my me i i'm im this here there you your can could
+    please pls kindly feel free get touch reach contact contacted email e-mail mail address drop line send sent
+    note pass forward share best regards thanks thank cheers hi hello hey name would like be happy
+    we we're are our details below
+""".split())
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z'’-]*")
+
+# What the local parsers found in one message
+@dataclass(frozen=True)
+class CapturePlan:
+    calls: tuple[tuple[str, dict], ...]
+    # Nothing in the message but contact details, so a template can answer it
+    capture_only: bool
+
+    @property
+    def tool_names(self) -> tuple[str, ...]:
+        return tuple(name for name, _ in self.calls)
+
+def _only_filler(text: str) -> bool:
+    return all(word.lower().replace("’", "'") in _FILLER for word in _WORD_RE.findall(text))
+
+# A role as field lines; None unless there is exactly one title and at least one other field,
+# so a message describing several roles is left to the model
+def _parse_role(message: str) -> tuple[dict, list[str]] | None:
+    fields: dict[str, str] = {}
+    titles = 0
+    other_lines = []
+    for line in message.splitlines():
+        match = _FIELD_LINE_RE.match(line)
+        field = _FIELD_BY_KEY.get(match.group(1).strip().lower()) if match else None
+        if field is None:
+            other_lines.append(line)
+            continue
+        if field == "title":
+            titles += 1
+        fields.setdefault(field, match.group(2))
+
+    if "company" not in fields:
+        company = _AT_COMPANY_RE.search(" ".join(other_lines))
+        if company:
+            fields["company"] = company.group(1).rstrip(".")
+    if titles != 1 or len(fields) < 2:
+        return None
+    return fields, other_lines
+
+class LocalCapture:
+
+    def __init__(self, *, tools: list[dict], candidate_name: str = DEFAULT_CANDIDATE_NAME) -> None:
+        # Only tools the bot offers are captured locally
+        self._tool_names = {tool.get("name") for tool in tools}
+        self._candidate_name = candidate_name
+
+    def plan(self, message: str) -> CapturePlan | None:
+        calls: list[tuple[str, dict]] = []
+        rest = message
+
+        if USER_DETAILS in self._tool_names:
+            emails = {e.lower(): e for e in EMAIL_RE.findall(message)}
+            # Two different addresses could be anyone's; the model sorts those out
+            if len(emails) == 1:
+                email = next(iter(emails.values()))
+                args = {"email": email}
+                name = _NAME_RE.search(message)
+                if name:
+                    args["name"] = name.group(1)
+                    rest = rest.replace(name.group(1), " ")
+                calls.append((USER_DETAILS, args))
+                rest = EMAIL_RE.sub(" ", rest)
+
+        if ROLE_INTEREST in self._tool_names:
+            role = _parse_role(rest)
+            if role is not None:
+                fields, other_lines = role
+                calls.append((ROLE_INTEREST, fields))
+                rest = "\n".join(other_lines)
+
+        if not calls:
+            return None
+        capture_only = [name for name, _ in calls] == [USER_DETAILS] and _only_filler(rest)
+        return CapturePlan(calls=tuple(calls), capture_only=capture_only)
+
+    # The reply for a contact-only message
+    def acknowledge(self, plan: CapturePlan, results: list[ToolResult]) -> str:
+        (_, args), result = plan.calls[0], results[0]
+        if result.duplicate:
+            return f"Thanks - {args['email']} is already noted for {self._candidate_name}."
+        return f"Thanks - I've noted {args['email']} so {self._candidate_name} can get in touch."
+
+    # Context for the model when the message has more to answer - the details are recorded, so it should
+    # not record them again
+    def note(self, plan: CapturePlan) -> str:
+        done = "; ".join(
+            f"{name}(" + ", ".join(f"{key}={value!r}" for key, value in args.items()) + ")"
+            for name, args in plan.calls
+        )
+        return f"[Already recorded for this message - do not record these again: {done}]"
@@ -1,8 +1,11 @@
 # Defines tools and their JSON schemas for the LLM
+
+from careerbot.config import DEFAULT_CANDIDATE_NAME
+
 record_user_details_tool = {
     "type": "function",
     "name": "record_user_details",
-    "description": "Record contact details when the user provides an email address or clearly invites Ali to follow up. Use only information the user explicitly provided (do not guess missing fields).",
+    "description": "Record contact details when the user provides an email address or clearly invites {candidate} to follow up. Use only information the user explicitly provided (do not guess missing fields).",
     "parameters": {
         "type": "object",
         "properties": {
@@ -31,7 +34,7 @@ record_user_details_tool = {
 record_unknown_question_tool = {
     "type": "function",
     "name": "record_unknown_question",    
-    "description":  "Record a question about Ali that you cannot answer from the provided profile context and conversation. Use this only after asking at most one brief clarifying question if it would help.",
+    "description":  "Record a question about {candidate} that you cannot answer from the provided profile context and conversation. Use this only after asking at most one brief clarifying question if it would help.",
     "parameters": {
         "type": "object",
         "properties": {
@@ -86,4 +89,13 @@ record_role_interest_tool = {
     },
 }
 
-TOOLS = [record_role_interest_tool, record_unknown_question_tool, record_user_details_tool]
+_TOOL_TEMPLATES = [record_role_interest_tool, record_unknown_question_tool, record_user_details_tool]
+
+# Tool schemas with the candidate's name filled into the descriptions
+def tools_for(candidate_name: str = DEFAULT_CANDIDATE_NAME) -> list[dict]:
+    return [
+        {**tool, "description": tool["description"].replace("{candidate}", candidate_name)}
+        for tool in _TOOL_TEMPLATES
+    ]
+
+TOOLS = tools_for()
@@ -5,25 +5,210 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
+from careerbot.observability.metrics import TOOL_CALLS, TOOL_DURATION
+from careerbot.tools.leads import get_lead_store, keep_jsonl, normalise_email, normalise_text
+from careerbot.tools.writer import get_writer
+import logging
+import threading
+import time
+
 # Executes tool calls based on LLM requests
 
+logger = logging.getLogger(__name__)
+
 @dataclass(frozen=True)
 class ToolResult:
     tool_name: str
     ok: bool
     content: str
     error: str | None = None
+    # A repeat of a record already saved, answered without writing
+    duplicate: bool = False
 
-# Append a JSON object into a JSONL file
+# Append a JSON object into a JSONL file - queued to the background writer when one is configured
 def _append_jsonl(path: Path, record: dict) -> None:
+    writer = get_writer()
+    if writer is not None:
+        writer.write(path, record)
+        return
+
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("a", encoding="utf-8") as f:
         f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
+# Persist a captured record - to the JSONL log, and to the lead store when one is configured.
+# The source is the results directory name, which is the profile id in multi-profile mode
+def _save_record(out_dir: Path, table: str, record: dict, *, claim: _Claim | None = None) -> None:
+    jsonl = keep_jsonl()
+    if jsonl:
+        _append_jsonl(out_dir / f"{table}.jsonl", record)
+
+    store = get_lead_store()
+    if store is not None:
+        # With the JSONL log kept the record is already safe there; otherwise the log takes it as a fallback
+        on_error = None if jsonl else lambda: _store_failed(out_dir, table, record, claim)
+        store.add(table, record, source=out_dir.name, on_error=on_error)
+
+# The lead store could not write a record that has no other copy. It goes to the JSONL log instead, for a
+# later import; if that fails too, its duplicate claim is released so a retry is written again
+def _store_failed(out_dir: Path, table: str, record: dict, claim: _Claim | None) -> None:
+    path = out_dir / f"{table}.jsonl"
+    try:
+        _append_jsonl(path, record)
+        logger.warning("Lead store failed; saved the %s record to %s instead", table, path)
+    except Exception:
+        logger.exception("Lost a %s record: the lead store and %s both failed", table, path)
+        if claim is not None:
+            _index.release(claim)
+
+# Identity of a record - a contact is its email, a role its title and company
+def _record_key(table: str, record: dict) -> tuple | None:
+    if table == "user_details":
+        return (normalise_email(record.get("email")),)
+    if table == "role_interest":
+        return (normalise_text(record.get("title")), normalise_text(record.get("company")))
+    return None
+
+# Structured fields a repeat call can add to a record. Free text - notes, responsibilities - is left out, since
+# the model rewords it on every call and a reworded repeat would be written again
+_DETAIL_FIELDS = {"user_details": ("name", "company"), "role_interest": ("level", "salary", "location")}
+
+def _details(table: str, record: dict) -> dict:
+    return {
+        field: normalise_text(record.get(field))
+        for field in _DETAIL_FIELDS.get(table, ())
+        if record.get(field)
+    }
+
+# Recorded details by key, folded over records oldest first
+def _fold(table: str, records: list[dict]) -> dict[tuple, dict]:
+    seen: dict[tuple, dict] = {}
+    for record in records:
+        key = _record_key(table, record)
+        if key is not None and key[0]:
+            seen.setdefault(key, {}).update(_details(table, record))
+    return seen
+
+# What a claim changed in the index, so a failed write can put it back. previous is None for a new key
+@dataclass(frozen=True)
+class _Claim:
+    out_dir: str
+    table: str
+    key: tuple
+    previous: dict | None
+
+# Contacts and roles already recorded per results directory, so a model that calls the same tool again for the
+# same person or role gets the earlier result back instead of writing another line. With a lead store each key
+# is looked up once, on its indexed key columns, the first time it is claimed; without one the directory's JSONL
+# file is read on first use. After that a repeat is answered from memory. A repeat that adds details not yet
+# recorded (a company given after the email, say) is still written.
+# Lookups run under a lock per directory and table, so one directory's I/O does not hold up the others
+class _RecordIndex:
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._table_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._seen: dict[tuple[str, str], dict[tuple, dict]] = {}
+
+    def _table_lock(self, index: tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._table_locks.setdefault(index, threading.Lock())
+
+    # The table's recorded details, with the key looked up; called under the table lock. Records this process
+    # queued but the store has not committed yet were claimed here before they were queued, so the store needs
+    # no flush first
+    def _lookup(self, out_dir: Path, table: str, key: tuple) -> dict[tuple, dict]:
+        index = (str(out_dir), table)
+        store = get_lead_store()
+        seen = self._seen.get(index)
+        if seen is None:
+            seen = self._seen[index] = {} if store is not None else _fold(table, _read_jsonl(out_dir / f"{table}.jsonl"))
+        if key not in seen and store is not None and key[0]:
+            seen.update(_fold(table, store.records_for_key(table, source=out_dir.name, key=key)))
+        return seen
+
+    # Claim the record for writing. None means everything in it is already recorded. The claim is made under
+    # the table lock, so two identical calls in one turn write once
+    def claim(self, out_dir: Path, table: str, record: dict) -> _Claim | None:
+        key = _record_key(table, record)
+        details = _details(table, record)
+        index = (str(out_dir), table)
+        with self._table_lock(index):
+            seen = self._lookup(out_dir, table, key)
+            recorded = seen.get(key)
+            if recorded is not None and details.items() <= recorded.items():
+                return None
+            claim = _Claim(out_dir=str(out_dir), table=table, key=key, previous=dict(recorded) if recorded is not None else None)
+            seen.setdefault(key, {}).update(details)
+            return claim
+
+    # Undo a claim whose write failed, so a retry is not mistaken for a duplicate. The index is put back as it
+    # was rather than looked up again, since records still queued in the background writers are not stored yet
+    def release(self, claim: _Claim) -> None:
+        index = (claim.out_dir, claim.table)
+        with self._table_lock(index):
+            seen = self._seen.get(index)
+            if seen is None:
+                return
+            if claim.previous is None:
+                seen.pop(claim.key, None)
+            else:
+                seen[claim.key] = claim.previous
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seen.clear()
+
+_index = _RecordIndex()
+_dedupe = True
+
+# Turn duplicate detection on or off; also drops what has been seen so far
+def configure_dedupe(enabled: bool) -> None:
+    global _dedupe
+    _dedupe = enabled
+    _index.clear()
+
+def _read_jsonl(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    records = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+# Save the record unless it is a repeat. Returns False for a repeat, which was not written
+def _save_new_record(out_dir: Path, table: str, record: dict) -> bool:
+    if not _dedupe:
+        _save_record(out_dir, table, record)
+        return True
+
+    claim = _index.claim(out_dir, table, record)
+    if claim is None:
+        return False
+    try:
+        _save_record(out_dir, table, record, claim=claim)
+    except Exception:
+        _index.release(claim)
+        raise
+    return True
+
 # Get current time
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
+# Answer for a repeat - the record is already saved, so the model is told so rather than sent an error
+def _duplicate_result(tool_name: str, fields: dict) -> ToolResult:
+    return ToolResult(
+        tool_name=tool_name,
+        ok=True,
+        content=json.dumps({"saved": True, **fields, "already_recorded": True}, ensure_ascii=False),
+        duplicate=True
+    )
+
 # Handle record_user_details_tool
 def handle_record_user_details(args: dict, *, out_dir: Path) -> ToolResult:
 
@@ -45,7 +230,8 @@ def handle_record_user_details(args: dict, *, out_dir: Path) -> ToolResult:
         "notes": (args.get("notes") or "").strip() or None
     }
 
-    _append_jsonl(out_dir / "user_details.jsonl", record)
+    if not _save_new_record(out_dir, "user_details", record):
+        return _duplicate_result("record_user_details", {"email": email})
 
     return ToolResult(
         tool_name="record_user_details",
@@ -71,7 +257,7 @@ def handle_record_unknown_question(args: dict, *, out_dir: Path) -> ToolResult:
         "question": question
     }
 
-    _append_jsonl(out_dir / "unknown_question.jsonl", record)
+    _save_record(out_dir, "unknown_question", record)
 
     return ToolResult(
         tool_name="record_unknown_question",
@@ -104,7 +290,8 @@ def handle_record_role_interest(args: dict, *, out_dir: Path) -> ToolResult:
         "notes": (args.get("notes") or "").strip() or None
     }
 
-    _append_jsonl(out_dir / "role_interest.jsonl", record)
+    if not _save_new_record(out_dir, "role_interest", record):
+        return _duplicate_result("record_role_interest", {"title": title})
 
     return ToolResult(
         tool_name="record_role_interest",
@@ -112,16 +299,28 @@ def handle_record_role_interest(args: dict, *, out_dir: Path) -> ToolResult:
         content=json.dumps({"saved": True, "title": title}, ensure_ascii=False)
     )
 
-# Execute the tool
+_HANDLERS = {
+    "record_user_details": handle_record_user_details,
+    "record_unknown_question": handle_record_unknown_question,
+    "record_role_interest": handle_record_role_interest
+}
+
+# Execute the tool, recording its outcome and duration
 def execute_tool(tool_name: str, args: dict, *, out_dir: Path) -> ToolResult:
-    
-    handlers = {
-        "record_user_details": handle_record_user_details,
-        "record_unknown_question": handle_record_unknown_question,
-        "record_role_interest": handle_record_role_interest
-    }
 
-    handler = handlers.get(tool_name)
+    start = time.perf_counter()
+    result = _execute_tool(tool_name, args, out_dir=out_dir)
+
+    # Unknown names come from the model, so they share one label rather than growing the series
+    label = tool_name if tool_name in _HANDLERS else "unknown"
+    outcome = "duplicate" if result.duplicate else "ok" if result.ok else "error"
+    TOOL_CALLS.inc(tool=label, outcome=outcome)
+    TOOL_DURATION.observe(time.perf_counter() - start, tool=label)
+    return result
+
+def _execute_tool(tool_name: str, args: dict, *, out_dir: Path) -> ToolResult:
+
+    handler = _HANDLERS.get(tool_name)
     if handler is None:
         return ToolResult(
             tool_name=tool_name,
@@ -0,0 +1,472 @@
+# Indexed SQLite store for what the tools capture - contact details, role interest and unknown questions.
+# The JSONL files are an append-only log; this is the queryable copy, with lookups by email, company,
+# title and time served from indexes rather than scans
+#
+#   python -m careerbot.tools.leads import toolresults
+#   python -m careerbot.tools.leads leads --company acme
+#   python -m careerbot.tools.leads questions --since 2026-01-01
+
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+import argparse
+import hashlib
+import json
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Tool -> table, and the JSONL file each tool appends to
+TABLES = {
+    "user_details": "user_details.jsonl",
+    "role_interest": "role_interest.jsonl",
+    "unknown_question": "unknown_question.jsonl",
+}
+
+_COLUMNS = {
+    "user_details": ("timestamp", "email", "name", "company", "notes"),
+    "role_interest": ("timestamp", "title", "responsibilities", "company", "level", "salary", "location", "notes"),
+    "unknown_question": ("timestamp", "question"),
+}
+
+# Normalised copies of the lookup columns, compared and indexed instead of the raw text
+_NORMALISED = {
+    "user_details": {"email_norm": "email", "company_norm": "company"},
+    "role_interest": {"title_norm": "title", "company_norm": "company"},
+    "unknown_question": {"question_norm": "question"},
+}
+
+# Normalised columns that identify a record, as the handlers' duplicate check keys it
+_KEY_COLUMNS = {
+    "user_details": ("email_norm",),
+    "role_interest": ("title_norm", "company_norm"),
+}
+
+# Each lookup column is indexed with the timestamp, so "newest leads from Acme" is an index range scan.
+# The source and key indexes serve the handlers' duplicate check, one key at a time
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_details (
+    id INTEGER PRIMARY KEY,
+    record_hash TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    email TEXT NOT NULL,
+    email_norm TEXT NOT NULL,
+    name TEXT,
+    company TEXT,
+    company_norm TEXT,
+    notes TEXT
+);
+CREATE INDEX IF NOT EXISTS user_details_email ON user_details (email_norm, timestamp);
+CREATE INDEX IF NOT EXISTS user_details_company ON user_details (company_norm, timestamp);
+CREATE INDEX IF NOT EXISTS user_details_timestamp ON user_details (timestamp);
+CREATE INDEX IF NOT EXISTS user_details_source_key ON user_details (source, email_norm);
+
+CREATE TABLE IF NOT EXISTS role_interest (
+    id INTEGER PRIMARY KEY,
+    record_hash TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    title TEXT NOT NULL,
+    title_norm TEXT NOT NULL,
+    responsibilities TEXT,
+    company TEXT,
+    company_norm TEXT,
+    level TEXT,
+    salary TEXT,
+    location TEXT,
+    notes TEXT
+);
+CREATE INDEX IF NOT EXISTS role_interest_title ON role_interest (title_norm, timestamp);
+CREATE INDEX IF NOT EXISTS role_interest_company ON role_interest (company_norm, timestamp);
+CREATE INDEX IF NOT EXISTS role_interest_timestamp ON role_interest (timestamp);
+CREATE INDEX IF NOT EXISTS role_interest_source_key ON role_interest (source, title_norm, company_norm);
+
+CREATE TABLE IF NOT EXISTS unknown_question (
+    id INTEGER PRIMARY KEY,
+    record_hash TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    question TEXT NOT NULL,
+    question_norm TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS unknown_question_norm ON unknown_question (question_norm, timestamp);
+CREATE INDEX IF NOT EXISTS unknown_question_timestamp ON unknown_question (timestamp);
+"""
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"[^\w\s@.+-]")
+
+# Lowercased with whitespace collapsed - "  ACME  Ltd" and "acme ltd" are the same company
+def normalise_text(value: str | None) -> str | None:
+    if not value:
+        return None
+    return _WHITESPACE_RE.sub(" ", value).strip().lower() or None
+
+def normalise_email(value: str | None) -> str | None:
+    return value.strip().lower() if value and value.strip() else None
+
+# Questions also drop punctuation, so "Does Ali speak French?" groups with "does ali speak french"
+def normalise_question(value: str | None) -> str | None:
+    text = normalise_text(value)
+    if not text:
+        return None
+    return _WHITESPACE_RE.sub(" ", _PUNCTUATION_RE.sub(" ", text.replace("'", ""))).strip() or None
+
+_NORMALISERS = {
+    "email": normalise_email,
+    "company": normalise_text,
+    "title": normalise_text,
+    "question": normalise_question,
+}
+
+# One record as a row; the hash makes re-imports and replays of the same record no-ops
+def _row(table: str, record: dict, source: str) -> tuple:
+    values = {column: record.get(column) for column in _COLUMNS[table]}
+    for norm_column, column in _NORMALISED[table].items():
+        values[norm_column] = _NORMALISERS[column](values[column])
+
+    canonical = json.dumps([source] + [values[c] for c in _COLUMNS[table]], ensure_ascii=False)
+    record_hash = hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+    return (record_hash, source, *(values[c] for c in _COLUMNS[table]), *(values[c] for c in _NORMALISED[table]))
+
+def _insert_sql(table: str) -> str:
+    columns = ("record_hash", "source", *_COLUMNS[table], *_NORMALISED[table])
+    return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+
+# Marks the end of the queue on shutdown
+_STOP = object()
+
+@dataclass(frozen=True)
+class QuestionCount:
+    question: str
+    count: int
+    last_asked: str
+
+class LeadStore:
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_queue: int = 10000,
+        batch_size: int = 512,
+        flush_interval: float = 0.2,
+        put_timeout: float = 5.0,
+        write_attempts: int = 3,
+        retry_delay: float = 0.1
+    ):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        conn.close()
+
+        # Writes are queued and committed in batches by one thread, like the JSONL writer
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._put_timeout = put_timeout
+        # A batch that fails (a locked database, say) is retried with doubling delays before its rows are
+        # tried one by one
+        self._write_attempts = max(1, write_attempts)
+        self._retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        # Readers get a connection per thread; WAL lets them read while the writer commits
+        self._local = threading.local()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    # Queue a tool record for the table. Blocks up to put_timeout when the queue is full, then raises queue.Full.
+    # on_error is called from the writer thread if the record cannot be stored. As in JsonlWriter.write, the
+    # closed check and the put share the lock close() takes, so no record is queued behind the stop marker
+    def add(self, table: str, record: dict, *, source: str = "", on_error: Callable[[], None] | None = None) -> None:
+        if table not in TABLES:
+            raise ValueError(f"Unknown lead table: {table}")
+
+        row = _row(table, record, source)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("LeadStore is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="careerbot-lead-store", daemon=True)
+                self._thread.start()
+            self._queue.put((table, row, on_error), timeout=self._put_timeout)
+
+    # Block until everything queued so far is committed
+    def flush(self) -> None:
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float | None = 10.0) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+
+        if thread is not None:
+            thread.join(timeout)
+
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+
+    def _run(self) -> None:
+        conn = self._connect()
+        stopping = False
+
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = any(item is _STOP for item in batch)
+            try:
+                self._write(conn, [item for item in batch if item is not _STOP])
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        conn.close()
+
+    # Commit a batch, retrying failures. If it still fails, each row is tried alone so one bad row does not
+    # take the others with it, and a row that cannot be stored goes to its on_error callback
+    def _write(self, conn: sqlite3.Connection, items: list[tuple]) -> None:
+        for attempt in range(self._write_attempts):
+            try:
+                self._insert_batch(conn, items)
+                return
+            except sqlite3.Error as e:
+                logger.warning("Failed to store %d lead record(s) (attempt %d): %s", len(items), attempt + 1, e)
+                if attempt + 1 < self._write_attempts:
+                    time.sleep(self._retry_delay * 2 ** attempt)
+
+        for item in items:
+            table, _, on_error = item
+            try:
+                self._insert_batch(conn, [item])
+            except sqlite3.Error as e:
+                logger.error("Failed to store a %s record: %s", table, e)
+                if on_error is None:
+                    continue
+                try:
+                    on_error()
+                except Exception:
+                    logger.exception("Lead store error callback failed")
+
+    # One transaction per batch and one executemany per table
+    def _insert_batch(self, conn: sqlite3.Connection, batch: list[tuple]) -> None:
+        if not batch:
+            return
+
+        by_table: dict[str, list[tuple]] = {}
+        for table, row, _ in batch:
+            by_table.setdefault(table, []).append(row)
+
+        with conn:
+            conn.execute("BEGIN")
+            for table, rows in by_table.items():
+                conn.executemany(_insert_sql(table), rows)
+
+    # Bulk-load the JSONL logs under root - <root>/*.jsonl, and <root>/<profile_id>/*.jsonl in multi-profile
+    # mode, with the directory name as the source. Records already in the store are skipped, so it can be re-run
+    def import_jsonl(self, root: Path, *, chunk_size: int = 10000) -> dict[str, int]:
+        root = Path(root)
+        counts = {table: 0 for table in TABLES}
+        conn = self._connect()
+
+        try:
+            for table, filename in TABLES.items():
+                for path in sorted(root.rglob(filename)):
+                    source = path.parent.name
+                    rows: list[tuple] = []
+                    with path.open("r", encoding="utf-8") as f:
+                        for line_no, line in enumerate(f, 1):
+                            line = line.strip()
+                            if not line:
+                                continue
+                            try:
+                                rows.append(_row(table, json.loads(line), source))
+                            except ValueError:
+                                logger.warning("Skipping unreadable line %s:%d", path, line_no)
+                                continue
+                            if len(rows) >= chunk_size:
+                                counts[table] += self._insert_rows(conn, table, rows)
+                                rows = []
+                    counts[table] += self._insert_rows(conn, table, rows)
+        finally:
+            conn.close()
+        return counts
+
+    def _insert_rows(self, conn: sqlite3.Connection, table: str, rows: list[tuple]) -> int:
+        if not rows:
+            return 0
+        with conn:
+            conn.execute("BEGIN")
+            before = conn.total_changes
+            conn.executemany(_insert_sql(table), rows)
+            return conn.total_changes - before
+
+    def _select(self, table: str, columns: str, filters: list[tuple[str, object]], *, since: str | None, until: str | None, limit: int) -> list[dict]:
+        clauses, params = [], []
+        for clause, value in filters:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {columns} FROM {table} {where} ORDER BY timestamp DESC LIMIT ?"
+        return [dict(row) for row in self._reader().execute(sql, (*params, limit))]
+
+    # Contact details, newest first. email and company match case-insensitively; since/until are ISO timestamps or dates
+    def find_leads(self, *, email: str | None = None, company: str | None = None, since: str | None = None, until: str | None = None, limit: int = 100) -> list[dict]:
+        return self._select(
+            "user_details",
+            "source, timestamp, email, name, company, notes",
+            [("email_norm = ?", normalise_email(email)), ("company_norm = ?", normalise_text(company))],
+            since=since, until=until, limit=limit
+        )
+
+    # Roles recruiters have raised, newest first
+    def find_roles(self, *, title: str | None = None, company: str | None = None, since: str | None = None, until: str | None = None, limit: int = 100) -> list[dict]:
+        return self._select(
+            "role_interest",
+            "source, timestamp, title, company, level, salary, location, responsibilities, notes",
+            [("title_norm = ?", normalise_text(title)), ("company_norm = ?", normalise_text(company))],
+            since=since, until=until, limit=limit
+        )
+
+    # Unknown questions grouped by their normalised text, most asked first
+    def unknown_questions(self, *, since: str | None = None, limit: int = 50) -> list[QuestionCount]:
+        where, params = ("WHERE timestamp >= ?", (since,)) if since else ("", ())
+        sql = (
+            "SELECT MIN(question) AS question, COUNT(*) AS count, MAX(timestamp) AS last_asked "
+            f"FROM unknown_question {where} GROUP BY question_norm ORDER BY count DESC, last_asked DESC LIMIT ?"
+        )
+        return [QuestionCount(row["question"], row["count"], row["last_asked"]) for row in self._reader().execute(sql, (*params, limit))]
+
+    # Stored records from one source with the given normalised key, in the order they were stored - used by the
+    # handlers' duplicate check. A missing company matches records without one
+    def records_for_key(self, table: str, *, source: str, key: tuple) -> list[dict]:
+        columns = _KEY_COLUMNS.get(table)
+        if columns is None:
+            raise ValueError(f"Lead table has no record key: {table}")
+        if len(key) != len(columns):
+            raise ValueError(f"Expected {len(columns)} key value(s) for {table}, got {len(key)}")
+        where = " AND ".join(f"{column} IS ?" for column in columns)
+        sql = f"SELECT {', '.join(_COLUMNS[table])} FROM {table} WHERE source = ? AND {where} ORDER BY id"
+        return [dict(row) for row in self._reader().execute(sql, (source, *key))]
+
+    def counts(self) -> dict[str, int]:
+        conn = self._reader()
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+
+# Process-wide store used by the tool handlers; None keeps only the JSONL files.
+# keep_jsonl=False makes the store the only copy
+_store: LeadStore | None = None
+_keep_jsonl = True
+
+def configure_lead_store(store: LeadStore | None, *, keep_jsonl: bool = True) -> None:
+    global _store, _keep_jsonl
+    _store = store
+    _keep_jsonl = keep_jsonl or store is None
+
+def get_lead_store() -> LeadStore | None:
+    return _store
+
+def keep_jsonl() -> bool:
+    return _keep_jsonl
+
+def _print_rows(rows: list[dict]) -> None:
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+
+def main() -> None:
+    from careerbot.config import DEFAULT_LEAD_DB_PATH, PROJECT_ROOT
+
+    parser = argparse.ArgumentParser(description="Query and import captured leads")
+    parser.add_argument("--db", type=Path, default=DEFAULT_LEAD_DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="Load existing JSONL tool results")
+    importer.add_argument("root", type=Path, nargs="?", default=PROJECT_ROOT / "toolresults")
+
+    for name in ("leads", "roles"):
+        command = commands.add_parser(name, help=f"List {name}, newest first")
+        if name == "leads":
+            command.add_argument("--email")
+        else:
+            command.add_argument("--title")
+        command.add_argument("--company")
+        command.add_argument("--since")
+        command.add_argument("--until")
+        command.add_argument("--limit", type=int, default=100)
+
+    questions = commands.add_parser("questions", help="Unknown questions, most asked first")
+    questions.add_argument("--since")
+    questions.add_argument("--limit", type=int, default=50)
+
+    commands.add_parser("stats", help="Row counts")
+    args = parser.parse_args()
+
+    store = LeadStore(args.db)
+    try:
+        if args.command == "import":
+            counts = store.import_jsonl(args.root)
+            print(f"Imported {sum(counts.values())} new record(s) into {args.db}: {counts}")
+        elif args.command == "leads":
+            _print_rows(store.find_leads(email=args.email, company=args.company, since=args.since, until=args.until, limit=args.limit))
+        elif args.command == "roles":
+            _print_rows(store.find_roles(title=args.title, company=args.company, since=args.since, until=args.until, limit=args.limit))
+        elif args.command == "questions":
+            for q in store.unknown_questions(since=args.since, limit=args.limit):
+                print(f"{q.count:>6}  {q.last_asked}  {q.question}")
+        else:
+            print(json.dumps(store.counts()))
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
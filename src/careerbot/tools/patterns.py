@@ -0,0 +1,16 @@
+from __future__ import annotations
+import re
+
+# Text patterns shared by the router, the tool selector and local capture, so each rule reads a message
+# the same way
+
+# An email address; the domain ends on a label, so a full stop after the address is not part of it
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+# Job titles, e.g. "senior data engineer", "ML engineer", "product manager"
+ROLE_TITLE_RE = re.compile(
+    r"\b(?:(?:senior|junior|lead|staff|principal|head of|graduate)\s+)?"
+    r"(?:[a-z/+-]+\s+)?"
+    r"(?:engineer|scientist|analyst|developer|architect|manager|consultant|specialist|designer|director)s?\b",
+    re.IGNORECASE
+)
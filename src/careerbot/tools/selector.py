@@ -0,0 +1,118 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from careerbot.observability.metrics import TOOL_SELECTIONS
+from careerbot.tools.patterns import EMAIL_RE, ROLE_TITLE_RE
+import re
+
+# Picks the tool schemas offered on a turn with cheap local signals, so a plain question about the
+# candidate is not sent the hiring and contact schemas. Anything the rules are unsure of gets the full set.
+# Selected tools keep their order in the full list, so each subset is a stable prompt prefix of its own
+
+USER_DETAILS = "record_user_details"
+ROLE_INTEREST = "record_role_interest"
+UNKNOWN_QUESTION = "record_unknown_question"
+
+_PHONE_RE = re.compile(r"\+?\d[\d\s().-]{8,}\d")
+
+# Offers or requests to be contacted, without the details themselves yet
+_CONTACT_RE = re.compile(
+    r"\b(?:e-?mail|contact|reach (?:me|out|us)|get in touch|touch base|call me|phone|linkedin|my number|follow up)\b",
+    re.IGNORECASE
+)
+
+# Hiring talk - broader than the router's hiring rule, since a missed tool costs a lost lead. "Role" and
+# "job" alone are left out: questions about the candidate's own roles use them too
+_HIRING_RE = re.compile(
+    r"\b(?:hiring|recruit\w*|vacanc\w*|openings?|opportunit\w*|salary|interview\w*|headcount|team is looking"
+    r"|(?:open|new|vacant|available|our|my|this) (?:role|position)s?|job (?:spec|description|offer|ad)s?)\b",
+    re.IGNORECASE
+)
+
+# A job title stated on its own, e.g. "Senior Data Engineer at Acme, London" - only checked outside
+# questions, which name the candidate's past titles the same way
+_TITLE_AT_RE = re.compile(ROLE_TITLE_RE.pattern + r".{0,40}\b(?:at|for|with|in)\s+\w", re.IGNORECASE)
+
+_QUESTION_RE = re.compile(
+    r"\?|^\s*(?:what|where|when|which|who|whom|whose|why|how|is|are|was|were|does|do|did|has|have|had|can|could|"
+    r"would|will|should|tell me|describe|explain|list|summari[sz]e|give me)\b",
+    re.IGNORECASE
+)
+
+_SMALL_TALK_RE = re.compile(
+    r"^\s*(?:hi|hello|hey|hiya|thanks|thank you|cheers|great|cool|ok|okay|bye|goodbye|good (?:morning|afternoon|evening))"
+    r"[\s!.,]*(?:there|a lot|so much|very much|again)?[\s!.,]*(?:that'?s (?:all|it|great|helpful|perfect|useful)[\s!.,]*)?$",
+    re.IGNORECASE
+)
+
+# Text of a Gradio history message - a string, or a list of content blocks
+def _message_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(b.get("text") or "" for b in content if isinstance(b, dict))
+    return ""
+
+# The tools chosen for a turn, and why
+@dataclass(frozen=True)
+class ToolSelection:
+    tools: list[dict]
+    reason: str
+
+class ToolSelector:
+
+    def __init__(self, tools: list[dict], *, history_messages: int = 6) -> None:
+        self._tools = list(tools)
+        # How far back earlier user messages count as capture signals
+        self._history_messages = history_messages
+
+    @property
+    def tools(self) -> list[dict]:
+        return list(self._tools)
+
+    def _subset(self, names: set[str], reason: str) -> ToolSelection:
+        # A tool the rules want but the full list lacks is simply not offered
+        tools = [tool for tool in self._tools if tool.get("name") in names]
+        TOOL_SELECTIONS.inc(reason=reason)
+        return ToolSelection(tools=tools, reason=reason)
+
+    def _full(self, reason: str) -> ToolSelection:
+        TOOL_SELECTIONS.inc(reason=reason)
+        return ToolSelection(tools=list(self._tools), reason=reason)
+
+    # Capture signals in earlier user messages - a recruiter mid-conversation may give the company or
+    # their email several turns after saying they are hiring
+    def _capture_in_history(self, history: list[dict]) -> bool:
+        recent = [m for m in history if m.get("role") == "user"][-self._history_messages:]
+        for m in recent:
+            text = _message_text(m.get("content"))
+            if EMAIL_RE.search(text) or _HIRING_RE.search(text) or _CONTACT_RE.search(text):
+                return True
+        return False
+
+    def select(self, message: str, history: list[dict] = ()) -> ToolSelection:
+        if not self._tools:
+            return ToolSelection(tools=[], reason="no_tools")
+
+        if self._capture_in_history(history):
+            return self._full("capture_session")
+
+        names: set[str] = set()
+        if EMAIL_RE.search(message) or _PHONE_RE.search(message) or _CONTACT_RE.search(message):
+            names.add(USER_DETAILS)
+        is_question = bool(_QUESTION_RE.search(message))
+        if _HIRING_RE.search(message) or (not is_question and _TITLE_AT_RE.search(message)):
+            names.add(ROLE_INTEREST)
+        if names:
+            if is_question:
+                names.add(UNKNOWN_QUESTION)
+            return self._subset(names, "capture")
+
+        if _SMALL_TALK_RE.match(message):
+            return self._subset(set(), "small_talk")
+
+        # A question the profile may not answer is the only thing to record
+        if is_question:
+            return self._subset({UNKNOWN_QUESTION}, "question")
+
+        # A statement with no signal the rules recognise
+        return self._full("fallback")
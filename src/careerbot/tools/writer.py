@@ -0,0 +1,146 @@
+# Background JSONL writer - tool handlers enqueue records and one thread batches them to disk
+
+from __future__ import annotations
+
+from pathlib import Path
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the queue on shutdown
+_STOP = object()
+
+class JsonlWriter:
+
+    def __init__(
+        self,
+        *,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.2,
+        fsync_interval: float = 1.0,
+        put_timeout: float = 5.0
+    ):
+        # Bounded so a stalled disk pushes back on handlers instead of growing memory
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._fsync_interval = fsync_interval
+        self._put_timeout = put_timeout
+
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        # Open handle per file, only ever touched by the writer thread
+        self._files: dict[Path, object] = {}
+        self._last_fsync = time.monotonic()
+
+    # Queue a record for the file. Blocks up to put_timeout when the queue is full, then raises queue.Full.
+    # The closed check and the put share the lock close() takes, so no record is queued behind the stop marker.
+    # The writer thread starts on first use
+    def write(self, path: Path, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("JsonlWriter is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="careerbot-jsonl-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((Path(path), line), timeout=self._put_timeout)
+
+    # Block until everything queued so far is on disk
+    def flush(self) -> None:
+        if self._thread is not None:
+            self._queue.join()
+
+    # Flush, fsync and stop the writer thread
+    def close(self, timeout: float | None = 10.0) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                self._maybe_fsync(force=False)
+                continue
+
+            batch = [first]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if any(item is _STOP for item in batch):
+                stopping = True
+
+            try:
+                self._write_batch([item for item in batch if item is not _STOP])
+                self._maybe_fsync(force=stopping)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    # Group the batch by file so each file gets one write per batch
+    def _write_batch(self, batch: list[tuple[Path, str]]) -> None:
+        by_path: dict[Path, list[str]] = {}
+        for path, line in batch:
+            by_path.setdefault(path, []).append(line)
+
+        for path, lines in by_path.items():
+            try:
+                f = self._files.get(path)
+                if f is None:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    f = path.open("a", encoding="utf-8")
+                    self._files[path] = f
+                f.write("".join(lines))
+                f.flush()
+            except OSError as e:
+                logger.error("Failed to write %d record(s) to %s: %s", len(lines), path, e)
+                # Drop the handle so the next batch reopens the file
+                broken = self._files.pop(path, None)
+                if broken is not None:
+                    broken.close()
+
+    def _maybe_fsync(self, *, force: bool) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_fsync < self._fsync_interval:
+            return
+        self._last_fsync = now
+        for f in self._files.values():
+            try:
+                os.fsync(f.fileno())
+            except OSError:
+                pass
+
+# Process-wide writer used by the tool handlers; None writes synchronously
+_writer: JsonlWriter | None = None
+
+def configure_writer(writer: JsonlWriter | None) -> None:
+    global _writer
+    _writer = writer
+
+def get_writer() -> JsonlWriter | None:
+    return _writer
@@ -1 +1,101 @@
-# Builds and returns the Gradio UI
\ No newline at end of file
+# Builds and returns the Gradio UI
+
+from __future__ import annotations
+from careerbot.observability.metrics import REGISTRY
+from careerbot.user_profile.registry import ProfileRegistry, UnknownProfileError
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, RedirectResponse
+from typing import TYPE_CHECKING, Literal
+from urllib.parse import quote
+import asyncio
+import gradio as gr
+
+if TYPE_CHECKING:
+    from careerbot.chat.lazy import LazyOrchestrator
+    from careerbot.chat.orchestrator import ChatOrchestrator
+
+# Key for the orchestrator's session store - Gradio's per-browser-tab session hash, qualified by the
+# profile in multi-profile mode so one tab switching profiles starts a fresh conversation state
+def session_id_for(request: gr.Request | None, profile_id: str | None = None) -> str | None:
+    session_hash = getattr(request, "session_hash", None)
+    if not session_hash:
+        return None
+    return f"{profile_id}:{session_hash}" if profile_id else session_hash
+
+# Wrap the orchestrator in a ChatInterface that streams partial replies
+def build_chat_interface(orchestrator: ChatOrchestrator | LazyOrchestrator, *, use_async: bool = False, concurrency_limit: int | None | Literal["default"] = "default") -> gr.ChatInterface:
+
+    # Gradio only streams when fn is a generator function, which a callable instance is not
+    def respond(message: str, history: list[dict], request: gr.Request):
+        yield from orchestrator(message, history, session_id_for(request))
+
+    # Async generators run on Gradio's event loop, so concurrent chats do not each hold a worker thread
+    async def respond_async(message: str, history: list[dict], request: gr.Request):
+        async for text in orchestrator.astream_chat(message=message, history=history, session_id=session_id_for(request)):
+            yield text
+
+    return gr.ChatInterface(
+        fn=respond_async if use_async else respond,
+        concurrency_limit=concurrency_limit
+    )
+
+
+# The profile a chat is for - the routing header (set by a proxy or API client), else the page's
+# ?profile= query parameter (which /p/<profile_id> redirects to), else the default
+def resolve_profile_id(request: gr.Request | None, *, header: str, default: str = "") -> str:
+    if request is not None:
+        value = (request.headers or {}).get(header) or (request.query_params or {}).get("profile")
+        if value:
+            return value.strip()
+    return default
+
+# One ChatInterface for every profile in the registry, routed per request
+def build_multi_profile_interface(
+    registry: ProfileRegistry,
+    *,
+    header: str,
+    default_profile: str = "",
+    use_async: bool = False,
+    concurrency_limit: int | None | Literal["default"] = "default"
+) -> gr.ChatInterface:
+
+    def orchestrator_for(request: gr.Request) -> tuple[ChatOrchestrator, str | None]:
+        profile_id = resolve_profile_id(request, header=header, default=default_profile)
+        try:
+            return registry.get(profile_id), session_id_for(request, profile_id)
+        except UnknownProfileError as exc:
+            raise gr.Error(str(exc)) from exc
+
+    def respond(message: str, history: list[dict], request: gr.Request):
+        orchestrator, session_id = orchestrator_for(request)
+        yield from orchestrator(message, history, session_id)
+
+    # A first request for a profile loads it from disk, so that happens off the event loop
+    async def respond_async(message: str, history: list[dict], request: gr.Request):
+        orchestrator, session_id = await asyncio.to_thread(orchestrator_for, request)
+        async for text in orchestrator.astream_chat(message=message, history=history, session_id=session_id):
+            yield text
+
+    return gr.ChatInterface(
+        fn=respond_async if use_async else respond,
+        concurrency_limit=concurrency_limit
+    )
+
+
+# Serve the chat UI from a FastAPI app that can also expose Prometheus metrics on /metrics
+# and per-profile URLs at /p/<profile_id>
+def build_server(demo: gr.Blocks, *, metrics: bool = True, profile_paths: bool = False) -> FastAPI:
+    server = FastAPI()
+
+    # Routes are registered before the UI is mounted at "/", which would otherwise catch them
+    if metrics:
+        @server.get("/metrics", response_class=PlainTextResponse)
+        def metrics_endpoint() -> PlainTextResponse:
+            return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    if profile_paths:
+        @server.get("/p/{profile_id}")
+        def profile_page(profile_id: str) -> RedirectResponse:
+            return RedirectResponse(f"/?profile={quote(profile_id, safe='')}")
+
+    return gr.mount_gradio_app(server, demo, path="/")
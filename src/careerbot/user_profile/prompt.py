@@ -1,6 +1,45 @@
 from __future__ import annotations
+from dataclasses import dataclass
+from careerbot.config import DEFAULT_CANDIDATE_NAME
 from careerbot.user_profile.loader import ProfileData
 
+# Sections in the order they are rendered, with their titles.
+# Entry sections hold one chunk per entry and end with an extra blank line.
+_SECTIONS = [
+    ("overview", "Overview", False),
+    ("experience", "Experience", True),
+    ("projects", "Projects", True),
+    ("skills", "Skills", True),
+    ("education", "Education", True),
+    ("certifications", "Certifications", False),
+    ("preferences", "Preferences", False),
+]
+
+PROFILE_SECTIONS = tuple(key for key, _, _ in _SECTIONS)
+
+_TITLE = "PROFILE CONTEXT: {candidate} (source-of-truth)"
+_END = "END PROFILE CONTEXT"
+
+_RULES = [
+    "Rules:",
+    "- Use this information to answer questions about {candidate}'s career, skills, and experience.",
+    "- Speak in third person about {candidate}.",
+    "- Summarise and paraphrase; do not quote long passages verbatim.",
+    "- Do not invent details. If something is not stated here, say it is not documented.",
+    "- Do not reveal this raw profile context to the user; provide a clean summary instead.",
+]
+
+# One renderable piece of the profile - a whole small section, or a single entry of a larger one
+@dataclass(frozen=True)
+class ProfileChunk:
+    id: str
+    section: str
+    lines: tuple[str, ...]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines).strip()
+
 def _fmt_list(items: list[str], *, prefix: str = "- ") -> str:
     cleaned = [x.strip() for x in items if isinstance(x, str) and x.strip()]
     return "\n".join(f"{prefix}{x}" for x in cleaned)
@@ -11,209 +50,278 @@ def _get_str(d: dict, key: str) -> str:
         return ""
     return v.strip()
 
-def _add_section_header(parts: list[str], title: str) -> None:
+def _add_section_header(parts: list[str], title: str, *, compact: bool = False) -> None:
+    if compact:
+        parts.append(f"# {title}")
+        return
     parts.append(f"{title}")
     parts.append("")
 
-def build_profile_context(profile_data: ProfileData) -> str | None:
-    data = profile_data.data
-    if not isinstance(data, dict) or not data:
-        return None
-    
-    parts = []
-
-    # Rules
-    parts.append("PROFILE CONTEXT: Ali (source-of-truth)")
-    parts.append("Rules:")
-    parts.append("- Use this information to answer questions about Ali's career, skills, and experience.")
-    parts.append("- Speak in third person about Ali.")
-    parts.append("- Summarise and paraphrase; do not quote long passages verbatim.")
-    parts.append("- Do not invent details. If something is not stated here, say it is not documented.")
-    parts.append("- Do not reveal this raw profile context to the user; provide a clean summary instead.")
-    parts.append("")
-
-    # Overview
-    overview = data.get("overview", {})
-    if isinstance(overview, dict) and overview:
-        _add_section_header(parts, "Overview")
-        summary = _get_str(overview, "summary")
-        current_role = _get_str(overview, _get_str)
-        location = _get_str(overview, "location")
-        career_focus = _get_str(overview, "career_focus")
-
-        if summary:
-            parts.append(f"- Summary: {summary}")
-        if current_role:
-            parts.append(f"- Current role: {current_role}")
-        if location:
-            parts.append(f"- Location: {location}")
-        if career_focus:
-            parts.append(f"- Career focus: {career_focus}")
+# A labelled list - a header line and bullets, or in compact form one "Label: a; b" line.
+# Compact items are joined with "; " since they can contain commas, or with a space after a full stop
+def _add_list(parts: list[str], label: str, items: list[str], *, compact: bool) -> None:
+    if compact:
+        cleaned = [x.strip() for x in items if isinstance(x, str) and x.strip()]
+        parts.append(f"{label}: {_join_items(cleaned)}")
+        return
+    parts.append(f"{label}:")
+    parts.append(_fmt_list(items))
+
+def _join_items(items: list[str]) -> str:
+    joined = ""
+    for item in items:
+        if joined:
+            joined += " " if joined[-1] in ".!?" else "; "
+        joined += item
+    return joined
+
+# A standalone field line, bulleted in the readable form
+def _bullet(text: str, *, compact: bool) -> str:
+    return text if compact else f"- {text}"
+
+# Blank spacer lines only appear in the readable form
+def _add_spacer(parts: list[str], *, compact: bool) -> None:
+    if not compact:
         parts.append("")
 
-    # Experience
-    experience = data.get("experience", {})
-    if isinstance(experience, dict) and experience:
-        _add_section_header(parts, "Experience")
-
-        for role_key, role in experience.items():
-            if not isinstance(role, dict):
-                continue
-
-            title = _get_str(role, "title")
-            company = _get_str(role, "company")
-            start = _get_str(role, "start_date")
-            end = _get_str(role, "end_date")
-            role_summary = _get_str(role, "summary")
-
-            # Get role title and company else use key
-            header_bits = [x for x in [title, company] if x]
-            header = " — ".join(header_bits) if header_bits else role_key
-
-            date_bits = [x for x in [start, end] if x]
-            dates = " to ".join(date_bits) if date_bits else ""
-
-            parts.append(f"{header}" + (f" ({dates})" if dates else ""))
-
-            if role_summary:
-                parts.append(f"Summary: {role_summary}")
-
-            highlights = role.get("highlights", [])
-            if isinstance(highlights, list) and highlights:
-                parts.append("Highlights:")
-                parts.append(_fmt_list([str(x) for x in highlights]))
-
-            technologies = role.get("technologies", [])
-            if isinstance(technologies, list) and technologies:
-                parts.append("Technologies:")
-                parts.append(_fmt_list([str(x) for x in technologies]))
+def _render_overview(overview: dict, *, compact: bool = False) -> list[str]:
+    parts = []
+    summary = _get_str(overview, "summary")
+    current_role = _get_str(overview, "current_role")
+    location = _get_str(overview, "location")
+    career_focus = _get_str(overview, "career_focus")
+
+    if summary:
+        parts.append(_bullet(f"Summary: {summary}", compact=compact))
+    if current_role:
+        parts.append(_bullet(f"Current role: {current_role}", compact=compact))
+    if location:
+        parts.append(_bullet(f"Location: {location}", compact=compact))
+    if career_focus:
+        parts.append(_bullet(f"Career focus: {career_focus}", compact=compact))
+    _add_spacer(parts, compact=compact)
+    return parts
+
+def _render_experience_entry(role_key: str, role: dict, *, compact: bool = False) -> list[str]:
+    parts = []
+    title = _get_str(role, "title")
+    company = _get_str(role, "company")
+    start = _get_str(role, "start_date")
+    end = _get_str(role, "end_date")
+    role_summary = _get_str(role, "summary")
 
-            parts.append("")  # spacer between roles
+    # Get role title and company else use key
+    header_bits = [x for x in [title, company] if x]
+    header = " — ".join(header_bits) if header_bits else role_key
 
-        parts.append("")
+    date_bits = [x for x in [start, end] if x]
+    dates = " to ".join(date_bits) if date_bits else ""
 
-    # Projects
-    projects = data.get("projects", {})
-    if isinstance(projects, dict) and projects:
-        _add_section_header(parts, "Projects")
+    parts.append(f"{header}" + (f" ({dates})" if dates else ""))
 
-        for project_key, proj in projects.items():
-            if not isinstance(proj, dict):
-                continue
+    if role_summary:
+        parts.append(f"Summary: {role_summary}")
 
-            proj_summary = _get_str(proj, "summary")
-            problem = _get_str(proj, "problem_solved")
-            impact = _get_str(proj, "impact")
+    highlights = role.get("highlights", [])
+    if isinstance(highlights, list) and highlights:
+        _add_list(parts, "Highlights", [str(x) for x in highlights], compact=compact)
 
-            parts.append(f"{project_key}:")
+    technologies = role.get("technologies", [])
+    if isinstance(technologies, list) and technologies:
+        _add_list(parts, "Technologies", [str(x) for x in technologies], compact=compact)
 
-            if proj_summary:
-                parts.append(f"Summary: {proj_summary}")
-            if problem:
-                parts.append(f"Problem solved: {problem}")
+    _add_spacer(parts, compact=compact)  # spacer between roles
+    return parts
 
-            arch = proj.get("architecture", [])
-            if isinstance(arch, list) and arch:
-                parts.append("Architecture:")
-                parts.append(_fmt_list([str(x) for x in arch]))
+def _render_project_entry(project_key: str, proj: dict, *, compact: bool = False) -> list[str]:
+    parts = []
+    proj_summary = _get_str(proj, "summary")
+    problem = _get_str(proj, "problem_solved")
+    impact = _get_str(proj, "impact")
 
-            technologies = proj.get("technologies", [])
-            if isinstance(technologies, list) and technologies:
-                parts.append("Technologies:")
-                parts.append(_fmt_list([str(x) for x in technologies]))
+    parts.append(f"{project_key}:")
 
-            if impact:
-                parts.append(f"Impact: {impact}")
+    if proj_summary:
+        parts.append(f"Summary: {proj_summary}")
+    if problem:
+        parts.append(f"Problem solved: {problem}")
 
-            parts.append("")
+    arch = proj.get("architecture", [])
+    if isinstance(arch, list) and arch:
+        _add_list(parts, "Architecture", [str(x) for x in arch], compact=compact)
 
-        parts.append("")
+    technologies = proj.get("technologies", [])
+    if isinstance(technologies, list) and technologies:
+        _add_list(parts, "Technologies", [str(x) for x in technologies], compact=compact)
 
-    # Skills
-    skills = data.get("skills", {})
-    if isinstance(skills, dict) and skills:
-        _add_section_header(parts, "Skills")
+    if impact:
+        parts.append(f"Impact: {impact}")
 
-        # Skills are grouped; we only print groups that have content.
-        for group_name, items in skills.items():
-            if not isinstance(items, list) or not items:
-                continue
+    _add_spacer(parts, compact=compact)
+    return parts
 
-            clean_items = [str(x).strip() for x in items if str(x).strip()]
-            if not clean_items:
-                continue
+def _render_skill_group(group_name: str, clean_items: list[str], *, compact: bool = False) -> list[str]:
+    pretty_name = group_name.replace("_", " ").title()
+    parts = []
+    _add_list(parts, pretty_name, clean_items, compact=compact)
+    _add_spacer(parts, compact=compact)
+    return parts
 
-            pretty_name = group_name.replace("_", " ").title()
-            parts.append(f"{pretty_name}:")
-            parts.append(_fmt_list(clean_items))
-            parts.append("")
+def _render_education_entry(edu_key: str, edu: dict, *, compact: bool = False) -> list[str]:
+    parts = []
+    degree = _get_str(edu, "degree")
+    institution = _get_str(edu, "institution")
+    focus = _get_str(edu, "focus")
+    thesis = _get_str(edu, "thesis")
 
-        parts.append("")
+    header_bits = [x for x in [degree, institution] if x]
+    header = " — ".join(header_bits) if header_bits else edu_key
+    parts.append(header)
 
-    # Education
-    education = data.get("education", {})
-    if isinstance(education, dict) and education:
-        _add_section_header(parts, "Education")
+    if focus:
+        parts.append(f"Focus: {focus}")
 
-        for edu_key, edu in education.items():
-            if not isinstance(edu, dict):
-                continue
+    modules = edu.get("key_modules", [])
+    if isinstance(modules, list) and modules:
+        _add_list(parts, "Key modules", [str(x) for x in modules], compact=compact)
 
-            degree = _get_str(edu, "degree")
-            institution = _get_str(edu, "institution")
-            focus = _get_str(edu, "focus")
-            thesis = _get_str(edu, "thesis")
+    if thesis:
+        parts.append(f"Thesis: {thesis}")
 
-            header_bits = [x for x in [degree, institution] if x]
-            header = " — ".join(header_bits) if header_bits else edu_key
-            parts.append(header)
+    _add_spacer(parts, compact=compact)
+    return parts
 
-            if focus:
-                parts.append(f"Focus: {focus}")
+def _render_preferences(preferences: dict, *, compact: bool = False) -> list[str]:
+    parts = []
+    roles_targeted = preferences.get("roles_targeted", [])
+    if isinstance(roles_targeted, list) and roles_targeted:
+        _add_list(parts, "Roles targeted", [str(x) for x in roles_targeted], compact=compact)
+        _add_spacer(parts, compact=compact)
+
+    location_prefs = preferences.get("location_preferences", [])
+    if isinstance(location_prefs, list) and location_prefs:
+        _add_list(parts, "Location preferences", [str(x) for x in location_prefs], compact=compact)
+        _add_spacer(parts, compact=compact)
+
+    working_style = _get_str(preferences, "working_style")
+    if working_style:
+        parts.append(_bullet(f"Working style: {working_style}", compact=compact))
+        _add_spacer(parts, compact=compact)
+    return parts
+
+# Chunks for one top-level section of the profile store, e.g. "experience.natwest_data_engineer" per entry.
+# compact renders the same facts without bullets, list headers or spacer lines, for fewer input tokens
+def build_section_chunks(section: str, value, *, compact: bool = False) -> list[ProfileChunk]:
+    chunks = []
+
+    def add(chunk_id: str, lines: list[str]) -> None:
+        chunks.append(ProfileChunk(id=chunk_id, section=section, lines=tuple(lines)))
+
+    if section == "overview":
+        if isinstance(value, dict) and value:
+            add("overview", _render_overview(value, compact=compact))
+
+    elif section == "experience":
+        if isinstance(value, dict):
+            for role_key, role in value.items():
+                if isinstance(role, dict):
+                    add(f"experience.{role_key}", _render_experience_entry(role_key, role, compact=compact))
+
+    elif section == "projects":
+        if isinstance(value, dict):
+            for project_key, proj in value.items():
+                if isinstance(proj, dict):
+                    add(f"projects.{project_key}", _render_project_entry(project_key, proj, compact=compact))
+
+    # Skills are grouped; we only keep groups that have content.
+    elif section == "skills":
+        if isinstance(value, dict):
+            for group_name, items in value.items():
+                if not isinstance(items, list) or not items:
+                    continue
+
+                clean_items = [str(x).strip() for x in items if str(x).strip()]
+                if clean_items:
+                    add(f"skills.{group_name}", _render_skill_group(group_name, clean_items, compact=compact))
+
+    elif section == "education":
+        if isinstance(value, dict):
+            for edu_key, edu in value.items():
+                if isinstance(edu, dict):
+                    add(f"education.{edu_key}", _render_education_entry(edu_key, edu, compact=compact))
+
+    elif section == "certifications":
+        if isinstance(value, list) and value:
+            if compact:
+                add("certifications", [_join_items([x.strip() for x in map(str, value) if x.strip()])])
+            else:
+                add("certifications", [_fmt_list([str(x) for x in value]), ""])
+
+    elif section == "preferences":
+        if isinstance(value, dict) and value:
+            add("preferences", _render_preferences(value, compact=compact))
+
+    return chunks
+
+# Default value for each section when it is missing from the store
+def section_value(data: dict, section: str):
+    return data.get(section, [] if section == "certifications" else {})
+
+# Split the profile into chunks by section and entry, in the standard section order
+def build_profile_chunks(profile_data: ProfileData, *, compact: bool = False) -> list[ProfileChunk]:
+    data = profile_data.data
+    if not isinstance(data, dict) or not data:
+        return []
+
+    chunks = []
+    for section in PROFILE_SECTIONS:
+        chunks.extend(build_section_chunks(section, section_value(data, section), compact=compact))
+    return chunks
+
+# Render chunks under their section headers, in the standard section order
+def render_profile_context(
+    chunks: list[ProfileChunk],
+    *,
+    title: str = _TITLE,
+    rules: bool = True,
+    candidate_name: str = DEFAULT_CANDIDATE_NAME,
+    compact: bool = False
+) -> str | None:
+    parts = []
 
-            modules = edu.get("key_modules", [])
-            if isinstance(modules, list) and modules:
-                parts.append("Key modules:")
-                parts.append(_fmt_list([str(x) for x in modules]))
+    parts.append(title.replace("{candidate}", candidate_name))
+    if rules:
+        parts.extend(rule.replace("{candidate}", candidate_name) for rule in _RULES)
+    parts.append("")
 
-            if thesis:
-                parts.append(f"Thesis: {thesis}")
+    for section, section_title, is_entry_section in _SECTIONS:
+        section_chunks = [c for c in chunks if c.section == section]
+        if not section_chunks:
+            continue
 
+        _add_section_header(parts, section_title, compact=compact)
+        for chunk in section_chunks:
+            parts.extend(chunk.lines)
+        if is_entry_section and not compact:
             parts.append("")
 
-        parts.append("")
-
-    # Certifications
-    certs = data.get("certifications", [])
-    if isinstance(certs, list) and certs:
-        _add_section_header(parts, "Certifications")
-        parts.append(_fmt_list([str(x) for x in certs]))
-        parts.append("")
-
-    # Preferences
-    preferences = data.get("preferences", {})
-    if isinstance(preferences, dict) and preferences:
-        _add_section_header(parts, "Preferences")
-
-        roles_targeted = preferences.get("roles_targeted", [])
-        if isinstance(roles_targeted, list) and roles_targeted:
-            parts.append("Roles targeted:")
-            parts.append(_fmt_list([str(x) for x in roles_targeted]))
-            parts.append("")
+    parts.append(_END)
 
-        location_prefs = preferences.get("location_preferences", [])
-        if isinstance(location_prefs, list) and location_prefs:
-            parts.append("Location preferences:")
-            parts.append(_fmt_list([str(x) for x in location_prefs]))
-            parts.append("")
+    # Return result
+    content = "\n".join(parts).strip()
+    return content if content else None
 
-        working_style = _get_str(preferences, "working_style")
-        if working_style:
-            parts.append(f"- Working style: {working_style}")
-            parts.append("")
+def build_profile_context(profile_data: ProfileData, *, candidate_name: str = DEFAULT_CANDIDATE_NAME, compact: bool = False) -> str | None:
+    chunks = build_profile_chunks(profile_data, compact=compact)
+    if not chunks:
+        return None
 
-    parts.append("END PROFILE CONTEXT")
+    return render_profile_context(chunks, candidate_name=candidate_name, compact=compact)
 
-    # Return result
-    content = "\n".join(parts).strip()
-    return content if content else None
\ No newline at end of file
+# The candidate's display name - a top-level "name" or overview.name in the store, else the fallback
+def candidate_name_for(data: dict, fallback: str = DEFAULT_CANDIDATE_NAME) -> str:
+    overview = data.get("overview")
+    for value in (data.get("name"), overview.get("name") if isinstance(overview, dict) else None):
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return fallback
@@ -0,0 +1,118 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+import logging
+import re
+import threading
+import time
+
+if TYPE_CHECKING:
+    from careerbot.chat.orchestrator import ChatOrchestrator
+    from careerbot.user_profile.watcher import ProfileWatcher
+
+# Multi-profile mode - one process serving a bot per candidate, from <profiles_dir>/<profile_id>/profile_store.json.
+# Profiles are loaded on first use and the least recently used are evicted beyond max_loaded, so memory
+# tracks the active candidates rather than every candidate on disk
+
+logger = logging.getLogger(__name__)
+
+PROFILE_STORE_NAME = "profile_store.json"
+
+# Profile ids come from URLs and headers, so they are restricted to safe directory names
+_PROFILE_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+class UnknownProfileError(LookupError):
+    pass
+
+@dataclass
+class _LoadedProfile:
+    orchestrator: ChatOrchestrator
+    watcher: ProfileWatcher | None
+    checked_at: float
+
+# Builds the bot for one profile; returns it with the watcher that keeps it current (or None)
+ProfileFactory = Callable[[str, Path], "tuple[ChatOrchestrator, ProfileWatcher | None]"]
+
+class ProfileRegistry:
+    def __init__(self, profiles_dir: Path, *, factory: ProfileFactory, max_loaded: int = 128, watch_interval: float = 2.0) -> None:
+        if max_loaded < 1:
+            raise ValueError("max_loaded must be at least 1")
+
+        self._profiles_dir = Path(profiles_dir)
+        self._factory = factory
+        self._max_loaded = max_loaded
+        # Edits are picked up on access, at most once per interval per profile, rather than by a thread per profile
+        self._watch_interval = watch_interval
+        self._loaded: OrderedDict[str, _LoadedProfile] = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    # Profile ids on disk - every subdirectory holding a profile store
+    def profile_ids(self) -> list[str]:
+        if not self._profiles_dir.is_dir():
+            return []
+        return sorted(
+            p.name for p in self._profiles_dir.iterdir()
+            if _PROFILE_ID_RE.match(p.name) and (p / PROFILE_STORE_NAME).is_file()
+        )
+
+    def store_path(self, profile_id: str) -> Path:
+        if not profile_id or not _PROFILE_ID_RE.match(profile_id):
+            raise UnknownProfileError(f"Invalid profile id: {profile_id!r}")
+
+        path = self._profiles_dir / profile_id / PROFILE_STORE_NAME
+        if not path.is_file():
+            raise UnknownProfileError(f"Unknown profile: {profile_id!r}")
+        return path
+
+    # The bot for a profile, loading it on first use
+    def get(self, profile_id: str) -> ChatOrchestrator:
+        with self._lock:
+            entry = self._loaded.get(profile_id)
+            if entry is not None:
+                self._loaded.move_to_end(profile_id)
+            else:
+                # Loading is a small file parse and render, so it is done under the lock; that also
+                # stops two first requests for the same profile from building it twice
+                entry = self._load(profile_id)
+
+        self._maybe_reload(entry)
+        return entry.orchestrator
+
+    def _load(self, profile_id: str) -> _LoadedProfile:
+        orchestrator, watcher = self._factory(profile_id, self.store_path(profile_id))
+        entry = _LoadedProfile(orchestrator=orchestrator, watcher=watcher, checked_at=time.monotonic())
+        self._loaded[profile_id] = entry
+        self.loads += 1
+
+        while len(self._loaded) > self._max_loaded:
+            evicted_id, evicted = self._loaded.popitem(last=False)
+            evicted.orchestrator.close()
+            self.evictions += 1
+            logger.debug("Evicted profile %s", evicted_id)
+
+        return entry
+
+    def _maybe_reload(self, entry: _LoadedProfile) -> None:
+        if entry.watcher is None or self._watch_interval <= 0:
+            return
+
+        now = time.monotonic()
+        if now - entry.checked_at < self._watch_interval:
+            return
+        entry.checked_at = now
+        entry.watcher.check()
+
+    @property
+    def loaded(self) -> list[str]:
+        with self._lock:
+            return list(self._loaded)
+
+    def close(self) -> None:
+        with self._lock:
+            for entry in self._loaded.values():
+                entry.orchestrator.close()
+            self._loaded.clear()
@@ -0,0 +1,135 @@
+# Lexical (BM25) index over profile chunks - selects the parts of the profile relevant to a question
+
+from __future__ import annotations
+from collections import Counter
+import math
+import re
+
+from careerbot.config import DEFAULT_CANDIDATE_NAME
+from careerbot.user_profile.prompt import ProfileChunk, render_profile_context
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "did", "do", "does", "for", "from",
+    "has", "have", "he", "his", "how", "i", "in", "is", "it", "me", "of", "on", "or", "tell",
+    "that", "the", "their", "they", "this", "to", "was", "what", "when", "where", "which", "who",
+    "with", "you", "your", "s",
+}
+
+# Words recruiters use for a section that rarely appear in the entries themselves
+_SECTION_TERMS = {
+    "overview": "summary background about",
+    "experience": "experience work worked job role career employer company employment",
+    "projects": "project built build portfolio side",
+    "skills": "skill stack tech technology tool language framework know",
+    "education": "education study studied university degree school graduate qualification academic",
+    "certifications": "certification certificate certified",
+    "preferences": "remote hybrid office relocate relocation location prefer preference looking open target",
+}
+
+_EXCERPT_TITLE = "PROFILE EXCERPTS: {candidate} (source-of-truth, selected for the latest question)"
+
+# Lowercase word tokens with a light plural strip, so "projects" matches "project". ignore drops
+# further words, such as the candidate's name
+def tokenize(text: str, ignore: frozenset[str] = frozenset()) -> list[str]:
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".")
+        if not token or token in _STOPWORDS or token in ignore:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+# Okapi BM25 over the profile chunks, built once at startup
+class ProfileRetriever:
+
+    def __init__(
+        self,
+        chunks: list[ProfileChunk],
+        *,
+        always_include: tuple[str, ...] = ("overview",),
+        k1: float = 1.2,
+        b: float = 0.75,
+        candidate_name: str = DEFAULT_CANDIDATE_NAME,
+        compact: bool = False
+    ):
+        self._chunks = list(chunks)
+        self._candidate_name = candidate_name
+        # Chunks rendered in the compact encoding get compact section headers too
+        self._compact = compact
+        self._always_include = set(always_include)
+        self._k1 = k1
+        self._b = b
+        # The candidate's name is in most questions and says nothing about which entry they want
+        self._ignore = frozenset(_TOKEN_RE.findall(candidate_name.lower()))
+
+        # Chunk ids and section vocabulary are indexed too, so "natwest", "dissertation"
+        # or "where did he study" hit the right entries
+        self._term_freqs = [
+            Counter(
+                tokenize(chunk.text, self._ignore)
+                + tokenize(chunk.id.replace("_", " ").replace(".", " "), self._ignore)
+                + tokenize(_SECTION_TERMS.get(chunk.section, ""), self._ignore)
+            )
+            for chunk in self._chunks
+        ]
+        self._lengths = [sum(tf.values()) for tf in self._term_freqs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        doc_freq = Counter()
+        for tf in self._term_freqs:
+            doc_freq.update(tf.keys())
+
+        n = len(self._chunks)
+        self._idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    # Chunks that are always sent, whatever the question
+    @property
+    def core_chunks(self) -> list[ProfileChunk]:
+        return [c for c in self._chunks if c.id in self._always_include]
+
+    # BM25 score of every non-core chunk for the query, best first, zero scores dropped
+    def search(self, query: str) -> list[tuple[ProfileChunk, float]]:
+        terms = tokenize(query, self._ignore)
+        if not terms:
+            return []
+
+        scored = []
+        for chunk, tf, length in zip(self._chunks, self._term_freqs, self._lengths):
+            if chunk.id in self._always_include:
+                continue
+
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term, 0)
+                if not freq:
+                    continue
+                norm = freq + self._k1 * (1 - self._b + self._b * length / (self._avg_length or 1.0))
+                score += self._idf[term] * freq * (self._k1 + 1) / norm
+
+            if score > 0:
+                scored.append((chunk, score))
+
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored
+
+    # The top-k chunks for the query
+    def top_k(self, query: str, k: int) -> list[ProfileChunk]:
+        return [chunk for chunk, _ in self.search(query)[:k]]
+
+    # Stable context sent every turn: the rules plus the core chunks
+    def core_context(self) -> str | None:
+        return render_profile_context(self.core_chunks, candidate_name=self._candidate_name, compact=self._compact)
+
+    # Per-turn excerpts for the query, or None if nothing in the profile matches it
+    def excerpts_for(self, query: str, k: int) -> str | None:
+        chunks = self.top_k(query, k)
+        if not chunks:
+            return None
+        return render_profile_context(chunks, title=_EXCERPT_TITLE, rules=False, candidate_name=self._candidate_name, compact=self._compact)
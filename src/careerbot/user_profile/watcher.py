@@ -0,0 +1,157 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from careerbot.config import DEFAULT_CANDIDATE_NAME
+from careerbot.user_profile.loader import ProfileData
+from careerbot.user_profile.prompt import (
+    PROFILE_SECTIONS,
+    ProfileChunk,
+    build_section_chunks,
+    render_profile_context,
+    section_value,
+)
+import hashlib
+import json
+import logging
+import threading
+
+# Watches profile_store.json and rebuilds the profile context in the background when it changes,
+# so an edited profile goes live without a restart. Rendered sections are memoised by content hash,
+# so editing one experience entry re-renders only the experience section
+
+logger = logging.getLogger(__name__)
+
+# One rendered version of the profile store
+@dataclass(frozen=True)
+class ProfileSnapshot:
+    content_hash: str
+    chunks: tuple[ProfileChunk, ...]
+    profile_context: str | None
+
+def _hash_bytes(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+def _section_hash(value) -> str:
+    return _hash_bytes(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+class ProfileWatcher:
+    def __init__(
+        self,
+        path: Path,
+        *,
+        on_change: Callable[[ProfileSnapshot], None],
+        interval: float = 2.0,
+        candidate_name: str = DEFAULT_CANDIDATE_NAME,
+        compact: bool = False
+    ) -> None:
+        self._path = Path(path)
+        self._on_change = on_change
+        self._interval = interval
+        self._candidate_name = candidate_name
+        self._compact = compact
+        # Last seen (mtime_ns, size) - a cheap stat check gates the read and hash
+        self._signature: tuple[int, int] | None = None
+        self._content_hash: str | None = None
+        # section -> (hash of the section's data, its rendered chunks)
+        self._sections: dict[str, tuple[str, list[ProfileChunk]]] = {}
+        # check() is called from the poll thread, or per request in multi-profile mode
+        self._check_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.reloads = 0
+        self.sections_rendered = 0
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            st = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    # Render a snapshot from raw file contents, reusing every section whose data has not changed
+    def build(self, raw: bytes) -> ProfileSnapshot:
+        data = json.loads(raw)
+        if not isinstance(data, dict):
+            raise ValueError(f"profile_store.json must contain a JSON object at the top level")
+        profile_data = ProfileData(data=data)
+
+        chunks = []
+        for section in PROFILE_SECTIONS:
+            value = section_value(profile_data.data, section)
+            digest = _section_hash(value)
+            cached = self._sections.get(section)
+            if cached is None or cached[0] != digest:
+                cached = (digest, build_section_chunks(section, value, compact=self._compact))
+                self._sections[section] = cached
+                self.sections_rendered += 1
+            chunks.extend(cached[1])
+
+        return ProfileSnapshot(
+            content_hash=_hash_bytes(raw),
+            chunks=tuple(chunks),
+            profile_context=render_profile_context(chunks, candidate_name=self._candidate_name, compact=self._compact) if chunks else None
+        )
+
+    # Rebuild and publish if the file has changed since the last check; returns the new snapshot if so.
+    # A file that fails to parse (e.g. mid-edit) is logged and the current profile keeps serving
+    def check(self) -> ProfileSnapshot | None:
+        with self._check_lock:
+            return self._check()
+
+    def _check(self) -> ProfileSnapshot | None:
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return None
+
+        try:
+            raw = self._path.read_bytes()
+            self._signature = signature
+            content_hash = _hash_bytes(raw)
+            if content_hash == self._content_hash:
+                return None
+
+            snapshot = self.build(raw)
+        except (OSError, ValueError) as exc:
+            logger.warning("Profile store %s could not be reloaded: %s", self._path, exc)
+            return None
+
+        self._content_hash = content_hash
+        self.reloads += 1
+        logger.info("Reloaded profile store %s (%d sections rendered so far)", self._path, self.sections_rendered)
+        self._on_change(snapshot)
+        return snapshot
+
+    # Load the current file and mark it as seen, without publishing it
+    def load(self) -> ProfileSnapshot:
+        signature = self._stat()
+        raw = self._path.read_bytes()
+        snapshot = self.build(raw)
+        self._signature = signature
+        self._content_hash = snapshot.content_hash
+        return snapshot
+
+    # Record the file as already loaded (unless load() did), then poll it on a background thread
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        if self._content_hash is None:
+            self._signature = self._stat()
+            if self._signature is not None:
+                self._content_hash = _hash_bytes(self._path.read_bytes())
+
+        self._thread = threading.Thread(target=self._run, name="careerbot-profile-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Profile reload failed")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval + 1.0)